@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for the account statement parser; run them via 'python -m bench.run_benchmarks --help'.
+
+Copyright 2026-10-18 ChrisRBe
+"""
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark for parsing, aggregating and writing synthetic account statements of the configured platforms.
+
+For every platform a statement file with the requested number of rows is generated. Every platform and aggregation
+is measured in its own process, so the reported peak memory usage (RSS) is not affected by previous runs. The
+results can be saved as JSON and compared with a previous run to spot regressions.
+
+Usage, from the repository root:
+
+    python -m bench.run_benchmarks --rows 100000 --platform mintos --aggregate daily
+    python -m bench.run_benchmarks --save baseline.json
+    python -m bench.run_benchmarks --compare baseline.json
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import argparse
+import codecs
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+from bench.statement_generator import StatementGenerator
+from src.batch_processor import get_parser_class
+from src.batch_processor import PARSER_ENGINES
+from src.batch_processor import write_statements
+from src.p2p_config import load_config
+from src.p2p_statement_parser import SUPPORTED_AGGREGATIONS
+
+
+CONFIG_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "config")
+logger = logging.getLogger("run-benchmarks")
+
+
+def get_peak_rss():
+    """
+    Get the peak resident set size of the current process.
+
+    :return: peak RSS in MiB, None if not available on this platform
+    """
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes everywhere else
+    return peak_rss / (1024 * 1024) if sys.platform == "darwin" else peak_rss / 1024
+
+
+def run_case(config_file, infile, aggregate, engine, row_count):
+    """
+    Worker function measuring one platform and aggregation.
+
+    :param config_file: path to the YAML configuration file of the platform
+    :param infile: synthetic account statement file
+    :param aggregate: aggregation period
+    :param engine: name of the parser engine
+    :param row_count: number of rows in the account statement file
+
+    :return: list of result dicts, one per stage
+    """
+    platform_parser = get_parser_class(engine)(config_file, infile)
+    platform_parser.config = load_config(config_file)
+    results = []
+
+    def measure(stage, function, rows):
+        start = time.perf_counter()
+        output = function()
+        seconds = time.perf_counter() - start
+        results.append(
+            {
+                "stage": stage,
+                "rows": rows,
+                "seconds": seconds,
+                "rows_per_second": rows / seconds if seconds else None,
+                "peak_rss_mib": get_peak_rss(),
+            }
+        )
+        return output
+
+    def parse():
+        with codecs.open(infile, "r", encoding=platform_parser.config.get_csv_encoding()) as statement_file:
+            return list(platform_parser.iter_formatted_entries(statement_file))
+
+    records = measure("parse", parse, row_count)
+    entries = measure("aggregate", lambda: list(platform_parser.aggregate_entries(records, aggregate)), len(records))
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        measure("write", lambda: write_statements(entries, os.path.join(tmpdirname, "output.csv")), len(entries))
+    return results
+
+
+def parse_args():
+    """
+    Parse command line arguments
+
+    :return: list of parsed command line arguments
+    """
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, default=100000, help="number of rows per statement file")
+    arg_parser.add_argument(
+        "--platform",
+        action="append",
+        help="platform configuration to benchmark, may be repeated; defaults to all platforms",
+    )
+    arg_parser.add_argument(
+        "--aggregate",
+        action="append",
+        choices=SUPPORTED_AGGREGATIONS,
+        help="aggregation to benchmark, may be repeated; defaults to all aggregations",
+    )
+    arg_parser.add_argument("--engine", choices=sorted(PARSER_ENGINES), default="python", help="parser engine")
+    arg_parser.add_argument("--rows-per-day", type=int, default=50, help="number of statements per day")
+    arg_parser.add_argument("--save", help="write the results to this JSON file")
+    arg_parser.add_argument("--compare", help="compare the results with a JSON file written by --save")
+    return arg_parser.parse_args()
+
+
+def print_results(results, baseline=None):
+    """
+    Print the results as table, optionally with the change of the throughput compared to a previous run.
+
+    :param results: list of result dicts
+    :param baseline: list of result dicts of a previous run
+    """
+    baseline_rates = {
+        (result["platform"], result["aggregate"], result["stage"]): result["rows_per_second"]
+        for result in baseline or []
+    }
+    print(
+        f"{'platform':<16} {'aggregate':<12} {'stage':<10} {'rows':>10} {'seconds':>9} {'rows/s':>12} "
+        f"{'peak RSS MiB':>13} {'change':>8}"
+    )
+    for result in results:
+        peak_rss = "n/a" if result["peak_rss_mib"] is None else f"{result['peak_rss_mib']:.1f}"
+        rate = result["rows_per_second"] or 0
+        change = ""
+        baseline_rate = baseline_rates.get((result["platform"], result["aggregate"], result["stage"]))
+        if baseline_rate:
+            change = f"{(rate - baseline_rate) / baseline_rate:+.1%}"
+        print(
+            f"{result['platform']:<16} {result['aggregate']:<12} {result['stage']:<10} {result['rows']:>10} "
+            f"{result['seconds']:>9.3f} {rate:>12.0f} {peak_rss:>13} {change:>8}"
+        )
+
+
+def main():
+    """
+    Generate the statement files and run the benchmarks.
+
+    :return: True
+    """
+    options = parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    platforms = options.platform or sorted(
+        os.path.splitext(os.path.basename(config_file))[0]
+        for config_file in glob.glob(os.path.join(CONFIG_DIR, "*.yml"))
+    )
+    aggregations = options.aggregate or SUPPORTED_AGGREGATIONS
+
+    results = []
+    spawn_context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        for platform in platforms:
+            config_file = os.path.join(CONFIG_DIR, f"{platform}.yml")
+            infile = os.path.join(tmpdirname, f"{platform}.csv")
+            StatementGenerator(config_file).write(infile, options.rows, options.rows_per_day)
+
+            for aggregate in aggregations:
+                with ProcessPoolExecutor(max_workers=1, mp_context=spawn_context) as executor:
+                    case_results = executor.submit(
+                        run_case, config_file, infile, aggregate, options.engine, options.rows
+                    ).result()
+                for result in case_results:
+                    result.update({"platform": platform, "aggregate": aggregate, "engine": options.engine})
+                results += case_results
+
+    baseline = None
+    if options.compare:
+        with open(options.compare, "r", encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+    print_results(results, baseline)
+
+    if options.save:
+        with open(options.save, "w", encoding="utf-8") as results_file:
+            json.dump(results, results_file, indent=2)
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(not main())
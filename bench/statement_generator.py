@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+Module for generating synthetic account statements of arbitrary size for the configured platforms.
+
+The statements use the column names and the date format of the platform configuration. Booking types are generated
+from the type regexes of the configuration, so every category of the platform shows up. If a test data file of the
+platform exists, its columns, delimiter and number format are used as well.
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import csv
+import datetime
+import logging
+import os
+import random
+import re
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # pragma: no cover
+    import sre_parse
+
+from src.p2p_config import load_config
+
+
+TESTDATA_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "src", "test", "testdata")
+CATEGORY_WEIGHTS = {
+    "Ignored": 50,
+    "Zinsen": 35,
+    "Undecided": 4,
+    "Gebühren": 4,
+    "Einlage": 4,
+    "Entnahme": 3,
+}
+CATEGORY_VALUE_RANGES = {
+    "Ignored": (-50.0, 50.0),
+    "Zinsen": (0.01, 2.0),
+    "Undecided": (-1.0, 1.0),
+    "Gebühren": (-2.0, -0.01),
+    "Einlage": (100.0, 5000.0),
+    "Entnahme": (-5000.0, -100.0),
+}
+BOOKING_TYPE_VARIANTS = 20
+LOAN_ID_PLACEHOLDER = "{loan_id}"
+VALUE_SUFFIX_REGEX = re.compile(r"^-?[\d.,]+(\D*)$")
+logger = logging.getLogger(__name__)
+
+
+def create_loan_id(rng):
+    """
+    Create a random loan number as used in the booking types and details of the platforms.
+
+    :param rng: random.Random instance
+
+    :return: loan number
+    """
+    return "{}-01".format(rng.randrange(1000000, 9999999))
+
+
+def sample_regex(pattern, rng, filler=None):
+    """
+    Create a string matching a regular expression. Only the constructs used in the platform configurations are
+    supported; arbitrary text (.*) is either left empty or filled with the filler.
+
+    :param pattern: regular expression
+    :param rng: random.Random instance
+    :param filler: text used for arbitrary text, a random loan number if not given
+
+    :return: string matching the pattern
+    """
+    return _sample_tokens(sre_parse.parse(pattern), rng, filler)
+
+
+def _sample_tokens(tokens, rng, filler):
+    return "".join(_sample_token(operation, argument, rng, filler) for operation, argument in tokens)
+
+
+def _sample_token(operation, argument, rng, filler):
+    name = str(operation)
+    if name == "LITERAL":
+        return chr(argument)
+    if name in ("ANY", "NOT_LITERAL"):
+        return "x"
+    if name == "IN":
+        return _sample_set(argument)
+    if name in ("MAX_REPEAT", "MIN_REPEAT"):
+        minimum, maximum, tokens = argument
+        if str(tokens[0][0]) == "ANY" and not minimum:
+            return rng.choice(["", " {} ".format(filler or create_loan_id(rng))])
+        return _sample_tokens(tokens, rng, filler) * max(minimum, 1 if maximum else 0)
+    if name == "SUBPATTERN":
+        return _sample_tokens(argument[-1], rng, filler)
+    if name == "BRANCH":
+        return _sample_tokens(rng.choice(argument[1]), rng, filler)
+    if name == "CATEGORY":
+        return _sample_category(argument)
+    return ""
+
+
+def _sample_set(items):
+    for operation, argument in items:
+        name = str(operation)
+        if name == "NEGATE":
+            return "~"
+        if name == "LITERAL":
+            return chr(argument)
+        if name == "RANGE":
+            return chr(argument[0])
+        if name == "CATEGORY":
+            return _sample_category(argument)
+    return "x"
+
+
+def _sample_category(category):
+    name = str(category)
+    if "DIGIT" in name:
+        return "0" if "NOT" not in name else "x"
+    if "SPACE" in name:
+        return " " if "NOT" not in name else "x"
+    return "x" if "NOT" not in name else " "
+
+
+def find_sample_file(config, testdata_dir=TESTDATA_DIR):
+    """
+    Find a test data file of the platform, i.e. a file whose header contains all configured columns.
+
+    :param config: Config of the platform
+    :param testdata_dir: directory containing the test data files
+
+    :return: path of the test data file, None if there is none
+    """
+    columns = {
+        config.get_booking_date(),
+        config.get_booking_details(),
+        config.get_booking_id(),
+        config.get_booking_type(),
+        config.get_booking_value(),
+    }
+    if config.get_booking_currency():
+        columns.add(config.get_booking_currency())
+
+    for file_name in sorted(os.listdir(testdata_dir)):
+        sample_file = os.path.join(testdata_dir, file_name)
+        with open(sample_file, "r", encoding=config.get_csv_encoding()) as sample:
+            header_line = sample.readline()
+        try:
+            dialect = csv.Sniffer().sniff(header_line)
+        except csv.Error:
+            continue
+        if columns.issubset(next(csv.reader([header_line], dialect))):
+            return sample_file
+    return None
+
+
+class StatementGenerator(object):
+    """
+    Generates synthetic account statement files for a platform configuration.
+    """
+
+    def __init__(self, config_file, sample_file=None, seed=0):
+        """
+        Constructor for StatementGenerator
+
+        :param config_file: path to the YAML configuration file of the platform
+        :param sample_file: account statement file of the platform used for the columns, delimiter and number format;
+        looked up in the test data if not given
+        :param seed: seed of the random number generator, the same seed creates the same statements
+        """
+        self.config = load_config(config_file)
+        self.rng = random.Random(seed)
+        self.fieldnames = []
+        self.delimiter = self.config.get_csv_delimiter() or ";"
+        self.number_format = self.config.get_number_format() or {"decimal": ".", "grouping": None}
+        self.value_suffix = ""
+        self.__read_sample(sample_file or find_sample_file(self.config))
+        for column in [
+            self.config.get_booking_id(),
+            self.config.get_booking_date(),
+            self.config.get_booking_type(),
+            self.config.get_booking_details(),
+            self.config.get_booking_value(),
+            self.config.get_booking_currency(),
+        ]:
+            if column and column not in self.fieldnames:
+                self.fieldnames.append(column)
+        self.booking_types = self.__create_booking_types()
+
+    def __read_sample(self, sample_file):
+        """
+        Take the columns, delimiter and number format from an account statement file of the platform.
+        """
+        if not sample_file:
+            logger.info("No sample file found, using the configured columns only")
+            return
+        with open(sample_file, "r", encoding=self.config.get_csv_encoding(), newline="") as sample:
+            header_line = sample.readline()
+            dialect = csv.Sniffer().sniff(header_line)
+            sample.seek(0)
+            rows = list(csv.DictReader(sample, dialect=dialect))
+        self.fieldnames = list(rows[0].keys()) if rows else []
+        self.delimiter = dialect.delimiter
+
+        raw_values = [row[self.config.get_booking_value()] for row in rows if row[self.config.get_booking_value()]]
+        self.number_format = self.config.detect_number_format(raw_values) or self.number_format
+        if raw_values:
+            suffix = VALUE_SUFFIX_REGEX.match(raw_values[0])
+            self.value_suffix = suffix.group(1) if suffix else ""
+
+    def __create_booking_types(self):
+        """
+        Create a set of booking types for every category of the platform, checked against the classifier. Arbitrary
+        text of the type regexes is replaced by LOAN_ID_PLACEHOLDER, which is filled with the loan number of each row,
+        so the booking types are about as diverse as in real account statements. Platforms without ignorable entries
+        get booking types of unknown type instead, which are skipped by the parser as well.
+
+        :return: dict mapping category to a list of booking types
+        """
+        booking_types = {}
+        for regex, category in self.config.get_category_mappings():
+            if not regex or category not in CATEGORY_WEIGHTS:
+                continue
+            for _ in range(BOOKING_TYPE_VARIANTS):
+                booking_type = sample_regex(regex.pattern, self.rng, LOAN_ID_PLACEHOLDER)
+                loan_id = create_loan_id(self.rng)
+                if self.config.classify_booking_type(booking_type.replace(LOAN_ID_PLACEHOLDER, loan_id)) == category:
+                    booking_types.setdefault(category, []).append(booking_type)
+
+        if "Ignored" not in booking_types:
+            unknown_types = ["Investment in loan ", "Principal repayment ", "Secondary market sale "]
+            booking_types["Ignored"] = [
+                booking_type + LOAN_ID_PLACEHOLDER
+                for booking_type in unknown_types
+                if not self.config.classify_booking_type(booking_type + create_loan_id(self.rng))
+            ]
+        return {category: types for category, types in booking_types.items() if types}
+
+    def format_value(self, value):
+        """
+        Format a value in the number format of the platform.
+
+        :param value: float
+
+        :return: formatted value
+        """
+        formatted_value = "{:,.2f}".format(value) if self.number_format.get("grouping") else "{:.2f}".format(value)
+        translation = {ord("."): self.number_format["decimal"], ord(","): self.number_format.get("grouping") or ""}
+        return formatted_value.translate(translation) + self.value_suffix
+
+    def iter_rows(self, row_count, rows_per_day=50, start_date=datetime.datetime(2018, 1, 1)):
+        """
+        Yield synthetic account statement rows in ascending date order.
+
+        :param row_count: number of rows
+        :param rows_per_day: number of rows booked on the same day
+        :param start_date: date of the first row
+
+        :return: generator of rows as dict
+        """
+        categories = list(self.booking_types)
+        weights = [CATEGORY_WEIGHTS[category] for category in categories]
+        for index in range(row_count):
+            category = self.rng.choices(categories, weights)[0]
+            booking_type = self.rng.choice(self.booking_types[category])
+            loan_id = create_loan_id(self.rng)
+            booking_date = start_date + datetime.timedelta(days=index // rows_per_day, seconds=index % rows_per_day)
+
+            row = dict.fromkeys(self.fieldnames, "")
+            row[self.config.get_booking_id()] = str(100000000 + index)
+            row[self.config.get_booking_details()] = "Loan ID: {}".format(loan_id)
+            row[self.config.get_booking_type()] = booking_type.replace(LOAN_ID_PLACEHOLDER, loan_id)
+            row[self.config.get_booking_date()] = booking_date.strftime(self.config.get_booking_date_format())
+            row[self.config.get_booking_value()] = self.format_value(
+                self.rng.uniform(*CATEGORY_VALUE_RANGES[category])
+            )
+            if self.config.get_booking_currency():
+                row[self.config.get_booking_currency()] = "EUR"
+            yield row
+
+    def write(self, outfile, row_count, rows_per_day=50):
+        """
+        Write a synthetic account statement file.
+
+        :param outfile: path of the account statement file
+        :param row_count: number of rows
+        :param rows_per_day: number of rows booked on the same day
+        """
+        with open(outfile, "w", encoding="utf-8", newline="") as statement_file:
+            writer = csv.DictWriter(statement_file, fieldnames=self.fieldnames, delimiter=self.delimiter)
+            writer.writeheader()
+            writer.writerows(self.iter_rows(row_count, rows_per_day))
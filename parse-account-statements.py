@@ -21,20 +21,21 @@ Control the way how account statements are processed via the aggregate parameter
     - daily: This aggregates all bookings of the same type into one statement per type and day.
     - monthly: This aggregates all bookings of the same type into one statement per type and month. Sets
             the last day of the month as transaction date.
+    - weekly, quarterly, yearly: Like monthly, with the last day of the week (Sunday), quarter or year as
+            transaction date.
 
 Default behaviour for now is 'transaction'.
 
 Copyright 2018-03-17 ChrisRBe
 """
 import argparse
+import glob
 import logging
 import os
 import sys
 
-from src import p2p_statement_parser
-from src import portfolio_writer
-
 
+AUTO_DETECT = "auto"
 root_logger = logging.getLogger()
 logger = logging.getLogger("parse-account-statements")
 
@@ -64,20 +65,23 @@ def parse_args():
     arg_parser.add_argument(
         "infile",
         type=str,
-        help="CSV file containing the downloaded data from the P2P site",
+        nargs="*",
+        help="CSV files or glob patterns of CSV files containing the downloaded data from the P2P site; the files may "
+        "be compressed (.gz, .xz, .bz2) or zip archives of CSV files",
     )
     arg_parser.add_argument(
         "--aggregate",
         type=str,
         help="specify how account statements should be summarized",
-        choices=["transaction", "daily", "monthly"],
+        choices=["transaction", "daily", "weekly", "monthly", "quarterly", "yearly"],
         default="transaction",
     )
     arg_parser.add_argument(
         "--type",
         type=str,
-        help="Specifies the p2p lending operator",
+        help="Specifies the p2p lending operator; auto detects the operator of every input file from its header line",
         choices=[
+            AUTO_DETECT,
             "bondora_go_grow",
             "bondora",
             "debitumnetwork",
@@ -91,6 +95,77 @@ def parse_args():
         ],
         default="mintos",
     )
+    arg_parser.add_argument(
+        "--jobs",
+        type=int,
+        help="number of worker processes used to convert several input files or chunks of a single input file in "
+        "parallel",
+        default=1,
+    )
+    arg_parser.add_argument(
+        "--output-mode",
+        type=str,
+        help="write one output file for all input files (merge), one output file for all input files without "
+        "duplicate statements in date order (dedup) or one output file per input file (per-input)",
+        choices=["merge", "dedup", "per-input"],
+        default="merge",
+    )
+    arg_parser.add_argument(
+        "--engine",
+        type=str,
+        help="parser engine; the vectorized engine requires pandas",
+        choices=["python", "vectorized"],
+        default="python",
+    )
+    arg_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only convert the statements added to the input files since the last run; uses the python engine",
+    )
+    arg_parser.add_argument(
+        "--compress-output",
+        action="store_true",
+        help="compress the Portfolio Performance files with gzip, adding the suffix .gz to their names",
+    )
+    arg_parser.add_argument(
+        "--split-currency",
+        action="store_true",
+        help="write one Portfolio Performance file per currency, adding the currency to the file names",
+    )
+    arg_parser.add_argument(
+        "--sort",
+        action="store_true",
+        help="write the entries in chronological order; entries of the same day keep their order",
+    )
+    arg_parser.add_argument(
+        "--sort-buffer-size",
+        type=int,
+        help="with --sort, maximum number of entries sorted in memory; more entries are sorted using temporary files",
+        default=1000000,
+    )
+    arg_parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print the time spent in every processing stage; uses a single process",
+    )
+    arg_parser.add_argument(
+        "--profile-output",
+        type=str,
+        help="additionally write cProfile statistics of the conversion to this file, see the pstats module",
+    )
+    arg_parser.add_argument(
+        "--watch",
+        type=str,
+        action="append",
+        metavar="DIR",
+        help="keep running and convert the CSV files dropped into this directory, may be repeated",
+    )
+    arg_parser.add_argument(
+        "--settle-time",
+        type=float,
+        help="with --watch, seconds the size of a new file must not change before it is converted",
+        default=2.0,
+    )
     arg_parser.add_argument(
         "--debug",
         action="store_const",
@@ -100,7 +175,37 @@ def parse_args():
         help="enables debug level logging if set",
     )
 
-    return arg_parser.parse_args()
+    options = arg_parser.parse_args()
+    if not options.infile and not options.watch:
+        arg_parser.error("at least one input file or a directory to watch is required")
+    if options.infile and options.watch:
+        arg_parser.error("input files can not be combined with --watch")
+    if options.watch and options.type == AUTO_DETECT:
+        arg_parser.error("--watch requires the platform selected via --type")
+    if options.sort_buffer_size < 1:
+        arg_parser.error("--sort-buffer-size must be at least 1")
+    if options.output_mode == "dedup" and options.engine != "python":
+        arg_parser.error("--output-mode dedup requires the python engine")
+    if options.output_mode == "dedup" and options.jobs > 1 and not options.watch:
+        arg_parser.error("--output-mode dedup reads the input files one after the other, --jobs requires --watch")
+    return options
+
+
+def get_platform_config(operator_name="mintos"):
+    """
+    Return the path of the configuration file for the required Peer-to-Peer lending platform
+
+    :param operator_name: name of the P2P lending site, defaults to Mintos
+
+    :return: path of the platform configuration file, None if not supported
+    """
+    logger.info("Loading config for %s", operator_name)
+    config = os.path.join(os.path.dirname(__file__), "config", f"{operator_name}.yml")
+    if os.path.exists(config):
+        return config
+    else:
+        logging.error("The provided platform %s is currently not supported", operator_name)
+        return None
 
 
 def platform_factory(infile, operator_name="mintos"):
@@ -111,20 +216,185 @@ def platform_factory(infile, operator_name="mintos"):
 
     :return: object for the actual lending platform parser, None if not supported
     """
-    logger.info("Loading config for %s", operator_name)
-    config = os.path.join(os.path.dirname(__file__), "config", f"{operator_name}.yml")
-    if os.path.exists(config):
+    from src import p2p_statement_parser
+
+    config = get_platform_config(operator_name)
+    if config:
         platform_parser = p2p_statement_parser.PeerToPeerPlatformParser(config, infile)
         return platform_parser
-    else:
-        logging.error("The provided platform %s is currently not supported", operator_name)
-        return None
+    return None
+
+
+def profile_conversion(processor, infiles, options):
+    """
+    Convert the input files in a single process and print the time spent in every processing stage.
+
+    :param processor: BatchProcessor for the platform
+    :param infiles: list of account statement files
+    :param options: parsed command line arguments
+
+    :return: number of entries written
+    """
+    import cProfile
+    import time
+
+    from src import profiling
+
+    if processor.jobs > 1:
+        logger.warning("Profiling measures the current process only, ignoring --jobs %s", processor.jobs)
+        processor.jobs = 1
+
+    cprofile = cProfile.Profile() if options.profile_output else None
+    start = time.perf_counter()
+    with profiling.profile() as profiler:
+        if cprofile:
+            cprofile.enable()
+        try:
+            statement_count = processor.convert(infiles, options.output_mode)
+        finally:
+            if cprofile:
+                cprofile.disable()
+    total_seconds = time.perf_counter() - start
+
+    print(profiler.format_table())
+    print(f"total time: {total_seconds:.3f} s; build_record includes classify, parse_date and parse_value")
+    if cprofile:
+        cprofile.dump_stats(options.profile_output)
+        logger.info("Wrote cProfile statistics to %s", options.profile_output)
+    return statement_count
+
+
+def group_by_platform(infiles, operator_name):
+    """
+    Assign the input files to their Peer-to-Peer lending platform. With the operator name auto the platform of every
+    file is detected from its header line, and from the booking types of its first rows if several platforms match
+    the header. Files whose platform cannot be detected are reported and skipped.
+
+    :param infiles: list of account statement files
+    :param operator_name: name of the P2P lending site or auto
+
+    :return: dict mapping platform names to lists of input files, empty if no platform was detected
+    """
+    if operator_name != AUTO_DETECT:
+        return {operator_name: infiles}
+
+    from src.platform_detection import HeaderSignatureIndex
+    from src.platform_detection import select_by_booking_types
+
+    signature_index = HeaderSignatureIndex.from_registry()
+    platform_files = {}
+    for infile in infiles:
+        platforms = signature_index.detect(infile)
+        if len(platforms) > 1:
+            platforms = select_by_booking_types(infile, platforms)
+        if len(platforms) > 1:
+            logger.error(
+                "Skipping %s, it matches several platforms (%s); convert it with --type", infile, ", ".join(platforms)
+            )
+            continue
+        if not platforms:
+            logger.error("Skipping %s, its header does not match any supported platform", infile)
+            continue
+        logger.info("Detected platform %s for %s", platforms[0], infile)
+        platform_files.setdefault(platforms[0], []).append(infile)
+    return platform_files
+
+
+def create_processor(config, operator_name, options):
+    """
+    Create the BatchProcessor for a platform.
+
+    :param config: path of the platform configuration file
+    :param operator_name: name of the P2P lending site
+    :param options: parsed command line arguments
+
+    :return: BatchProcessor
+    """
+    from src.batch_processor import BatchProcessor
+
+    return BatchProcessor(
+        config,
+        operator_name,
+        aggregate=options.aggregate,
+        jobs=options.jobs,
+        engine=options.engine,
+        incremental=options.incremental,
+        compress_output=options.compress_output,
+        split_currency=options.split_currency,
+        sort=options.sort,
+        sort_buffer_size=options.sort_buffer_size,
+    )
+
+
+def convert_platform_files(platform_files, options):
+    """
+    Convert the input files of every platform with the options given on the command line.
+
+    :param platform_files: dict mapping platform names to lists of input files, see group_by_platform
+    :param options: parsed command line arguments
+
+    :return: number of entries written, None if an error occurred
+    """
+    statement_count = 0
+    for platform, platform_infiles in platform_files.items():
+        config = get_platform_config(platform)
+        if not config:
+            return None
+        processor = create_processor(config, platform, options)
+        try:
+            if options.profile or options.profile_output:
+                statement_count += profile_conversion(processor, platform_infiles, options)
+            else:
+                statement_count += processor.convert(platform_infiles, options.output_mode)
+        except ValueError as error:
+            logger.error("%s", error)
+            return None
+    return statement_count
+
+
+def watch(processor, options):
+    """
+    Convert the account statement files dropped into the watched directories until the program is interrupted.
+
+    :param processor: BatchProcessor for the platform
+    :param options: parsed command line arguments
+
+    :return: True
+    """
+    from src.watcher import WatchService
+
+    for directory in options.watch:
+        if not os.path.isdir(directory):
+            logger.error("provided directory %s does not exist", directory)
+            return False
+
+    service = WatchService(processor, options.watch, options.output_mode, settle_time=options.settle_time)
+    try:
+        service.run()
+    except KeyboardInterrupt:
+        logger.info("Stopped watching")
+    return True
+
+
+def check_input_files(infiles):
+    """
+    Check if all input files exist.
+
+    :param infiles: iterable of account statement files
+
+    :return: True if all files exist, False otherwise
+    """
+    for infile in infiles:
+        if not os.path.exists(infile):
+            logger.error("provided file %s does not exist", infile)
+            return False
+    return True
 
 
 def main():
     """
-    Processes the provided input file with the rules defined for the given platform.
-    Outputs a CSV file readable by Portfolio Performance
+    Processes the provided input files with the rules defined for the given platform.
+    Outputs CSV files readable by Portfolio Performance
 
     :return: True, False if an error occurred.
     """
@@ -132,44 +402,49 @@ def main():
 
     setup_logging(loglevel=options.loglevel)
 
-    infile = options.infile
+    if not check_input_files(pattern for pattern in options.infile if not glob.has_magic(pattern)):
+        return False
+
+    # the parser modules are only imported once the command line has been checked, to keep the startup fast
+    from src import batch_processor
+
+    infiles = batch_processor.expand_input_files(options.infile)
     p2p_operator_name = options.type
     aggregate = options.aggregate
 
     logger.info("Parsing peer to peer lending site account statements with the following options:")
-    logger.info("Account statement file: %s", infile)
+    logger.info("Account statement files: %s", ", ".join(infiles))
     logger.info("Peer to peer platform: %s", p2p_operator_name.upper())
     logger.info("Aggregation type: %s", aggregate.upper())
+    logger.info("Parser engine: %s", options.engine)
+    if options.incremental:
+        logger.info("Incremental conversion: only statements added since the last run are converted")
 
-    if not os.path.exists(infile):
-        logger.error("provided file %s does not exist", infile)
+    if not check_input_files(infiles):
         return False
 
-    platform_parser = platform_factory(infile, p2p_operator_name)
-    if not platform_parser:
-        return False
+    if options.watch:
+        config = get_platform_config(p2p_operator_name)
+        return bool(config) and watch(create_processor(config, p2p_operator_name, options), options)
 
-    statement_list = platform_parser.parse_account_statement(aggregate=aggregate)
+    platform_files = group_by_platform(infiles, p2p_operator_name)
+    if not platform_files:
+        return False
 
-    if not statement_list:
+    logger.info("Writing Portfolio Performance compatible CSV file.")
+    statement_count = convert_platform_files(platform_files, options)
+    if statement_count is None:
+        return False
+    if not statement_count and options.incremental:
+        logger.info("No statements were added since the last run")
+        return True
+    if not statement_count:
         logger.warning(
             "No statements were found in the input file. Re-run with --debug to check for any unexpected statements"
         )
         return False
 
-    logger.info("Account statement parsing finished. Found (and aggregated) %s transactions", len(statement_list))
-    logger.info("Writing Portfolio Performance compatible CSV file.")
-
-    writer = portfolio_writer.PortfolioPerformanceWriter()
-    writer.init_output()
-    for entry in statement_list:
-        writer.update_output(entry)
-    writer.write_pp_csv_file(
-        os.path.join(
-            os.path.dirname(infile),
-            f"portfolio_performance__{p2p_operator_name}.csv",
-        )
-    )
+    logger.info("Account statement parsing finished. Found (and aggregated) %s transactions", statement_count)
     return True
 
 
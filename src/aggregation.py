@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+Module for aggregating statement records into one entry per period, category and currency.
+
+The values are summed as Decimal, so the sums are exact no matter how many statements are aggregated. The state of an
+AggregationEngine can be merged with the state of another engine, e.g. the partial results of worker processes
+aggregating different parts of an account statement.
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import calendar
+import datetime
+import functools
+from decimal import Decimal
+
+from src import profiling
+from src.statement import StatementRecord
+
+
+def get_day(booking_date):
+    """
+    Get the period of a daily aggregation, which is the booking date itself.
+
+    :param booking_date: datetime.date of the statement
+
+    :return: datetime.date
+    """
+    return booking_date
+
+
+@functools.lru_cache(maxsize=4096)
+def get_month_end(booking_date):
+    """
+    Get the period of a monthly aggregation, which is the last day of the month.
+
+    :param booking_date: datetime.date of the statement
+
+    :return: datetime.date of the last day of the month
+    """
+    return booking_date.replace(day=calendar.monthrange(booking_date.year, booking_date.month)[1])
+
+
+@functools.lru_cache(maxsize=4096)
+def get_week_end(booking_date):
+    """
+    Get the period of a weekly aggregation, which is the Sunday ending the ISO week.
+
+    :param booking_date: datetime.date of the statement
+
+    :return: datetime.date of the last day of the week
+    """
+    return booking_date + datetime.timedelta(days=6 - booking_date.weekday())
+
+
+@functools.lru_cache(maxsize=4096)
+def get_quarter_end(booking_date):
+    """
+    Get the period of a quarterly aggregation, which is the last day of the quarter.
+
+    :param booking_date: datetime.date of the statement
+
+    :return: datetime.date of the last day of the quarter
+    """
+    return get_month_end(booking_date.replace(month=(booking_date.month - 1) // 3 * 3 + 3, day=1))
+
+
+def get_year_end(booking_date):
+    """
+    Get the period of a yearly aggregation, which is the last day of the year.
+
+    :param booking_date: datetime.date of the statement
+
+    :return: datetime.date of the 31st of December
+    """
+    return booking_date.replace(month=12, day=31)
+
+
+PERIOD_FUNCTIONS = {
+    "daily": get_day,
+    "weekly": get_week_end,
+    "monthly": get_month_end,
+    "quarterly": get_quarter_end,
+    "yearly": get_year_end,
+}
+AGGREGATION_NOTES = {
+    "daily": "Tageszusammenfassung",
+    "weekly": "Wochenzusammenfassung",
+    "monthly": "Monatszusammenfassung",
+    "quarterly": "Quartalszusammenfassung",
+    "yearly": "Jahreszusammenfassung",
+}
+
+
+def register_period(aggregate, period_function, note):
+    """
+    Register a custom aggregation period. The period function maps the booking date of a statement to the date of
+    its aggregated entry, usually the last day of the period. Later booking dates must not map to earlier periods,
+    otherwise incremental parsing holds back the wrong period. Register the period on import of a module, so it is
+    known to the worker processes of the chunked parser as well.
+
+    :param aggregate: name of the aggregation period
+    :param period_function: function taking a datetime.date and returning the datetime.date of the period
+    :param note: note of the aggregated entries
+    """
+    if aggregate == "transaction":
+        raise ValueError("transaction is not an aggregation period")
+    PERIOD_FUNCTIONS[aggregate] = period_function
+    AGGREGATION_NOTES[aggregate] = note
+
+
+def is_supported(aggregate):
+    """
+    Check if statements can be aggregated with the given period.
+
+    :param aggregate: name of the aggregation period
+
+    :return: True for transaction and all registered periods
+    """
+    return aggregate == "transaction" or aggregate in PERIOD_FUNCTIONS
+
+
+def to_decimal(value):
+    """
+    Convert a statement value to Decimal. Floats are converted via their shortest representation, so 0.1 becomes
+    Decimal('0.1') instead of the exact binary value of the float.
+
+    :param value: float, Decimal or string
+
+    :return: Decimal
+    """
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(repr(value) if isinstance(value, float) else value)
+
+
+class AggregationEngine(object):
+    """
+    Sums statement records per (period, category, currency). The aggregated entries are returned in the order the
+    periods were first seen, and within a period in the order the categories were first seen.
+    """
+
+    def __init__(self, aggregate):
+        """
+        Constructor for AggregationEngine
+
+        :param aggregate: aggregation period, one of PERIOD_FUNCTIONS
+        """
+        self.aggregate = aggregate
+        self.note = AGGREGATION_NOTES[aggregate]
+        self._get_period = PERIOD_FUNCTIONS[aggregate]
+        self._sums = {}
+        self._period_order = {}
+        self._period_count = 0
+
+    def __len__(self):
+        return len(self._sums)
+
+    def __add_sum(self, key, value):
+        total = self._sums.get(key)
+        if total is None:
+            self._sums[key] = value
+            if key[0] not in self._period_order:
+                self._period_order[key[0]] = self._period_count
+                self._period_count += 1
+        else:
+            self._sums[key] = total + value
+
+    def add(self, record):
+        """
+        Add a statement record to the sum of its period, category and currency.
+
+        :param record: StatementRecord
+        """
+        self.__add_sum((self._get_period(record.date), record.category, record.currency), to_decimal(record.value))
+
+    def update(self, records):
+        """
+        Add statement records to the sums.
+
+        :param records: iterable of StatementRecord objects
+        """
+        add = profiling.wrap("aggregate", self.add)
+        for record in records:
+            add(record)
+
+    def merge(self, other):
+        """
+        Add the sums of another engine of the same aggregation period, e.g. the partial result of a worker process.
+
+        :param other: AggregationEngine
+        """
+        if other.aggregate != self.aggregate:
+            raise ValueError(f"Unable to merge a {other.aggregate} aggregation into a {self.aggregate} aggregation")
+        for key, value in other._sums.items():
+            self.__add_sum(key, value)
+
+    def __sorted_keys(self):
+        return sorted(self._sums, key=lambda key: self._period_order[key[0]])
+
+    def iter_records(self):
+        """
+        Yield the aggregated entries; the values are converted to float.
+
+        :return: generator of StatementRecord objects
+        """
+        for key in self.__sorted_keys():
+            period, category, currency = key
+            yield StatementRecord(period, float(self._sums[key]), currency, category, self.note)
+
+    def pop_latest_period(self):
+        """
+        Remove the sums of the latest period.
+
+        :return: list of StatementRecord objects of the latest period with the exact sums as Decimal values
+        """
+        if not self._sums:
+            return []
+        latest_period = max(self._period_order)
+        del self._period_order[latest_period]
+        return [
+            StatementRecord(period, self._sums.pop((period, category, currency)), currency, category, self.note)
+            for period, category, currency in list(self._sums)
+            if period == latest_period
+        ]
@@ -0,0 +1,526 @@
+# -*- coding: utf-8 -*-
+"""
+Module for converting several account statement files of one platform in a single run.
+
+The modules only needed by some of the options, like parallel processing, incremental parsing, removing duplicates
+and sorting, are imported when they are used, so a simple conversion starts fast.
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import collections
+import contextlib
+import glob
+import importlib
+import itertools
+import logging
+import os
+
+from src.aggregation import AggregationEngine
+from src.aggregation import is_supported
+from src.compression import is_compressed
+from src.compression import strip_compression_suffix
+from src.p2p_config import get_config
+from src.portfolio_writer import PortfolioPerformanceWriter
+
+
+OUTPUT_FILE_PREFIX = "portfolio_performance__"
+PARSER_ENGINES = {
+    "python": "src.p2p_statement_parser.PeerToPeerPlatformParser",
+    "vectorized": "src.vectorized_parser.VectorizedPlatformParser",
+}
+logger = logging.getLogger(__name__)
+
+
+def get_parser_class(engine):
+    """
+    Get the parser class of an engine. The module of the engine is only imported when it is used, so the optional
+    dependencies of the vectorized engine are not loaded otherwise.
+
+    :param engine: name of the parser engine, see PARSER_ENGINES
+
+    :return: parser class
+    """
+    module_name, class_name = PARSER_ENGINES[engine].rsplit(".", 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def expand_input_files(patterns):
+    """
+    Expand the given file names and glob patterns into a list of input files. The order of the patterns is kept,
+    files matched by several patterns are only listed once. Portfolio Performance files written by a previous run are
+    not matched by glob patterns. Patterns without any match are kept as they are, so the caller can report them as
+    missing.
+
+    :param patterns: list of file names or glob patterns
+
+    :return: list of input files
+    """
+    input_files = []
+    for pattern in patterns:
+        matches = []
+        if glob.has_magic(pattern):
+            matches = [
+                input_file
+                for input_file in sorted(glob.glob(pattern))
+                if not os.path.basename(input_file).startswith(OUTPUT_FILE_PREFIX)
+            ]
+        for input_file in matches or [pattern]:
+            if input_file not in input_files:
+                input_files.append(input_file)
+    return input_files
+
+
+def get_output_file(infile, operator_name, per_input=False, compress=False):
+    """
+    Get the name of the Portfolio Performance output file, which is placed next to the input file.
+
+    :param infile: account statement file the output is generated from
+    :param operator_name: name of the P2P lending site
+    :param per_input: if set, the name of the input file is added so every input gets its own output file
+    :param compress: if set, the name gets the suffix .gz so the output is compressed with gzip
+
+    :return: path of the output file
+    """
+    if per_input:
+        input_name = os.path.splitext(os.path.basename(strip_compression_suffix(infile)))[0]
+        file_name = f"{OUTPUT_FILE_PREFIX}{operator_name}__{input_name}.csv"
+    else:
+        file_name = f"{OUTPUT_FILE_PREFIX}{operator_name}.csv"
+    if compress:
+        file_name += ".gz"
+    return os.path.join(os.path.dirname(infile), file_name)
+
+
+def get_currency_output_file(outfile, currency):
+    """
+    Get the name of the output file holding the entries of one currency, e.g. portfolio_performance__mintos.csv
+    becomes portfolio_performance__mintos__EUR.csv.
+
+    :param outfile: path of the output file for all currencies
+    :param currency: currency of the entries
+
+    :return: path of the output file for the currency
+    """
+    uncompressed_outfile = strip_compression_suffix(outfile)
+    root, extension = os.path.splitext(uncompressed_outfile)
+    return f"{root}__{currency}{extension}{outfile[len(uncompressed_outfile):]}"
+
+
+def create_statement_parser(config_file, infile, engine="python", incremental=False):
+    """
+    Create the parser of one account statement file with the already loaded configuration.
+
+    :param config_file: path to the YAML configuration file
+    :param infile: account statement file
+    :param engine: name of the parser engine, see PARSER_ENGINES. defaults to python.
+    :param incremental: if set, only the statements added since the last run are parsed; always uses the python
+    engine. Compressed files are always parsed completely.
+
+    :return: parser object
+    """
+    if incremental and is_compressed(infile):
+        logger.warning("Incremental conversion is not supported for compressed files, reading %s completely", infile)
+        incremental = False
+    if incremental:
+        from src.incremental_parser import IncrementalPlatformParser
+
+        platform_parser = IncrementalPlatformParser(config_file, infile)
+    else:
+        platform_parser = get_parser_class(engine)(config_file, infile)
+    platform_parser.config = get_config(config_file)
+    return platform_parser
+
+
+def iter_statement_file(config_file, infile, aggregate="transaction", engine="python", incremental=False):
+    """
+    Parse one account statement file with the already loaded configuration.
+
+    :param config_file: path to the YAML configuration file
+    :param infile: account statement file
+    :param aggregate: specifies the aggregation period. defaults to transaction.
+    :param engine: name of the parser engine, see PARSER_ENGINES. defaults to python.
+    :param incremental: if set, only the statements added since the last run are parsed, see create_statement_parser
+
+    :return: generator of account statement entries ready for use in Portfolio Performance
+    """
+    platform_parser = create_statement_parser(config_file, infile, engine, incremental)
+    return platform_parser.iter_account_statement(aggregate=aggregate)
+
+
+def get_aggregation(platform_parser, aggregate):
+    """
+    Parse an account statement file completely and return its aggregated sums instead of the entries.
+
+    :param platform_parser: parser object of the account statement file
+    :param aggregate: aggregation period other than transaction
+
+    :return: AggregationEngine holding the sums of the file; None if the aggregation period is not supported
+    """
+    collections.deque(platform_parser.iter_account_statement(aggregate=aggregate), maxlen=0)
+    return platform_parser.aggregation
+
+
+def parse_statement_file(config_file, infile, aggregate="transaction", engine="python", incremental=False):
+    """
+    Worker function returning all entries of one account statement file.
+
+    :param config_file: path to the YAML configuration file
+    :param infile: account statement file
+    :param aggregate: specifies the aggregation period. defaults to transaction.
+    :param engine: name of the parser engine, see PARSER_ENGINES. defaults to python.
+    :param incremental: if set, only the statements added since the last run are parsed
+
+    :return: list of account statement entries ready for use in Portfolio Performance
+    """
+    return list(iter_statement_file(config_file, infile, aggregate, engine, incremental))
+
+
+def aggregate_statement_file(config_file, infile, aggregate, engine="python", incremental=False):
+    """
+    Worker function returning the aggregated sums of one account statement file.
+
+    :param config_file: path to the YAML configuration file
+    :param infile: account statement file
+    :param aggregate: aggregation period other than transaction
+    :param engine: name of the parser engine, see PARSER_ENGINES. defaults to python.
+    :param incremental: if set, only the statements added since the last run are parsed
+
+    :return: AggregationEngine holding the sums of the file; None if the aggregation period is not supported
+    """
+    return get_aggregation(create_statement_parser(config_file, infile, engine, incremental), aggregate)
+
+
+def write_statements(statements, outfile):
+    """
+    Stream account statement entries into a Portfolio Performance file. No file is written if there are no entries.
+
+    :param statements: iterable of account statement entries
+    :param outfile: path of the output file
+
+    :return: number of entries written
+    """
+    statements = iter(statements)
+    first_statement = next(statements, None)
+    if not first_statement:
+        return 0
+
+    statement_count = 0
+    with PortfolioPerformanceWriter(outfile=outfile) as writer:
+        for entry in itertools.chain([first_statement], statements):
+            writer.update_output(entry)
+            statement_count += 1
+    return statement_count
+
+
+def write_statements_by_currency(statements, outfile):
+    """
+    Stream account statement entries into one Portfolio Performance file per currency in a single pass, see
+    get_currency_output_file for the file names. The file of a currency is opened when its first entry shows up, the
+    files of other currencies are left unchanged.
+
+    :param statements: iterable of StatementRecord objects
+    :param outfile: path of the output file for all currencies
+
+    :return: dict mapping each currency to the number of entries written
+    """
+    writers = {}
+    statement_counts = {}
+    with contextlib.ExitStack() as exit_stack:
+        for entry in statements:
+            writer = writers.get(entry.currency)
+            if writer is None:
+                writer = exit_stack.enter_context(
+                    PortfolioPerformanceWriter(outfile=get_currency_output_file(outfile, entry.currency))
+                )
+                writers[entry.currency] = writer
+                statement_counts[entry.currency] = 0
+            writer.update_output(entry)
+            statement_counts[entry.currency] += 1
+    return statement_counts
+
+
+def write_output(statements, outfile, split_currency=False, sort_buffer_size=None):
+    """
+    Stream account statement entries into a Portfolio Performance file, or into one file per currency, and log the
+    files written. Existing output files are left unchanged if there are no entries to write.
+
+    :param statements: iterable of account statement entries
+    :param outfile: path of the output file
+    :param split_currency: if set, the entries are written to one file per currency, see write_statements_by_currency
+    :param sort_buffer_size: if set, the entries are written in date order, holding at most this many entries in
+    memory, see iter_sorted
+
+    :return: number of entries written
+    """
+    if sort_buffer_size:
+        from src.external_sort import iter_sorted
+
+        statements = iter_sorted(statements, sort_buffer_size)
+    if split_currency:
+        statement_counts = write_statements_by_currency(statements, outfile)
+        for currency, statement_count in statement_counts.items():
+            logger.info(
+                "Wrote %s %s entries to %s", statement_count, currency, get_currency_output_file(outfile, currency)
+            )
+        if not statement_counts:
+            logger.info("No entries to write, the currency files of %s are left unchanged", outfile)
+        return sum(statement_counts.values())
+
+    statement_count = write_statements(statements, outfile)
+    if statement_count:
+        logger.info("Wrote %s entries to %s", statement_count, outfile)
+    else:
+        logger.info("No entries to write, %s is left unchanged", outfile)
+    return statement_count
+
+
+def convert_statement_file(
+    config_file,
+    infile,
+    outfile,
+    aggregate="transaction",
+    engine="python",
+    incremental=False,
+    split_currency=False,
+    sort_buffer_size=None,
+):
+    """
+    Worker function converting one account statement file into its own Portfolio Performance file.
+
+    :param config_file: path to the YAML configuration file
+    :param infile: account statement file
+    :param outfile: path of the output file
+    :param aggregate: specifies the aggregation period. defaults to transaction.
+    :param engine: name of the parser engine, see PARSER_ENGINES. defaults to python.
+    :param incremental: if set, only the statements added since the last run are converted
+    :param split_currency: if set, one output file per currency is written
+    :param sort_buffer_size: if set, the entries are written in date order, see write_output
+
+    :return: number of entries written
+    """
+    return write_output(
+        iter_statement_file(config_file, infile, aggregate, engine, incremental),
+        outfile,
+        split_currency,
+        sort_buffer_size,
+    )
+
+
+class BatchProcessor(object):
+    """
+    Converts several account statement files of the same platform, optionally in parallel worker processes.
+    Every worker process loads the platform configuration once and reuses it for all files it handles.
+    """
+
+    def __init__(
+        self,
+        config_file,
+        operator_name,
+        aggregate="transaction",
+        jobs=1,
+        engine="python",
+        incremental=False,
+        compress_output=False,
+        split_currency=False,
+        sort=False,
+        sort_buffer_size=None,
+    ):
+        """
+        Constructor for BatchProcessor
+
+        :param config_file: path to the YAML configuration file of the platform
+        :param operator_name: name of the P2P lending site, used for the output file names
+        :param aggregate: specifies the aggregation period. defaults to transaction.
+        :param jobs: number of worker processes; 1 processes all files in the current process
+        :param engine: name of the parser engine, see PARSER_ENGINES. defaults to python.
+        :param incremental: if set, only the statements added to the input files since the last run are converted
+        :param compress_output: if set, the output files are compressed with gzip and get the suffix .gz
+        :param split_currency: if set, the entries of every currency are written to their own output file, named after
+        the output file with the currency added, e.g. portfolio_performance__mintos__EUR.csv
+        :param sort: if set, the entries are written in date order; entries of the same date keep their order
+        :param sort_buffer_size: maximum number of entries sorted in memory, larger outputs are sorted using temporary
+        files. defaults to DEFAULT_SORT_BUFFER_SIZE of src.external_sort.
+        """
+        self.config_file = config_file
+        self.operator_name = operator_name
+        self.aggregate = aggregate
+        self.jobs = jobs
+        self.engine = engine
+        self.incremental = incremental
+        self.compress_output = compress_output
+        self.split_currency = split_currency
+        self.sort = sort
+        self.sort_buffer_size = sort_buffer_size
+
+    def __get_sort_buffer_size(self):
+        from src.external_sort import DEFAULT_SORT_BUFFER_SIZE
+
+        return self.sort_buffer_size or DEFAULT_SORT_BUFFER_SIZE
+
+    def __get_output_sort_buffer_size(self):
+        return self.__get_sort_buffer_size() if self.sort else None
+
+    def __create_executor(self):
+        from concurrent.futures import ProcessPoolExecutor
+
+        return ProcessPoolExecutor(max_workers=self.jobs, initializer=get_config, initargs=(self.config_file,))
+
+    def __use_workers(self, infiles):
+        return self.jobs > 1 and len(infiles) > 1
+
+    def __create_statement_parser(self, infile):
+        """
+        Create the parser of a single input file. With several jobs the file is parsed in parallel chunks by the python
+        engine, unless only the new part of the file is parsed or the file is compressed.
+        """
+        if self.jobs > 1 and self.engine == "python" and not self.incremental and not is_compressed(infile):
+            from src.chunked_parser import ChunkedPlatformParser
+
+            platform_parser = ChunkedPlatformParser(self.config_file, infile, jobs=self.jobs)
+            platform_parser.config = get_config(self.config_file)
+            return platform_parser
+        return create_statement_parser(self.config_file, infile, self.engine, self.incremental)
+
+    def __iter_aggregations(self, infiles):
+        """
+        Yield the aggregated sums of every input file in the order of the input files.
+        """
+        if self.__use_workers(infiles):
+            with self.__create_executor() as executor:
+                yield from executor.map(
+                    aggregate_statement_file,
+                    itertools.repeat(self.config_file),
+                    infiles,
+                    itertools.repeat(self.aggregate),
+                    itertools.repeat(self.engine),
+                    itertools.repeat(self.incremental),
+                )
+        else:
+            for infile in infiles:
+                yield get_aggregation(self.__create_statement_parser(infile), self.aggregate)
+
+    def __iter_statements(self, infiles):
+        """
+        Yield the entries of all input files in the order of the input files. Several input files are distributed to
+        the worker processes, a single input file is split into chunks for the worker processes. With an aggregation
+        period the sums of all input files are merged, so every period, category and currency is written once.
+        """
+        if len(infiles) > 1 and self.aggregate != "transaction" and is_supported(self.aggregate):
+            aggregation = AggregationEngine(self.aggregate)
+            for file_aggregation in self.__iter_aggregations(infiles):
+                if file_aggregation is not None:
+                    aggregation.merge(file_aggregation)
+            yield from aggregation.iter_records()
+        elif self.__use_workers(infiles):
+            with self.__create_executor() as executor:
+                results = executor.map(
+                    parse_statement_file,
+                    itertools.repeat(self.config_file),
+                    infiles,
+                    itertools.repeat(self.aggregate),
+                    itertools.repeat(self.engine),
+                    itertools.repeat(self.incremental),
+                )
+                for statements in results:
+                    yield from statements
+        else:
+            for infile in infiles:
+                platform_parser = self.__create_statement_parser(infile)
+                yield from platform_parser.iter_account_statement(aggregate=self.aggregate)
+
+    def convert(self, infiles, output_mode="merge"):
+        """
+        Convert the input files in the requested output mode.
+
+        :param infiles: list of account statement files
+        :param output_mode: merge, dedup or per-input, see convert_merged, convert_deduplicated and convert_each
+
+        :return: number of entries written
+        """
+        if output_mode == "per-input":
+            return sum(self.convert_each(infiles).values())
+        if output_mode == "dedup":
+            return self.convert_deduplicated(infiles)
+        return self.convert_merged(infiles)
+
+    def convert_merged(self, infiles, outfile=None):
+        """
+        Convert all input files into one Portfolio Performance file. The entries are written in the order of the
+        input files, or in date order if sorting is enabled. With an aggregation period the statements of all input
+        files are aggregated together.
+
+        :param infiles: list of account statement files
+        :param outfile: path of the output file, defaults to the platform output file next to the first input file
+
+        :return: number of entries written
+        """
+        if not outfile:
+            outfile = get_output_file(infiles[0], self.operator_name, compress=self.compress_output)
+        return write_output(
+            self.__iter_statements(infiles), outfile, self.split_currency, self.__get_output_sort_buffer_size()
+        )
+
+    def convert_deduplicated(self, infiles, outfile=None):
+        """
+        Convert all input files into one Portfolio Performance file, counting statements contained in several input
+        files only once. The entries are written in date order; sort_buffer_size bounds the number of entries sorted
+        in memory. The files are always read completely in the current process by the python engine.
+
+        :param infiles: list of account statement files
+        :param outfile: path of the output file, defaults to the platform output file next to the first input file
+
+        :return: number of entries written
+        :raises ValueError: if another engine or several jobs are selected
+        """
+        if self.engine != "python":
+            raise ValueError(
+                f"Removing duplicates requires the python engine, the {self.engine} engine is not supported"
+            )
+        if self.jobs > 1:
+            raise ValueError("Removing duplicates reads the input files one after the other, use a single job")
+        if self.incremental:
+            logger.warning("Incremental conversion is not supported when removing duplicates, reading complete files")
+        if not outfile:
+            outfile = get_output_file(infiles[0], self.operator_name, compress=self.compress_output)
+
+        from src.dedup import iter_deduplicated_statements
+
+        return write_output(
+            iter_deduplicated_statements(self.config_file, infiles, self.aggregate, self.__get_sort_buffer_size()),
+            outfile,
+            self.split_currency,
+        )
+
+    def convert_each(self, infiles):
+        """
+        Convert every input file into its own Portfolio Performance file.
+
+        :param infiles: list of account statement files
+
+        :return: dict mapping each input file to the number of entries written for it
+        """
+        outfiles = [
+            get_output_file(infile, self.operator_name, per_input=True, compress=self.compress_output)
+            for infile in infiles
+        ]
+        arguments = (
+            itertools.repeat(self.config_file),
+            infiles,
+            outfiles,
+            itertools.repeat(self.aggregate),
+            itertools.repeat(self.engine),
+            itertools.repeat(self.incremental),
+            itertools.repeat(self.split_currency),
+            itertools.repeat(self.__get_output_sort_buffer_size()),
+        )
+
+        if self.__use_workers(infiles):
+            with self.__create_executor() as executor:
+                statement_counts = list(executor.map(convert_statement_file, *arguments))
+        else:
+            statement_counts = list(map(convert_statement_file, *arguments))
+
+        for infile, statement_count in zip(infiles, statement_counts):
+            if not statement_count:
+                logger.warning("No statements were found in %s", infile)
+        return dict(zip(infiles, statement_counts))
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Module for small persistent caches stored as JSON files in the user's cache directory.
+
+The cache directory can be changed via the PP_P2P_PARSER_CACHE_DIR environment variable. Caches are only an
+optimization: if a cache file cannot be read or written, the cache is treated as empty.
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import json
+import logging
+import os
+
+
+CACHE_DIR_ENV = "PP_P2P_PARSER_CACHE_DIR"
+logger = logging.getLogger(__name__)
+
+
+def get_cache_dir():
+    """
+    Get the directory holding the cache files.
+
+    :return: path of the cache directory
+    """
+    if os.environ.get(CACHE_DIR_ENV):
+        return os.environ[CACHE_DIR_ENV]
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "pp-p2p-parser")
+
+
+class JsonCache(object):
+    """
+    Key value cache persisted as a JSON file. Values need to be JSON serializable.
+    """
+
+    def __init__(self, name):
+        """
+        Constructor for JsonCache
+
+        :param name: name of the cache, used as file name in the cache directory
+        """
+        self.name = name
+        self._cache_file = None
+        self._entries = None
+
+    @property
+    def cache_file(self):
+        """path of the cache file, resolved when first used"""
+        if not self._cache_file:
+            self._cache_file = os.path.join(get_cache_dir(), f"{self.name}.json")
+        return self._cache_file
+
+    def reset(self):
+        """
+        Forget the loaded entries and the resolved cache file, so both are read again on the next access, e.g. after
+        the cache directory changed.
+        """
+        self._cache_file = None
+        self._entries = None
+
+    def __load(self):
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with open(self.cache_file, "r", encoding="utf-8") as cache:
+                    self._entries = json.load(cache)
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as error:
+                logger.debug("Ignoring unreadable cache file %s: %s", self.cache_file, error)
+        return self._entries
+
+    def get(self, key, default=None):
+        """
+        Get a cached value.
+
+        :param key: key of the cache entry
+        :param default: value returned if there is no cache entry for the key
+
+        :return: cached value or default
+        """
+        return self.__load().get(key, default)
+
+    def set(self, key, value):
+        """
+        Store a value and write the cache file. The file is replaced atomically, so concurrent processes never read a
+        partially written cache. Values which are not JSON serializable are not cached.
+
+        :param key: key of the cache entry
+        :param value: JSON serializable value
+        """
+        try:
+            json.dumps(value)
+        except (TypeError, ValueError) as error:
+            logger.debug("Not caching %s, value is not JSON serializable: %s", key, error)
+            return
+
+        import tempfile
+
+        entries = self.__load()
+        entries[key] = value
+        tmp_file = None
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            file_descriptor, tmp_file = tempfile.mkstemp(dir=os.path.dirname(self.cache_file), suffix=".tmp")
+            with os.fdopen(file_descriptor, "w", encoding="utf-8") as cache:
+                json.dump(entries, cache)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as error:
+            logger.debug("Unable to write cache file %s: %s", self.cache_file, error)
+            if tmp_file and os.path.exists(tmp_file):
+                os.remove(tmp_file)
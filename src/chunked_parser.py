@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Module for parsing a single large account statement file in parallel worker processes.
+
+The file is split into byte ranges aligned to line boundaries after the header line. Every worker parses the header
+line together with its byte range, so each chunk is read exactly like the complete file would be read. Quoted fields
+spanning several lines are not supported in this mode. Compressed files are always parsed in the current process.
+With the number format auto the format is detected once from the start of the file, like for a file parsed at once,
+and passed to all workers.
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import csv
+import io
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from src.aggregation import AggregationEngine
+from src.compression import is_compressed
+from src.p2p_config import get_config
+from src.p2p_config import NUMBER_FORMAT_SAMPLE_SIZE
+from src.p2p_statement_parser import PeerToPeerPlatformParser
+
+
+MIN_CHUNK_SIZE = 4 * 1024 * 1024
+logger = logging.getLogger(__name__)
+
+
+def find_chunks(infile, chunk_count, min_chunk_size=MIN_CHUNK_SIZE):
+    """
+    Split an account statement file into byte ranges aligned to line boundaries.
+
+    :param infile: account statement file
+    :param chunk_count: maximum number of chunks
+    :param min_chunk_size: minimum size of a chunk in bytes
+
+    :return: tuple of the end offset of the header line and a list of (start, end) byte ranges
+    """
+    file_size = os.path.getsize(infile)
+    with open(infile, "rb") as statement_file:
+        statement_file.readline()
+        header_end = statement_file.tell()
+
+        data_size = file_size - header_end
+        chunk_count = max(1, min(chunk_count, data_size // max(1, min_chunk_size)))
+        boundaries = [header_end]
+        for index in range(1, chunk_count):
+            statement_file.seek(header_end + index * data_size // chunk_count - 1)
+            statement_file.readline()
+            boundary = min(statement_file.tell(), file_size)
+            if boundary > boundaries[-1]:
+                boundaries.append(boundary)
+        if file_size > boundaries[-1] or len(boundaries) == 1:
+            boundaries.append(file_size)
+
+    return header_end, list(zip(boundaries, boundaries[1:]))
+
+
+def parse_chunk(config_file, infile, header_end, start, end, aggregate="transaction", number_format="auto"):
+    """
+    Worker function parsing one chunk of an account statement file. With an aggregation period the statement
+    records are aggregated by the worker, only the partial sums are returned.
+
+    :param config_file: path to the YAML configuration file
+    :param infile: account statement file
+    :param header_end: end offset of the header line
+    :param start: start offset of the chunk
+    :param end: end offset of the chunk
+    :param aggregate: specifies the aggregation period. defaults to transaction.
+    :param number_format: number format of the file if the configuration detects it, see Config.with_number_format;
+    auto to detect it from the chunk
+
+    :return: list of StatementRecord objects or the AggregationEngine holding the partial sums of the chunk
+    """
+    with open(infile, "rb") as statement_file:
+        content = statement_file.read(header_end)
+        statement_file.seek(start)
+        content += statement_file.read(end - start)
+
+    platform_parser = PeerToPeerPlatformParser(config_file, infile)
+    platform_parser.config = get_config(config_file)
+    if number_format != "auto" and platform_parser.config.needs_number_format_detection():
+        platform_parser.config = platform_parser.config.with_number_format(number_format)
+    chunk_stream = io.StringIO(content.decode(platform_parser.config.get_csv_encoding()), newline="")
+    records = platform_parser.iter_formatted_entries(chunk_stream)
+    if aggregate == "transaction":
+        return list(records)
+    aggregation = AggregationEngine(aggregate)
+    aggregation.update(records)
+    return aggregation
+
+
+class ChunkedPlatformParser(PeerToPeerPlatformParser):
+    """
+    Parses a single account statement file in chunks using a pool of worker processes. Classification, formatting
+    and aggregation of the statements is done by the workers. The partial sums of the chunks are merged in file order,
+    so the output is identical to the one of PeerToPeerPlatformParser.
+    """
+
+    def __init__(self, config, infile, jobs=2, min_chunk_size=MIN_CHUNK_SIZE):
+        """
+        Constructor for ChunkedPlatformParser
+
+        :param config: path to the YAML configuration file of the platform or a Config object; with a Config object
+        the file is parsed in the current process, as the worker processes load the configuration by its path
+        :param infile: account statement file
+        :param jobs: number of worker processes
+        :param min_chunk_size: minimum size of a chunk in bytes; smaller files are parsed in the current process
+        """
+        super().__init__(config, infile)
+        self.jobs = jobs
+        self.min_chunk_size = min_chunk_size
+
+    def __detect_number_format(self):
+        """
+        Detect the number format from the first rows of the account statement file.
+
+        :return: detected number format, see Config.detect_number_format
+        """
+        with open(self.account_statement_file, "r", encoding=self.config.get_csv_encoding(), newline="") as infile:
+            header_line = infile.readline()
+            account_statement = csv.reader(
+                itertools.chain([header_line], infile), **self._get_dialect_parameters(header_line)
+            )
+            columns = self.config.get_column_layout(next(account_statement))
+            sample = list(itertools.islice(account_statement, NUMBER_FORMAT_SAMPLE_SIZE))
+        return self._use_detected_number_format(sample, columns)
+
+    def iter_account_statement(self, aggregate="transaction"):
+        """
+        read a platform account statement csv file in parallel chunks and yield the content filtered according to
+        the given configuration file. See parse_account_statement for the aggregation options.
+
+        :param aggregate: specifies the aggregation period. defaults to transaction.
+        :return: generator of account statement entries ready for use in Portfolio Performance
+        """
+        chunks = []
+        if self.config_file is not None and not is_compressed(self.account_statement_file):
+            header_end, chunks = find_chunks(self.account_statement_file, self.jobs, self.min_chunk_size)
+        if len(chunks) < 2:
+            yield from super().iter_account_statement(aggregate)
+            return
+
+        if not self._check_aggregation(aggregate):
+            return
+        if self.config is None:
+            self.config = get_config(self.config_file)
+        number_format = self.__detect_number_format() if self.config.needs_number_format_detection() else "auto"
+
+        logger.info("Loading account statement in %s chunks", len(chunks))
+        with ProcessPoolExecutor(
+            max_workers=self.jobs, initializer=get_config, initargs=(self.config_file,)
+        ) as executor:
+            chunk_results = executor.map(
+                parse_chunk,
+                itertools.repeat(self.config_file),
+                itertools.repeat(self.account_statement_file),
+                itertools.repeat(header_end),
+                *zip(*chunks),
+                itertools.repeat(aggregate),
+                itertools.repeat(number_format),
+            )
+            if aggregate == "transaction":
+                yield from itertools.chain.from_iterable(chunk_results)
+                return
+
+            self.aggregation = AggregationEngine(aggregate)
+            for chunk_aggregation in chunk_results:
+                self.aggregation.merge(chunk_aggregation)
+        yield from self.aggregation.iter_records()
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Module for reading compressed or archived account statement files and writing compressed output files.
+
+Statement files compressed with gzip (.gz), xz (.xz) or bzip2 (.bz2) and zip archives (.zip) are decompressed while
+they are read, nothing is extracted to disk. Every CSV file contained in a zip archive is read as a separate account
+statement. The compression is selected by the file name suffix; the module of a compression is only imported when a
+file using it is opened.
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import codecs
+import importlib
+import io
+import logging
+import os
+
+
+COMPRESSION_MODULES = {".gz": "gzip", ".xz": "lzma", ".bz2": "bz2"}
+ARCHIVE_SUFFIX = ".zip"
+CSV_SUFFIX = ".csv"
+logger = logging.getLogger(__name__)
+
+
+def get_compression_suffix(file_name):
+    """
+    Get the compression suffix of a file name.
+
+    :param file_name: name or path of the file
+
+    :return: suffix in lower case, e.g. '.gz' or '.zip'; the empty string for uncompressed files
+    """
+    suffix = os.path.splitext(file_name)[1].lower()
+    if suffix in COMPRESSION_MODULES or suffix == ARCHIVE_SUFFIX:
+        return suffix
+    return ""
+
+
+def is_compressed(file_name):
+    """
+    Check if a file is compressed or a zip archive.
+
+    :param file_name: name or path of the file
+
+    :return: True if the file is decompressed while reading
+    """
+    return bool(get_compression_suffix(file_name))
+
+
+def strip_compression_suffix(file_name):
+    """
+    Remove the compression suffix from a file name, e.g. statement.csv.gz becomes statement.csv.
+
+    :param file_name: name or path of the file
+
+    :return: file name without compression suffix
+    """
+    suffix = get_compression_suffix(file_name)
+    return file_name[: -len(suffix)] if suffix else file_name
+
+
+def iter_text_streams(infile, encoding, errors="strict"):
+    """
+    Open an account statement file for reading. Compressed files are decompressed while they are read; for a zip
+    archive every contained CSV file is opened one after the other, hidden files are skipped. Each stream is closed
+    before the next one is opened.
+
+    :param infile: path of the account statement file
+    :param encoding: text encoding of the account statements
+    :param errors: handling of decoding errors, see codecs.open
+
+    :return: generator of text streams
+    """
+    suffix = get_compression_suffix(infile)
+    if suffix == ARCHIVE_SUFFIX:
+        import zipfile
+
+        with zipfile.ZipFile(infile) as archive:
+            members = [
+                member
+                for member in archive.infolist()
+                if not member.is_dir()
+                and member.filename.lower().endswith(CSV_SUFFIX)
+                and not os.path.basename(member.filename).startswith(".")
+            ]
+            if not members:
+                logger.warning("%s does not contain any CSV file", infile)
+            for member in members:
+                logger.info("Reading %s from %s", member.filename, infile)
+                with io.TextIOWrapper(
+                    archive.open(member), encoding=encoding, errors=errors, newline=""
+                ) as text_stream:
+                    yield text_stream
+    elif suffix:
+        with io.TextIOWrapper(
+            importlib.import_module(COMPRESSION_MODULES[suffix]).open(infile, "rb"),
+            encoding=encoding,
+            errors=errors,
+            newline="",
+        ) as text_stream:
+            yield text_stream
+    else:
+        with codecs.open(infile, "r", encoding=encoding, errors=errors) as text_stream:
+            yield text_stream
+
+
+def open_output(outfile, buffering=-1):
+    """
+    Open a Portfolio Performance output file for writing; the output is compressed with gzip if the file name ends
+    with .gz.
+
+    :param outfile: path of the output file
+    :param buffering: buffer size of uncompressed output files
+
+    :return: text stream
+    """
+    if get_compression_suffix(outfile) == ".gz":
+        import gzip
+
+        return gzip.open(outfile, "wt", encoding="utf-8", newline="")
+    return open(outfile, "w", encoding="utf-8", newline="", buffering=buffering)
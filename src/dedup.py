@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+Module for merging overlapping account statement files of one platform without counting statements twice.
+
+Every row is identified by a 64 bit hash of its booking id. If the booking id of the platform does not identify a
+single statement (see unique_booking_id in the configuration) or is empty, the hash of the complete row is used.
+A row is dropped if the same key was seen in one of the previous input files; identical rows within one file are
+kept. The hashes are stored in a compact open addressing table, which needs about 16 bytes per statement.
+
+The statements of every file are sorted by date with bounded memory, see src.external_sort, and the sorted files are
+merged with a k-way heap merge before the aggregation is applied; statements of the same date keep the order of the
+input files.
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import hashlib
+import heapq
+import itertools
+import logging
+from array import array
+
+from src.external_sort import DEFAULT_SORT_BUFFER_SIZE
+from src.external_sort import get_date
+from src.external_sort import iter_sorted
+from src.p2p_config import get_config
+from src.p2p_statement_parser import PeerToPeerPlatformParser
+
+
+ROW_KEY_SEPARATOR = "\x1f"
+logger = logging.getLogger(__name__)
+
+
+def get_booking_key(statement, booking_id_column=None):
+    """
+    Calculate the key identifying a row of an account statement.
+
+    :param statement: row of the account statement as list
+    :param booking_id_column: index of the booking id column; None to use the complete row
+
+    :return: non-zero 64 bit integer
+    """
+    data = statement[booking_id_column] if booking_id_column is not None else None
+    if not data:
+        data = ROW_KEY_SEPARATOR.join(field or "" for field in statement)
+    return int.from_bytes(hashlib.blake2b(data.encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+
+class CompactHashSet(object):
+    """
+    Set of non-zero 64 bit integers stored in a flat array using open addressing with linear probing.
+    """
+
+    def __init__(self, capacity=1024):
+        """
+        Constructor for CompactHashSet
+
+        :param capacity: number of keys which can be stored before the table is resized
+        """
+        size = 8
+        while size * 2 < capacity * 3:
+            size *= 2
+        self._slots = array("Q", bytes(8 * size))
+        self._mask = size - 1
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, key):
+        slots = self._slots
+        mask = self._mask
+        index = key & mask
+        while True:
+            slot = slots[index]
+            if slot == key:
+                return True
+            if not slot:
+                return False
+            index = (index + 1) & mask
+
+    def __resize(self):
+        old_slots = self._slots
+        self._slots = array("Q", bytes(16 * len(old_slots)))
+        self._mask = len(self._slots) - 1
+        self._count = 0
+        for key in old_slots:
+            if key:
+                self.add(key)
+
+    def add(self, key):
+        """
+        Add a key to the set.
+
+        :param key: non-zero 64 bit integer
+        """
+        if (self._count + 1) * 3 > len(self._slots) * 2:
+            self.__resize()
+        slots = self._slots
+        mask = self._mask
+        index = key & mask
+        while slots[index]:
+            if slots[index] == key:
+                return
+            index = (index + 1) & mask
+        slots[index] = key
+        self._count += 1
+
+    def update(self, keys):
+        """
+        Add several keys to the set.
+
+        :param keys: iterable of non-zero 64 bit integers
+        """
+        for key in keys:
+            self.add(key)
+
+
+class DeduplicatingPlatformParser(PeerToPeerPlatformParser):
+    """
+    Parses an account statement file, skipping all rows already contained in previously parsed files. The keys of
+    the rows read are collected in booking_keys, so they can be added to the seen bookings once the file is done.
+    """
+
+    def __init__(self, config, infile, seen_bookings):
+        """
+        Constructor for DeduplicatingPlatformParser
+
+        :param config: path to the YAML configuration file of the platform
+        :param infile: account statement file
+        :param seen_bookings: CompactHashSet with the keys of the rows of the previously parsed files
+        """
+        super().__init__(config, infile)
+        self.seen_bookings = seen_bookings
+        self.booking_keys = array("Q")
+        self.duplicate_count = 0
+
+    def _filter_rows(self, account_statement, columns):
+        """
+        Skip rows already seen in previously parsed files.
+
+        :param account_statement: iterator of rows as lists
+        :param columns: ColumnLayout with the indexes of the configured columns
+
+        :return: generator of rows as lists
+        """
+        booking_id_column = columns.booking_id if self.config.has_unique_booking_id() else None
+        seen_bookings = self.seen_bookings
+        booking_keys = self.booking_keys
+        for statement in account_statement:
+            if not statement:
+                continue
+            booking_key = get_booking_key(statement, booking_id_column)
+            if booking_key in seen_bookings:
+                self.duplicate_count += 1
+                continue
+            booking_keys.append(booking_key)
+            yield statement
+
+
+def iter_unique_statements(config_file, infile, seen_bookings):
+    """
+    Parse an account statement file, dropping statements already read from one of the previous files. The keys of the
+    rows of the file are added to the seen bookings once the file is read completely.
+
+    :param config_file: path to the YAML configuration file
+    :param infile: account statement file
+    :param seen_bookings: CompactHashSet with the keys of the rows of the previously parsed files
+
+    :return: generator of StatementRecord objects
+    """
+    platform_parser = DeduplicatingPlatformParser(config_file, infile, seen_bookings)
+    platform_parser.config = get_config(config_file)
+    yield from platform_parser.iter_account_statement()
+    seen_bookings.update(platform_parser.booking_keys)
+    if platform_parser.duplicate_count:
+        logger.info("Skipped %s statements of %s already read", platform_parser.duplicate_count, infile)
+
+
+def sort_unique_statements(config_file, infiles, sort_buffer_size=DEFAULT_SORT_BUFFER_SIZE):
+    """
+    Sort the statements of every account statement file by date, dropping statements already read from one of the
+    previous files. The files are read completely one after the other, so the statements of a file are compared with
+    all previous files; the sort buffer is shared by the files.
+
+    :param config_file: path to the YAML configuration file
+    :param infiles: list of account statement files
+    :param sort_buffer_size: maximum number of statements sorted in memory, see iter_sorted
+
+    :return: list of iterators of StatementRecord objects sorted by date, in the order of the input files
+    """
+    seen_bookings = CompactHashSet()
+    file_buffer_size = max(1, sort_buffer_size // max(1, len(infiles)))
+    sorted_files = []
+    for infile in infiles:
+        sorted_statements = iter_sorted(iter_unique_statements(config_file, infile, seen_bookings), file_buffer_size)
+        # iter_sorted reads all statements before yielding the first one
+        first_statement = next(sorted_statements, None)
+        if first_statement is not None:
+            sorted_files.append(itertools.chain([first_statement], sorted_statements))
+    return sorted_files
+
+
+def iter_deduplicated_statements(
+    config_file, infiles, aggregate="transaction", sort_buffer_size=DEFAULT_SORT_BUFFER_SIZE
+):
+    """
+    Merge several account statement files of one platform in date order, dropping statements contained in more
+    than one file, and apply the aggregation on the merged statements.
+
+    :param config_file: path to the YAML configuration file
+    :param infiles: list of account statement files
+    :param aggregate: specifies the aggregation period. defaults to transaction.
+    :param sort_buffer_size: maximum number of statements sorted in memory, see iter_sorted
+
+    :return: generator of StatementRecord objects ready for use in Portfolio Performance
+    """
+    aggregation_parser = PeerToPeerPlatformParser(config_file, None)
+    if not aggregation_parser._check_aggregation(aggregate):
+        return
+    aggregation_parser.config = get_config(config_file)
+
+    sorted_files = sort_unique_statements(config_file, infiles, sort_buffer_size)
+    yield from aggregation_parser.aggregate_entries(heapq.merge(*sorted_files, key=get_date), aggregate)
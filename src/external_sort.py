@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Module for sorting statement records by date with bounded memory.
+
+Up to buffer_size records are sorted in memory. Larger inputs are split into sorted runs of buffer_size records which
+are spilled to temporary files in batches and merged afterwards. At most MAX_MERGE_RUNS runs are merged at once and
+the batches are sized so that one batch of every merged run fits into buffer_size records, which bounds the memory of
+the merge as well. The sort is stable: records with the same date keep their input order, e.g. the order of the
+categories of an aggregated period.
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import heapq
+import itertools
+import logging
+import pickle
+import tempfile
+from operator import attrgetter
+
+from src import profiling
+from src.statement import StatementRecord
+
+
+DEFAULT_SORT_BUFFER_SIZE = 1000000
+SPILL_BATCH_SIZE = 4096
+MAX_MERGE_RUNS = 64
+logger = logging.getLogger(__name__)
+
+get_date = attrgetter("date")
+
+
+def get_batch_size(buffer_size):
+    """
+    Get the number of records per batch of a temporary file, so one batch of every merged run fits into the buffer.
+
+    :param buffer_size: maximum number of records held in memory
+
+    :return: number of records, at most SPILL_BATCH_SIZE
+    """
+    return max(1, min(SPILL_BATCH_SIZE, buffer_size // MAX_MERGE_RUNS))
+
+
+def write_run(records, batch_size, temp_dir=None):
+    """
+    Write sorted records to a temporary file in batches.
+
+    :param records: iterable of StatementRecord objects in sort order
+    :param batch_size: number of records per batch
+    :param temp_dir: directory of the temporary file; defaults to the directory of the tempfile module
+
+    :return: temporary file object positioned at its start; the file is deleted when it is closed
+    """
+    run_file = tempfile.TemporaryFile(dir=temp_dir)
+    records = iter(records)
+    while True:
+        batch = [
+            (record.date, record.value, record.currency, record.category, record.note)
+            for record in itertools.islice(records, batch_size)
+        ]
+        if not batch:
+            break
+        pickle.dump(batch, run_file, protocol=pickle.HIGHEST_PROTOCOL)
+    run_file.seek(0)
+    return run_file
+
+
+def read_run(run_file):
+    """
+    Read the records of a temporary file written by write_run; the file is closed once all records are read.
+
+    :param run_file: temporary file object
+
+    :return: generator of StatementRecord objects
+    """
+    with run_file:
+        while True:
+            try:
+                batch = pickle.load(run_file)
+            except EOFError:
+                return
+            for fields in batch:
+                yield StatementRecord(*fields)
+
+
+def merge_runs(run_files, batch_size, temp_dir=None):
+    """
+    Merge sorted runs into one sorted stream. Runs of equal dates are merged in the order of the runs, which keeps the
+    sort stable. If there are more than MAX_MERGE_RUNS runs they are merged in several passes, so the number of open
+    files is bounded.
+
+    :param run_files: list of temporary file objects written by write_run, in input order
+    :param batch_size: number of records per batch of the temporary files of intermediate passes
+    :param temp_dir: directory of the temporary files of intermediate passes
+
+    :return: generator of StatementRecord objects sorted by date
+    """
+    while len(run_files) > MAX_MERGE_RUNS:
+        logger.debug("Merging %s sorted runs in groups of %s", len(run_files), MAX_MERGE_RUNS)
+        run_files = [
+            write_run(
+                heapq.merge(*map(read_run, run_files[start : start + MAX_MERGE_RUNS]), key=get_date),
+                batch_size,
+                temp_dir,
+            )
+            for start in range(0, len(run_files), MAX_MERGE_RUNS)
+        ]
+    return heapq.merge(*map(read_run, run_files), key=get_date)
+
+
+def iter_sorted(records, buffer_size=DEFAULT_SORT_BUFFER_SIZE, temp_dir=None):
+    """
+    Sort statement records by date. Inputs of up to buffer_size records are sorted in memory, larger inputs are
+    sorted with an external merge sort using temporary files.
+
+    :param records: iterable of StatementRecord objects
+    :param buffer_size: maximum number of records held in memory
+    :param temp_dir: directory of the temporary files; defaults to the directory of the tempfile module
+
+    :return: generator of StatementRecord objects sorted by date
+    """
+    if buffer_size < 1:
+        raise ValueError(f"The sort buffer must hold at least one entry, got {buffer_size}")
+    records = iter(records)
+    batch_size = get_batch_size(buffer_size)
+    run_files = []
+    try:
+        while True:
+            buffer = list(itertools.islice(records, buffer_size))
+            with profiling.measure("sort", len(buffer)):
+                buffer.sort(key=get_date)
+            if len(buffer) < buffer_size and not run_files:
+                yield from buffer
+                return
+            if not buffer:
+                break
+            with profiling.measure("spill", len(buffer)):
+                run_files.append(write_run(buffer, batch_size, temp_dir))
+            del buffer
+
+        logger.info("Merging %s sorted runs of up to %s entries", len(run_files), buffer_size)
+        yield from merge_runs(run_files, batch_size, temp_dir)
+    finally:
+        for run_file in run_files:
+            run_file.close()
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+Module for converting only the new part of a growing account statement file.
+
+Platforms export cumulative account statements, so every new export repeats the complete history. After each run a
+checkpoint is stored for the input file: the byte offset up to which the file has been processed, the SHA-256 hash of
+this processed prefix and the booking ids of the first and the last row read. The next run resumes at the stored offset
+if the prefix of the file is unchanged. Otherwise, e.g. if the platform exports the newest statements first, the rows
+from the first to the last booking id of the checkpoint are skipped and all other rows are converted. This requires
+unique booking ids; if the rows cannot be found, the conversion fails instead of writing the complete file again.
+
+With an aggregation period like daily or monthly the totals of the latest, still open period are not written. They are
+kept in the checkpoint and completed by the following runs, so every period is written exactly once with its complete
+total.
+
+Checkpoints are stored in the cache directory, see src.cache.
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import csv
+import datetime
+import hashlib
+import io
+import itertools
+import logging
+import os
+
+from src.aggregation import AggregationEngine
+from src.aggregation import to_decimal
+from src.cache import JsonCache
+from src.p2p_config import get_config
+from src.p2p_statement_parser import PeerToPeerPlatformParser
+from src.statement import StatementRecord
+
+
+HASH_BLOCK_SIZE = 1024 * 1024
+logger = logging.getLogger(__name__)
+
+
+def get_checkpoint_cache(config_file, infile, aggregate):
+    """
+    Get the cache holding the checkpoint of an account statement file. Every input file, platform and aggregation
+    gets its own cache file, so files converted in parallel worker processes do not overwrite each other's checkpoints.
+
+    :param config_file: path to the YAML configuration file or name of the platform
+    :param infile: account statement file
+    :param aggregate: aggregation period
+    :return: JsonCache for the checkpoint
+    """
+    platform = os.path.splitext(os.path.basename(config_file))[0]
+    key = "{}:{}:{}".format(platform, aggregate, os.path.abspath(infile))
+    return JsonCache(os.path.join("checkpoints", hashlib.sha1(key.encode("utf-8")).hexdigest()))
+
+
+def update_hash(file_hash, binary_file, start, end):
+    """
+    Add a byte range of a file to a hash.
+
+    :param file_hash: hashlib object to update
+    :param binary_file: file opened in binary mode
+    :param start: start offset of the byte range
+    :param end: end offset of the byte range
+    """
+    binary_file.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        block = binary_file.read(min(HASH_BLOCK_SIZE, remaining))
+        if not block:
+            break
+        file_hash.update(block)
+        remaining -= len(block)
+
+
+def dump_records(records):
+    """
+    Convert statement records into a JSON serializable list. The values are stored as strings, so exact Decimal sums
+    are kept.
+
+    :param records: iterable of StatementRecord objects
+    :return: list of lists
+    """
+    return [
+        [record.date.isoformat(), str(record.value), record.currency, record.category, record.note]
+        for record in records
+    ]
+
+
+def load_records(dumped_records):
+    """
+    Convert the output of dump_records back into statement records with Decimal values. Values stored as numbers by
+    previous versions are read as well.
+
+    :param dumped_records: list of lists
+    :return: list of StatementRecord objects
+    """
+    return [
+        StatementRecord(datetime.date.fromisoformat(date), to_decimal(value), currency, category, note)
+        for date, value, currency, category, note in dumped_records
+    ]
+
+
+def skip_processed_rows(statements, booking_id_column, first_booking_id, last_booking_id):
+    """
+    Skip the block of rows converted by a previous run, from the row with the first booking id up to the row with the
+    last booking id.
+
+    :param statements: iterator of rows as lists
+    :param booking_id_column: index of the booking id column
+    :param first_booking_id: booking id of the first row converted by the previous run
+    :param last_booking_id: booking id of the last row converted by the previous run
+
+    :return: generator of rows as lists
+    """
+    statements = iter(statements)
+    for statement in statements:
+        if statement and statement[booking_id_column] == first_booking_id:
+            break
+        yield statement
+    if last_booking_id != first_booking_id:
+        for statement in statements:
+            if statement and statement[booking_id_column] == last_booking_id:
+                break
+    yield from statements
+
+
+class IncrementalPlatformParser(PeerToPeerPlatformParser):
+    """
+    Converts only the statements added to an account statement file since the last run. The output of all runs
+    together is identical to the output of converting the complete file once, except that late statements for an
+    already written period are written as an additional aggregated entry for this period.
+    """
+
+    def __init__(self, config, infile):
+        """
+        Constructor for IncrementalPlatformParser
+        """
+        super().__init__(config, infile)
+        self.checkpoint = None
+        self.first_booking_id = None
+        self.final_booking_id = None
+        self.processed_booking_ids = None
+
+    def __load_checkpoint(self, checkpoint_cache, binary_file):
+        """
+        Load the checkpoint of the account statement file. If the processed prefix of the file changed, the file is
+        read from its start and the rows converted by the last run are skipped, see skip_processed_rows.
+
+        :return: tuple of the checkpoint dict and the hash of the processed prefix; the checkpoint is None if there is
+        no checkpoint yet
+        :raises ValueError: if the file changed and the rows converted by the last run cannot be found
+        """
+        checkpoint = checkpoint_cache.get("checkpoint")
+        if not checkpoint:
+            logger.info("No checkpoint found for %s, converting the complete file", self.account_statement_file)
+            return None, hashlib.sha256()
+
+        if checkpoint["offset"] <= os.fstat(binary_file.fileno()).st_size:
+            prefix_hash = hashlib.sha256()
+            update_hash(prefix_hash, binary_file, 0, checkpoint["offset"])
+            if prefix_hash.hexdigest() == checkpoint["prefix_hash"]:
+                logger.info(
+                    "Resuming %s after booking %s at byte %s",
+                    self.account_statement_file,
+                    checkpoint["last_booking_id"],
+                    checkpoint["offset"],
+                )
+                return checkpoint, prefix_hash
+
+        processed_booking_ids = [checkpoint.get("first_booking_id"), checkpoint.get("last_booking_id")]
+        if not self.__contains_rows(binary_file, *processed_booking_ids):
+            raise ValueError(
+                f"{self.account_statement_file} changed since the last run and the statements converted before cannot "
+                f"be found by their booking ids. Remove the checkpoint {checkpoint_cache.cache_file} to convert the "
+                f"complete file again."
+            )
+        logger.warning(
+            "%s changed since the last run, skipping the statements from booking %s to booking %s converted before",
+            self.account_statement_file,
+            *processed_booking_ids,
+        )
+        self.processed_booking_ids = processed_booking_ids
+        return dict(checkpoint, offset=0), hashlib.sha256()
+
+    def __contains_rows(self, binary_file, first_booking_id, last_booking_id):
+        """
+        Check if the account statement file contains the rows of the first and the last booking id in this order.
+        Booking ids which are not unique cannot be found.
+        """
+        if not self.config.has_unique_booking_id() or first_booking_id is None or last_booking_id is None:
+            return False
+
+        binary_file.seek(0)
+        infile = io.TextIOWrapper(binary_file, encoding=self.config.get_csv_encoding(), newline="")
+        try:
+            header_line = infile.readline()
+            account_statement = csv.reader(
+                itertools.chain([header_line], infile), **self._get_dialect_parameters(header_line)
+            )
+            columns = self.config.get_column_layout(next(account_statement))
+            booking_ids = (statement[columns.booking_id] for statement in account_statement if statement)
+            # the second search continues behind the row found by the first one
+            return first_booking_id in booking_ids and (
+                last_booking_id == first_booking_id or last_booking_id in booking_ids
+            )
+        finally:
+            infile.detach()
+
+    def _filter_rows(self, account_statement, columns):
+        """
+        Keep the booking id of the first row and skip the rows converted by the last run if the file changed.
+        """
+        account_statement = iter(super()._filter_rows(account_statement, columns))
+        if self.first_booking_id is None:
+            first_statement = next(account_statement, None)
+            if first_statement is None:
+                return iter([])
+            self.first_booking_id = first_statement[columns.booking_id] if first_statement else None
+            account_statement = itertools.chain([first_statement], account_statement)
+        if self.processed_booking_ids:
+            account_statement = skip_processed_rows(
+                self.__track_final_row(account_statement, columns), columns.booking_id, *self.processed_booking_ids
+            )
+        return account_statement
+
+    def __track_final_row(self, account_statement, columns):
+        """
+        Keep the booking id of the last row of the file, which is skipped if it was converted before.
+        """
+        for statement in account_statement:
+            if statement:
+                self.final_booking_id = statement[columns.booking_id]
+            yield statement
+
+    def iter_account_statement(self, aggregate="transaction"):
+        """
+        read the part of a platform account statement csv file added since the last run and yield the content
+        filtered according to the given configuration file. The checkpoint is updated once all entries have been
+        consumed. See parse_account_statement for the aggregation options.
+
+        :param aggregate: specifies the aggregation period. defaults to transaction.
+        :return: generator of StatementRecord objects ready for use in Portfolio Performance
+        """
+        if not self._check_aggregation(aggregate):
+            return
+        if self.config is None:
+            self.config = get_config(self.config_file)
+
+        checkpoint_cache = get_checkpoint_cache(
+            self.config_file or self.config.get_name(), self.account_statement_file, aggregate
+        )
+        with open(self.account_statement_file, "rb") as binary_file:
+            checkpoint, file_hash = self.__load_checkpoint(checkpoint_cache, binary_file)
+
+            binary_file.seek(0)
+            header_line = binary_file.readline().decode(self.config.get_csv_encoding())
+            start = checkpoint["offset"] if checkpoint else 0
+            if start:
+                self.first_booking_id = checkpoint.get("first_booking_id")
+            binary_file.seek(max(start, binary_file.tell()))
+            infile = io.TextIOWrapper(binary_file, encoding=self.config.get_csv_encoding(), newline="")
+
+            records = self.iter_formatted_entries(infile, header_line=header_line)
+            if aggregate == "transaction":
+                yield from records
+                open_records = []
+            else:
+                self.aggregation = AggregationEngine(aggregate)
+                self.aggregation.update(load_records(checkpoint["open_records"]) if checkpoint else [])
+                self.aggregation.update(records)
+                open_records = self.aggregation.pop_latest_period()
+                yield from self.aggregation.iter_records()
+
+            offset = binary_file.tell()
+            infile.detach()
+            update_hash(file_hash, binary_file, start, offset)
+
+        last_booking_id = self.final_booking_id or self.last_booking_id or (checkpoint or {}).get("last_booking_id")
+        self.checkpoint = {
+            "offset": offset,
+            "prefix_hash": file_hash.hexdigest(),
+            "first_booking_id": self.first_booking_id,
+            "last_booking_id": last_booking_id,
+            "open_records": dump_records(open_records),
+        }
+        checkpoint_cache.set("checkpoint", self.checkpoint)
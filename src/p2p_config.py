@@ -4,22 +4,224 @@ Module for holding the configuration of a platform.
 
 Copyright 2018-04-29 ChrisRBe
 """
+import copy
+import functools
+import glob
 import logging
+import os
 import re
+from datetime import date
+from datetime import datetime
+
+from src.cache import JsonCache
 
 
 logger = logging.getLogger(__name__)
 
+CATEGORY_CACHE_SIZE = 4096
+DATE_CACHE_SIZE = 4096
+FIXED_WIDTH_DATE_DIRECTIVES = {"Y": 4, "m": 2, "d": 2, "H": 2, "M": 2, "S": 2}
+TIME_DIRECTIVE_LIMITS = {"H": 23, "M": 59, "S": 59}
+NUMBER_FORMAT_SAMPLE_SIZE = 100
+NUMBER_SEPARATORS = [".", ","]
+
+CONFIG_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "config")
+
+config_cache = JsonCache("configs")
+
+
+def parse_value(value):
+    """
+    Parse statement value from string to float.
+    Includes handling of commas and dots for decimal separators and
+    digit grouping, such as 1.000,00 and 1,000.00.
+
+    :param value: the statement value as string
+
+    :return: parsed value of the statement as float.
+    """
+    if not value:
+        return None
+
+    value = value.strip("€")
+
+    dot_pos = value.find(".")
+    comma_pos = value.find(",")
+
+    if dot_pos == -1 or comma_pos == -1:
+        # Did not find both comma and dot, just replace comma with dot
+        value = value.replace(",", ".")
+        return float(value)
+
+    # Check position of . and , to replace them in the right order
+    if dot_pos < comma_pos:
+        # dot is used for digit grouping, comma for decimal
+        value = value.replace(".", "")
+        value = value.replace(",", ".")
+        return float(value)
+    else:
+        # comma is used for digit grouping, dot for decimal
+        value = value.replace(",", "")
+        return float(value)
+
+
+def read_config_file(config_file):
+    """
+    Read the settings of a YAML configuration file. The parsed settings are cached as JSON in the cache directory
+    together with the modification time and size of the file, so the YAML file is only parsed again after it changed.
+    PyYAML is only imported if the file needs to be parsed.
+
+    :param config_file: path to the YAML configuration file
+
+    :return: dict of settings
+    """
+    file_stat = os.stat(config_file)
+    file_version = [file_stat.st_mtime_ns, file_stat.st_size]
+    cache_key = os.path.abspath(config_file)
+    cached_config = config_cache.get(cache_key)
+    if cached_config and cached_config["version"] == file_version:
+        return cached_config["settings"]
+
+    from yaml import safe_load
+
+    with open(config_file, "r", encoding="utf-8") as ymlconfig:
+        settings = safe_load(ymlconfig)
+    config_cache.set(cache_key, {"version": file_version, "settings": settings})
+    return settings
+
+
+def load_config(config_file):
+    """
+    Parse the YAML configuration file containing specific settings for the individual p2p loan platform
+
+    :param config_file: path to the YAML configuration file
+
+    :return: Config object for the platform
+    """
+    return Config(read_config_file(config_file), os.path.splitext(os.path.basename(config_file))[0])
+
+
+class ConfigRegistry(object):
+    """
+    Process wide cache of the platform configurations. Every configuration file is loaded and compiled only once;
+    it is loaded again if its modification time or size changed. The cached Config objects are immutable, so they can
+    be shared by all parsers of the process.
+    """
+
+    def __init__(self, config_dir=CONFIG_DIR):
+        """
+        Constructor for ConfigRegistry
+
+        :param config_dir: directory containing the YAML configuration files of the platforms
+        """
+        self.config_dir = config_dir
+        self._configs = {}
+
+    def get_config_file(self, platform):
+        """
+        Get the path of the configuration file of a platform.
+
+        :param platform: name of the platform, e.g. mintos, or path to a YAML configuration file
+
+        :return: path to the YAML configuration file
+        """
+        if os.path.splitext(platform)[1] in (".yml", ".yaml") or os.path.dirname(platform):
+            return platform
+        return os.path.join(self.config_dir, f"{platform}.yml")
+
+    def get_platforms(self):
+        """
+        Get the names of all platforms with a configuration file in the configuration directory.
+
+        :return: sorted list of platform names
+        """
+        return sorted(
+            os.path.splitext(os.path.basename(config_file))[0]
+            for config_file in glob.glob(os.path.join(self.config_dir, "*.yml"))
+        )
+
+    def get(self, platform):
+        """
+        Get the configuration of a platform, loading it only if it is not cached or the file changed.
+
+        :param platform: name of the platform, e.g. mintos, or path to a YAML configuration file
+
+        :return: Config object for the platform
+        :raises OSError: if the configuration file does not exist
+        """
+        config_file = os.path.abspath(self.get_config_file(platform))
+        file_stat = os.stat(config_file)
+        file_version = (file_stat.st_mtime_ns, file_stat.st_size)
+        cached_config = self._configs.get(config_file)
+        if cached_config is None or cached_config[0] != file_version:
+            logger.debug("Loading configuration file %s", config_file)
+            cached_config = (file_version, load_config(config_file))
+            self._configs[config_file] = cached_config
+        return cached_config[1]
+
+    def load_all(self):
+        """
+        Load the configurations of all platforms in the configuration directory.
+
+        :return: dict mapping platform names to Config objects
+        """
+        return {platform: self.get(platform) for platform in self.get_platforms()}
+
+    def clear(self):
+        """
+        Remove all cached configurations.
+        """
+        self._configs.clear()
+
+
+registry = ConfigRegistry()
+
+
+def get_config(config_file):
+    """
+    Get the platform configuration from the process wide ConfigRegistry.
+
+    :param config_file: path to the YAML configuration file or name of the platform
+
+    :return: Config object for the platform
+    """
+    return registry.get(config_file)
+
+
+class ColumnLayout(object):
+    """
+    Keys used to access the configured columns of a statement row. These are the column names for rows read as dict
+    or the column indexes for rows read as list.
+    """
+
+    __slots__ = ["booking_date", "booking_details", "booking_id", "booking_type", "booking_value", "booking_currency"]
+
+    def __init__(self, booking_date, booking_details, booking_id, booking_type, booking_value, booking_currency):
+        """
+        Constructor for ColumnLayout; booking_currency is None if the platform has no currency column.
+        """
+        self.booking_date = booking_date
+        self.booking_details = booking_details
+        self.booking_id = booking_id
+        self.booking_type = booking_type
+        self.booking_value = booking_value
+        self.booking_currency = booking_currency
+
 
 class Config:
     """
-    Implementation of the configuration
+    Implementation of the configuration. A Config is immutable once created, use with_number_format to get a
+    configuration for a detected number format.
     """
 
-    def __init__(self, config):
+    def __init__(self, config, name=None):
         """
         Constructor for Config
+
+        :param config: dict of settings as read from the YAML configuration file
+        :param name: name of the platform, e.g. the name of the configuration file
         """
+        self._name = name
         logger.info("Setup config for statement parser. Run with --debug to see config values")
         logger.debug("Config settings: %s", config)
         self._relevant_invest_regex = Config.__get_compiled_regex_or_none(config, ["type_regex", "deposit"])
@@ -29,19 +231,55 @@ class Config:
         self._relevant_fee_regex = Config.__get_compiled_regex_or_none(config, ["type_regex", "fee"])
         self._ignorable_entry_regex = Config.__get_compiled_regex_or_none(config, ["type_regex", "ignorable_entry"])
         self._special_entry_regex = Config.__get_compiled_regex_or_none(config, ["type_regex", "special_entry"])
+        self._category_mappings = [
+            (self._relevant_income_regex, "Zinsen"),
+            (self._relevant_invest_regex, "Einlage"),
+            (self._relevant_payment_regex, "Entnahme"),
+            (self._relevant_fee_regex, "Gebühren"),
+            (self._special_entry_regex, "Undecided"),
+            (self._ignorable_entry_regex, "Ignored"),
+        ]
+        self._category_regex, self._category_names = Config.__compile_category_classifier(self._category_mappings)
+        self.classify_booking_type = functools.lru_cache(maxsize=CATEGORY_CACHE_SIZE)(self.__classify_booking_type)
 
         self._booking_date = config["csv_fieldnames"]["booking_date"]
         self._booking_date_format = config["csv_fieldnames"]["booking_date_format"]
+        self.parse_booking_date = functools.lru_cache(maxsize=DATE_CACHE_SIZE)(
+            Config.create_date_parser(self._booking_date_format)
+        )
         self._booking_details = config["csv_fieldnames"]["booking_details"]
         self._booking_id = config["csv_fieldnames"]["booking_id"]
+        self._unique_booking_id = bool(Config.__get_element_or_none(config, ["unique_booking_id"]))
         self._booking_type = config["csv_fieldnames"]["booking_type"]
         self._booking_value = config["csv_fieldnames"]["booking_value"]
+        self._csv_delimiter = Config.__get_element_or_none(config, ["csv_dialect", "delimiter"])
+        self._csv_quotechar = Config.__get_element_or_none(config, ["csv_dialect", "quotechar"]) or '"'
+        self._csv_encoding = Config.__get_element_or_none(config, ["csv_dialect", "encoding"]) or "utf-8-sig"
+        self._number_format = Config.__get_element_or_none(config, ["number_format"])
+        self.parse_booking_value = parse_value
+        if isinstance(self._number_format, dict):
+            self.parse_booking_value = Config.create_value_parser(
+                self._number_format["decimal"], self._number_format.get("grouping")
+            )
         if "booking_currency" in config["csv_fieldnames"]:
             self._booking_currency = config["csv_fieldnames"]["booking_currency"]
         else:
             self._booking_currency = ""
+        self._frozen = True
         logger.info("Config done.")
 
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise AttributeError(f"Config is immutable, unable to set {name}")
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Config is immutable, unable to delete {name}")
+
+    def get_name(self):
+        """get the name of the platform, None if not known"""
+        return self._name
+
     def get_relevant_invest_regex(self):
         """get the relevant_invest_regex"""
         return self._relevant_invest_regex
@@ -66,6 +304,10 @@ class Config:
         """get the special_entry regex"""
         return self._special_entry_regex
 
+    def get_category_mappings(self):
+        """get the list of (type regex, category) tuples in matching priority order"""
+        return self._category_mappings
+
     def get_booking_date(self):
         """get the booking_date"""
         return self._booking_date
@@ -82,6 +324,10 @@ class Config:
         """get the booking_id"""
         return self._booking_id
 
+    def has_unique_booking_id(self):
+        """returns True if the booking id identifies a single statement"""
+        return self._unique_booking_id
+
     def get_booking_type(self):
         """get the booking_type"""
         return self._booking_type
@@ -94,6 +340,263 @@ class Config:
         """get the booking_currency"""
         return self._booking_currency
 
+    def get_column_layout(self, fieldnames=None):
+        """
+        Get the keys to access the configured columns of a statement row.
+
+        :param fieldnames: header of the account statement; if given the columns are resolved to their indexes in the
+            header, like csv.DictReader the last column of a name wins. Otherwise the column names are returned.
+
+        :return: ColumnLayout of the configured columns
+        :raises KeyError: if a configured column is not part of the header
+        """
+        column_names = [
+            self._booking_date,
+            self._booking_details,
+            self._booking_id,
+            self._booking_type,
+            self._booking_value,
+            self._booking_currency or None,
+        ]
+        if fieldnames is None:
+            return ColumnLayout(*column_names)
+
+        column_indexes = {fieldname: index for index, fieldname in enumerate(fieldnames)}
+        missing_columns = [name for name in column_names if name is not None and name not in column_indexes]
+        if missing_columns:
+            raise KeyError(f"Columns {missing_columns} not found in account statement header {fieldnames}")
+        return ColumnLayout(*[column_indexes.get(name) for name in column_names])
+
+    def get_csv_delimiter(self):
+        """get the csv_delimiter, None if the delimiter needs to be detected"""
+        return self._csv_delimiter
+
+    def get_csv_quotechar(self):
+        """get the csv_quotechar"""
+        return self._csv_quotechar
+
+    def get_csv_encoding(self):
+        """get the csv_encoding"""
+        return self._csv_encoding
+
+    def get_number_format(self):
+        """get the number_format as dict of decimal and grouping separator, None if the format is not known"""
+        if isinstance(self._number_format, dict):
+            return self._number_format
+        return None
+
+    def needs_number_format_detection(self):
+        """check if the number format is configured as 'auto' and was not detected yet"""
+        return self._number_format == "auto"
+
+    def detect_number_format(self, raw_values):
+        """
+        Detect the number format from a sample of statement values, see with_number_format to use it. Values
+        containing both a dot and a comma determine decimal and grouping separator. Otherwise a sample only using
+        one of the separators sets it as decimal separator. The format stays undetected for a sample mixing both
+        separators; the heuristic of parse_value is used in that case.
+
+        :param raw_values: iterable of statement values as string
+
+        :return: detected number format as dict of decimal and grouping separator, None if undecided
+        """
+        number_format = None
+        seen_separators = set()
+        for raw_value in raw_values:
+            if not raw_value:
+                continue
+            dot_pos = raw_value.find(".")
+            comma_pos = raw_value.find(",")
+            if dot_pos != -1 and comma_pos != -1:
+                decimal = "," if dot_pos < comma_pos else "."
+                grouping = "." if decimal == "," else ","
+                number_format = {"decimal": decimal, "grouping": grouping}
+                break
+            if dot_pos != -1:
+                seen_separators.add(".")
+            if comma_pos != -1:
+                seen_separators.add(",")
+
+        if not number_format and len(seen_separators) == 1:
+            number_format = {"decimal": seen_separators.pop(), "grouping": None}
+
+        if number_format:
+            logger.info("Detected number format: %s", number_format)
+        else:
+            logger.info("Unable to detect number format, using the default heuristic")
+        return number_format
+
+    def with_number_format(self, number_format):
+        """
+        Get a copy of the configuration parsing the statement values in the given number format, e.g. the one returned
+        by detect_number_format. The compiled regexes and caches are shared with this configuration.
+
+        :param number_format: dict of decimal and grouping separator, None to use the heuristic of parse_value
+
+        :return: Config object
+        """
+        config = copy.copy(self)
+        parse_booking_value = parse_value
+        if number_format:
+            parse_booking_value = Config.create_value_parser(number_format["decimal"], number_format.get("grouping"))
+        object.__setattr__(config, "_number_format", number_format)
+        object.__setattr__(config, "parse_booking_value", parse_booking_value)
+        return config
+
+    @staticmethod
+    def create_value_parser(decimal, grouping=None):
+        """
+        Create a function parsing statement values of a known number format from string to float. Values not matching
+        the format are parsed with the heuristic of parse_value.
+
+        :param decimal: decimal separator, either '.' or ','
+        :param grouping: digit grouping separator, None if the values do not use digit grouping
+
+        :return: function taking a statement value as string and returning it as float
+        """
+        if decimal not in NUMBER_SEPARATORS or decimal == grouping:
+            raise ValueError(f"Unsupported number format: decimal '{decimal}', grouping '{grouping}'")
+
+        translation = {ord(decimal): "."}
+        if grouping:
+            translation[ord(grouping)] = None
+
+        def parse_known_format(value):
+            if not value:
+                return None
+            try:
+                return float(value.strip("€").translate(translation))
+            except ValueError:
+                return parse_value(value)
+
+        return parse_known_format
+
+    def __classify_booking_type(self, booking_type):
+        """
+        Map a booking type to its category using the combined classifier. The first matching type regex wins; the
+        order is interest, deposit, withdraw, fee, special entry, ignorable entry.
+
+        :param booking_type: string containing the relevant loan information to determine category of entry.
+
+        :return: category of the booking type; 'Undecided' for special entries, the empty string if unknown
+        """
+        if self._category_regex:
+            match = self._category_regex.match(booking_type)
+            if match:
+                return self._category_names[match.lastgroup]
+            return ""
+
+        for regex, category in self._category_mappings:
+            if regex and regex.match(booking_type):
+                return category
+        return ""
+
+    @staticmethod
+    def create_date_parser(date_format):
+        """
+        Create a function parsing date strings of the given format into date objects. Formats only consisting of
+        zero padded %Y, %m, %d, %H, %M, %S directives and literal characters are parsed by slicing the fixed positions
+        of the fields. Strings not matching the fixed layout, e.g. without zero padding, and all other formats are
+        parsed by datetime.strptime.
+
+        :param date_format: date format as used by datetime.strptime
+
+        :return: function taking a date string and returning a datetime.date object
+        """
+
+        def parse_with_strptime(value):
+            return datetime.strptime(value, date_format).date()
+
+        date_layout = Config.__get_fixed_width_date_layout(date_format)
+        if not date_layout:
+            return parse_with_strptime
+
+        fields, literals, length = date_layout
+        year_start, year_end = fields["Y"]
+        month_start, month_end = fields["m"]
+        day_start, day_end = fields["d"]
+        numeric_fields = [
+            (start, end, TIME_DIRECTIVE_LIMITS.get(directive)) for directive, (start, end) in fields.items()
+        ]
+
+        def parse_fixed_width(value):
+            if len(value) != length or not value.isascii() or any(value[pos] != char for pos, char in literals):
+                return parse_with_strptime(value)
+            for start, end, limit in numeric_fields:
+                digits = value[start:end]
+                if not digits.isdigit() or (limit is not None and int(digits) > limit):
+                    return parse_with_strptime(value)
+            try:
+                return date(
+                    int(value[year_start:year_end]), int(value[month_start:month_end]), int(value[day_start:day_end])
+                )
+            except ValueError:
+                return parse_with_strptime(value)
+
+        return parse_fixed_width
+
+    @staticmethod
+    def __get_fixed_width_date_layout(date_format):
+        """
+        Get the positions of the fields and literal characters of a date format only consisting of zero padded
+        %Y, %m, %d, %H, %M, %S directives and literal characters.
+
+        :param date_format: date format as used by datetime.strptime
+
+        :return: tuple of a dict mapping directives to (start, end) positions, a list of (position, character) tuples
+            and the length of matching date strings; None if the format has no fixed width layout
+        """
+        fields = {}
+        literals = []
+        position = 0
+        format_index = 0
+        while format_index < len(date_format):
+            character = date_format[format_index]
+            if character == "%":
+                directive = date_format[format_index + 1 : format_index + 2]
+                if directive not in FIXED_WIDTH_DATE_DIRECTIVES or directive in fields:
+                    return None
+                width = FIXED_WIDTH_DATE_DIRECTIVES[directive]
+                fields[directive] = (position, position + width)
+                position += width
+                format_index += 2
+            else:
+                literals.append((position, character))
+                position += 1
+                format_index += 1
+
+        if not all(directive in fields for directive in "Ymd"):
+            return None
+        return fields, literals, position
+
+    @staticmethod
+    def __compile_category_classifier(mappings):
+        """
+        Combine the configured type regexes into one alternation of named groups. Alternatives are tried in order,
+        so the first configured regex matching the booking type determines the group reported by the match.
+
+        :param mappings: list of (compiled regex or None, category) tuples in priority order
+
+        :return: tuple of the combined regex and a dict mapping group names to categories; (None, None) if the
+            regexes cannot be combined, e.g. because of global inline flags or numbered back references
+        """
+        alternatives = []
+        category_names = {}
+        for index, (regex, category) in enumerate(mappings):
+            if not regex:
+                continue
+            group_name = f"_category_{index}"
+            alternatives.append(f"(?P<{group_name}>(?:{regex.pattern}))")
+            category_names[group_name] = category
+
+        if not alternatives:
+            return None, None
+        try:
+            return re.compile("|".join(alternatives)), category_names
+        except re.error as error:
+            logger.debug("Unable to combine type regexes (%s), matching them one by one", error)
+            return None, None
+
     @staticmethod
     def __get_element_or_none(obj, path):
         for item in path:
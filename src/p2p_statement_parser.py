@@ -4,20 +4,30 @@ Module for a generic peer to peer loan account statement parser.
 
 Copyright 2018-04-29 ChrisRBe
 """
-import calendar
-import codecs
 import csv
+import hashlib
+import itertools
 import logging
+import os
 
-from yaml import safe_load
-
+from src import profiling
+from src.aggregation import AggregationEngine
+from src.aggregation import is_supported
+from src.cache import JsonCache
+from src.compression import iter_text_streams
 from src.p2p_config import Config
-from src.portfolio_writer import PP_FIELDNAMES
-from src.statement import Statement
+from src.p2p_config import get_config
+from src.p2p_config import NUMBER_FORMAT_SAMPLE_SIZE
+from src.platform_detection import HEADER_DELIMITERS
+from src.statement import StatementRecord
 
 
+SUPPORTED_AGGREGATIONS = ["transaction", "daily", "weekly", "monthly", "quarterly", "yearly"]
+DIALECT_ATTRIBUTES = ["delimiter", "quotechar", "doublequote", "skipinitialspace", "quoting", "escapechar"]
 logger = logging.getLogger(__name__)
 
+dialect_cache = JsonCache("dialects")
+
 
 class PeerToPeerPlatformParser(object):
     """
@@ -28,13 +38,21 @@ class PeerToPeerPlatformParser(object):
     def __init__(self, config, infile):
         """
         Constructor for PeerToPeerPlatformParser
+
+        :param config: path to the YAML configuration file of the platform or a Config object
+        :param infile: account statement file
         """
         self._account_statement_file = infile
-        self._config_file = config
-
+        self._config_file = None
         self.config = None
+        if isinstance(config, Config):
+            self.config = config
+        else:
+            self._config_file = config
+
         self.output_list = []
-        self.aggregation_data = {}
+        self.aggregation = None
+        self.last_booking_id = None
 
     @property
     def account_statement_file(self):
@@ -55,101 +73,228 @@ class PeerToPeerPlatformParser(object):
     def config_file(self, value):
         """config file property setter"""
         self._config_file = value
+        self.config = None
 
-    def __aggregate_statements(self, formatted_account_entry, comment, monthly=True):
-        entry_date = formatted_account_entry[PP_FIELDNAMES[0]]
-        if monthly:
-            last_day = calendar.monthrange(entry_date.year, entry_date.month)[1]
-            entry_date = entry_date.replace(day=last_day)
-
-        entry_type = formatted_account_entry[PP_FIELDNAMES[3]]
-        entry_value = formatted_account_entry[PP_FIELDNAMES[1]]
-        entry_currency = formatted_account_entry[PP_FIELDNAMES[2]]
-
-        logger.debug("entry type is %s. new entry date is %s. value of entry: %s", entry_type, entry_date, entry_value)
-        if entry_date not in self.aggregation_data:
-            self.aggregation_data[entry_date] = {}
-        if entry_type in self.aggregation_data[entry_date]:
-            logger.debug("add to existing entry")
-            self.aggregation_data[entry_date][entry_type][PP_FIELDNAMES[1]] += entry_value
-        else:
-            self.aggregation_data[entry_date][entry_type] = {
-                PP_FIELDNAMES[0]: entry_date,
-                PP_FIELDNAMES[1]: entry_value,
-                PP_FIELDNAMES[2]: entry_currency,
-                PP_FIELDNAMES[3]: entry_type,
-                PP_FIELDNAMES[4]: comment,
-            }
+    def __parse_service_config(self):
+        """
+        Get the configuration of the platform from the process wide configuration registry, unless a configuration
+        has already been assigned.
+        """
+        if self.config is None:
+            self.config = get_config(self.config_file)
+
+    def aggregate_entries(self, formatted_account_entries, aggregate="transaction"):
+        """
+        Applies the requested aggregation to statement records.
+
+            - transaction: yield each entry as soon as it is available.
+            - daily, weekly, monthly, quarterly, yearly or a period registered with register_period: sum the entries
+              per period, category and currency, yield the sums at the end.
+
+        Only the sums are kept in memory, the entries themselves are not stored. The AggregationEngine holding the sums
+        is kept in the aggregation attribute.
+
+        :param formatted_account_entries: iterable of StatementRecord objects
+        :param aggregate: specify the aggregation format; e.g. daily or monthly. Defaults to transaction.
 
-    def __aggregate_statements_daily(self, formatted_account_entry):
-        self.__aggregate_statements(formatted_account_entry, "Tageszusammenfassung", False)
+        :return: generator of StatementRecord objects ready for use in Portfolio Performance
+        """
+        if aggregate == "transaction":
+            yield from formatted_account_entries
+            return
 
-    def __aggregate_statements_monthly(self, formatted_account_entry):
-        self.__aggregate_statements(formatted_account_entry, "Monatszusammenfassung", True)
+        self.aggregation = AggregationEngine(aggregate)
+        self.aggregation.update(formatted_account_entries)
+        yield from self.aggregation.iter_records()
 
-    def __format_statement(self, statement):
+    def _check_aggregation(self, aggregate):
         """
-        Formats a given statement into a dictionary containing the relevant data for Portfolio Performance.
+        Check if the requested aggregation is supported and log the aggregation in use.
 
-        :param statement: contains a line from the given CSV file
+        :param aggregate: specifies the aggregation period
 
-        :return: dictionary containing the formatted account entry
+        :return: True if the aggregation is supported, False otherwise
         """
-        statement = Statement(self.config, statement)
-        category = statement.get_category()
+        if is_supported(aggregate):
+            logger.info("Aggregating data on a {} basis".format(aggregate))
+            return True
+        logger.error("Aggregating data on a {} basis not supported.".format(aggregate))
+        return False
 
-        if not category or category == "Ignored":
-            return
+    def _get_dialect_parameters(self, header_line):
+        """
+        Get the CSV dialect of the account statement. A delimiter declared in the configuration is used as is.
+        Otherwise the dialect is sniffed from the header line. A dialect is only used from the cache, and only cached,
+        if it splits the header into the configured columns; otherwise it is sniffed again with every delimiter of
+        HEADER_DELIMITERS. Dialects are cached per platform and header.
 
-        formatted_account_entry = {
-            PP_FIELDNAMES[0]: statement.get_date(),
-            PP_FIELDNAMES[1]: round(statement.get_value(), 9),
-            PP_FIELDNAMES[2]: statement.get_currency(),
-            PP_FIELDNAMES[3]: category,
-            PP_FIELDNAMES[4]: statement.get_note(),
-        }
-        return formatted_account_entry
+        :param header_line: first line of the account statement
 
-    def __migrate_data_to_output(self):
+        :return: dict of CSV format parameters
         """
-        Iterates over the data collected for the aggregation of account statement data and adds it to the output list.
-        :return:
+        if self.config.get_csv_delimiter():
+            return {"delimiter": self.config.get_csv_delimiter(), "quotechar": self.config.get_csv_quotechar()}
+
+        platform = self.config.get_name() or os.path.splitext(os.path.basename(self.config_file or ""))[0]
+        cache_key = "{}:{}".format(platform, hashlib.sha1(header_line.encode("utf-8")).hexdigest())
+        dialect_parameters = dialect_cache.get(cache_key)
+        if dialect_parameters is not None and self.__has_configured_columns(header_line, dialect_parameters):
+            return dialect_parameters
+        if dialect_parameters is not None:
+            logger.info("The cached CSV dialect does not match the configured columns, detecting it again")
+
+        sniffed_parameters = self.__sniff_dialect(header_line)
+        candidates = itertools.chain(
+            [sniffed_parameters], (self.__sniff_dialect(header_line, delimiter) for delimiter in HEADER_DELIMITERS)
+        )
+        for dialect_parameters in candidates:
+            if dialect_parameters and self.__has_configured_columns(header_line, dialect_parameters):
+                dialect_cache.set(cache_key, dialect_parameters)
+                return dialect_parameters
+        logger.warning("Unable to split the header into the configured columns, check the delimiter of the statement")
+        if sniffed_parameters is None:
+            raise csv.Error("Could not determine the CSV dialect of the account statement")
+        return sniffed_parameters
+
+    @staticmethod
+    def __sniff_dialect(header_line, delimiters=None):
         """
-        for _, booking_type in self.aggregation_data.items():
-            for _, entry in booking_type.items():
-                entry[PP_FIELDNAMES[1]] = round(entry[PP_FIELDNAMES[1]], 9)
-                self.output_list.append(entry)
+        Sniff the CSV dialect from the header line.
 
-    def __parse_service_config(self):
+        :param header_line: first line of the account statement
+        :param delimiters: possible delimiters, all characters if not given
+
+        :return: dict of CSV format parameters, None if no dialect was found
         """
-        Parse the YAML configuration file containing specific settings for the individual p2p loan platform
+        try:
+            dialect = csv.Sniffer().sniff(header_line, delimiters=delimiters)
+        except csv.Error:
+            return None
+        return {attribute: getattr(dialect, attribute) for attribute in DIALECT_ATTRIBUTES}
+
+    def __has_configured_columns(self, header_line, dialect_parameters):
         """
-        with open(self.config_file, "r", encoding="utf-8") as ymlconfig:
-            config = safe_load(ymlconfig)
-            self.config = Config(config)
+        Check if a CSV dialect splits the header line into the configured columns.
+
+        :param header_line: first line of the account statement
+        :param dialect_parameters: dict of CSV format parameters
 
-    def __process_statement(self, statement, aggregate="transaction"):
+        :return: True if the header contains all configured columns
         """
-        Processes each statement read from the account statement file. First, format in into the dictionary.
-        Then check what aggregation should be applied.
+        try:
+            self.config.get_column_layout(next(csv.reader([header_line], **dialect_parameters)))
+        except (KeyError, csv.Error, TypeError):
+            return False
+        return True
 
-            - transaction: add directly to the output list.
-            - daily: add it to intermediate aggregation collection.
-            - monthly: add it to intermediate aggregation collection.
+    def __detect_number_format(self, account_statement, columns):
+        """
+        Detect the number format from the first rows of the account statement.
 
-        :param statement: Contains one line from the account statement file
-        :param aggregate: specify the aggregation format; e.g. daily or monthly. Defaults to transaction.
+        :param account_statement: iterator of rows as lists
+        :param columns: ColumnLayout with the indexes of the configured columns
 
-        :return:
+        :return: iterator of all rows, including the ones read for the detection
         """
-        formatted_account_entry = self.__format_statement(statement)
-        if formatted_account_entry:
-            if aggregate == "transaction":
-                self.output_list.append(formatted_account_entry)
-            elif aggregate == "daily":
-                self.__aggregate_statements_daily(formatted_account_entry)
-            elif aggregate == "monthly":
-                self.__aggregate_statements_monthly(formatted_account_entry)
+        sample = list(itertools.islice(account_statement, NUMBER_FORMAT_SAMPLE_SIZE))
+        self._use_detected_number_format(sample, columns)
+        return itertools.chain(sample, account_statement)
+
+    def _use_detected_number_format(self, sample, columns):
+        """
+        Detect the number format from sample rows of the account statement and parse the values in this format.
+
+        :param sample: list of rows as lists
+        :param columns: ColumnLayout with the indexes of the configured columns
+
+        :return: detected number format, see Config.detect_number_format
+        """
+        number_format = self.config.detect_number_format(
+            statement[columns.booking_value] for statement in sample if len(statement) > columns.booking_value
+        )
+        self.config = self.config.with_number_format(number_format)
+        return number_format
+
+    def _filter_rows(self, account_statement, columns):
+        """
+        Filter the rows of the account statement before they are parsed. Subclasses can override this to skip rows;
+        all rows are kept by default.
+
+        :param account_statement: iterator of rows as lists
+        :param columns: ColumnLayout with the indexes of the configured columns
+
+        :return: iterator of rows as lists
+        """
+        return account_statement
+
+    def iter_formatted_entries(self, infile, header_line=None):
+        """
+        Yield the statement records of an opened account statement csv file without any aggregation. Entries which
+        are ignored or of unknown type are skipped. The booking id of the last row read is kept in last_booking_id.
+
+        :param infile: text stream of the account statement, positioned at the header line
+        :param header_line: header line of the account statement if infile is positioned behind it, e.g. when reading
+        is resumed in the middle of the file
+
+        :return: generator of StatementRecord objects
+        """
+        self.__parse_service_config()
+
+        if header_line is None:
+            header_line = infile.readline()
+        dialect_parameters = profiling.wrap("sniff", self._get_dialect_parameters)(header_line)
+        account_statement = profiling.wrap_iterator(
+            "read_csv", csv.reader(itertools.chain([header_line], infile), **dialect_parameters)
+        )
+        fieldnames = next(account_statement, None)
+        if fieldnames is None:
+            return
+        columns = self.config.get_column_layout(fieldnames)
+        row_length = len(fieldnames)
+
+        if self.config.needs_number_format_detection():
+            account_statement = self.__detect_number_format(account_statement, columns)
+
+        account_statement = self._filter_rows(account_statement, columns)
+        config = self.config
+        from_row = StatementRecord.from_row
+        profiler = profiling.get_profiler()
+        if profiler:
+            config = profiler.wrap_config(config)
+            from_row = profiler.wrap("build_record", from_row)
+        statement = None
+        for statement in account_statement:
+            if not statement:
+                continue
+            if len(statement) < row_length:
+                statement += [None] * (row_length - len(statement))
+            record = from_row(config, statement, columns)
+            if record:
+                yield record
+        if statement:
+            self.last_booking_id = statement[columns.booking_id]
+
+    def iter_account_statement(self, aggregate="transaction"):
+        """
+        read a platform account statement csv file and yield the content filtered according to the given
+        configuration file while the file is being read. Compressed files are decompressed while reading, the CSV files
+        of a zip archive are read one after the other and aggregated together. See parse_account_statement for the
+        aggregation options.
+
+        :param aggregate: specifies the aggregation period. defaults to transaction.
+        :return: generator of StatementRecord objects ready for use in Portfolio Performance
+        """
+        if not self._check_aggregation(aggregate):
+            return
+
+        self.__parse_service_config()
+
+        logger.info("Loading account statement")
+        formatted_entries = itertools.chain.from_iterable(
+            self.iter_formatted_entries(infile)
+            for infile in iter_text_streams(self._account_statement_file, self.config.get_csv_encoding())
+        )
+        yield from self.aggregate_entries(formatted_entries, aggregate)
 
     def parse_account_statement(self, aggregate="transaction"):
         """
@@ -161,27 +306,11 @@ class PeerToPeerPlatformParser(object):
           booking type.
         - aggregate="monthly": return a list of post-processed statements aggregating on monthly basis for each
           booking type.
+        - aggregate="weekly", "quarterly" or "yearly": like monthly, dated on the last day of the week (Sunday),
+          quarter or year.
 
         :param aggregate: specifies the aggregation period. defaults to daily.
         :return: list of account statement entries ready for use in Portfolio Performance
         """
-        if aggregate == "transaction" or aggregate == "daily" or aggregate == "monthly":
-            logger.info("Aggregating data on a {} basis".format(aggregate))
-        else:
-            logger.error("Aggregating data on a {} basis not supported.".format(aggregate))
-            return
-
-        self.__parse_service_config()
-
-        logger.info("Loading account statement")
-        with codecs.open(self._account_statement_file, "r", encoding="utf-8-sig") as infile:
-            dialect = csv.Sniffer().sniff(infile.readline())
-            infile.seek(0)
-            account_statement = csv.DictReader(infile, dialect=dialect)
-
-            for statement in account_statement:
-                self.__process_statement(aggregate=aggregate, statement=statement)
-
-        if aggregate == "daily" or aggregate == "monthly":
-            self.__migrate_data_to_output()
+        self.output_list = [record.as_dict() for record in self.iter_account_statement(aggregate=aggregate)]
         return self.output_list
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Module for detecting the platform of an account statement file from its header line.
+
+Every platform configuration declares the columns the parser needs in csv_fieldnames. These column sets are the
+signatures of the platforms. A header matches a platform if it contains all columns of its signature. If several
+platforms match, the ones whose signature is contained in the signature of another matching platform are dropped, so
+the most specific platform wins. Platforms with the same signature can not be told apart by the header; for them the
+booking types of the first rows are classified with the type regexes of every platform, see select_by_booking_types.
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import csv
+import itertools
+import logging
+
+from src.compression import iter_text_streams
+from src.p2p_config import read_config_file
+from src.p2p_config import registry
+
+
+HEADER_ENCODING = "utf-8-sig"
+HEADER_DELIMITERS = ",;\t|"
+SAMPLE_ROW_COUNT = 100
+logger = logging.getLogger(__name__)
+
+
+def read_rows(infile, row_count=0, encoding=HEADER_ENCODING):
+    """
+    Read the header line and the first rows of an account statement file. For a zip archive the first CSV file is
+    read.
+
+    :param infile: account statement file
+    :param row_count: number of rows read after the header line
+    :param encoding: encoding of the file
+
+    :return: tuple of the list of column names and a list of rows as lists; empty lists if the file has no header line
+    """
+    text_streams = iter_text_streams(infile, encoding, errors="replace")
+    try:
+        statement_file = next(text_streams, None)
+        header_line = statement_file.readline() if statement_file else ""
+        lines = list(itertools.islice(statement_file, row_count)) if header_line.strip() else []
+    finally:
+        text_streams.close()
+    if not header_line.strip():
+        return [], []
+    try:
+        dialect = csv.Sniffer().sniff(header_line, delimiters=HEADER_DELIMITERS)
+    except csv.Error:
+        dialect = csv.excel
+    header, *rows = csv.reader([header_line, *lines], dialect)
+    return [column.strip() for column in header], rows
+
+
+def read_header(infile, encoding=HEADER_ENCODING):
+    """
+    Read the column names from the header line of an account statement file. For a zip archive the header of the
+    first CSV file is read.
+
+    :param infile: account statement file
+    :param encoding: encoding of the file
+
+    :return: list of column names, empty if the file has no header line
+    """
+    return read_rows(infile, encoding=encoding)[0]
+
+
+def select_by_booking_types(infile, platforms, config_registry=registry, row_count=SAMPLE_ROW_COUNT):
+    """
+    Tell apart platforms matching the header of an account statement file by classifying the booking types of its
+    first rows with the type regexes of every platform. The platforms recognizing the most booking types are kept.
+
+    :param infile: account statement file
+    :param platforms: names of the platforms matching the header
+    :param config_registry: ConfigRegistry providing the configurations
+    :param row_count: number of rows classified
+
+    :return: sorted list of the platforms recognizing the most booking types; several entries if the booking types
+    do not tell the platforms apart
+    """
+    fieldnames, rows = read_rows(infile, row_count)
+    recognized_counts = {}
+    for platform in platforms:
+        config = config_registry.get(platform)
+        if config.get_booking_type() not in fieldnames:
+            continue
+        booking_type_column = fieldnames.index(config.get_booking_type())
+        recognized_counts[platform] = sum(
+            1
+            for row in rows
+            if len(row) > booking_type_column and config.classify_booking_type(row[booking_type_column].strip())
+        )
+    logger.debug("Booking types of %s recognized per platform: %s", infile, recognized_counts)
+    if not recognized_counts:
+        return sorted(platforms)
+    most_recognized = max(recognized_counts.values())
+    return sorted(platform for platform, count in recognized_counts.items() if count == most_recognized)
+
+
+class HeaderSignatureIndex(object):
+    """
+    Index of the column signatures of the platforms, mapping every column name to the platforms requiring it.
+    """
+
+    def __init__(self, signatures):
+        """
+        Constructor for HeaderSignatureIndex
+
+        :param signatures: dict mapping platform names to the set of columns required by the platform
+        """
+        self._signatures = {platform: frozenset(columns) for platform, columns in signatures.items()}
+        self._platforms_by_column = {}
+        for platform, columns in self._signatures.items():
+            for column in columns:
+                self._platforms_by_column.setdefault(column, []).append(platform)
+
+    @classmethod
+    def from_registry(cls, config_registry=registry):
+        """
+        Create the index from the configuration files of all platforms.
+
+        :param config_registry: ConfigRegistry providing the configuration files
+
+        :return: HeaderSignatureIndex
+        """
+        signatures = {}
+        for platform in config_registry.get_platforms():
+            fieldnames = read_config_file(config_registry.get_config_file(platform))["csv_fieldnames"]
+            signatures[platform] = {
+                column for key, column in fieldnames.items() if key != "booking_date_format" and column
+            }
+        return cls(signatures)
+
+    def get_signature(self, platform):
+        """
+        Get the columns required by a platform.
+
+        :param platform: name of the platform
+
+        :return: frozenset of column names
+        """
+        return self._signatures[platform]
+
+    def match(self, fieldnames):
+        """
+        Find the platforms matching the columns of an account statement header.
+
+        :param fieldnames: list of column names of the header
+
+        :return: sorted list of the most specific matching platforms; empty if no platform matches, several entries if
+        the header is ambiguous
+        """
+        matched_columns = {}
+        for column in set(fieldnames):
+            for platform in self._platforms_by_column.get(column, ()):
+                matched_columns[platform] = matched_columns.get(platform, 0) + 1
+
+        candidates = [
+            platform for platform, count in matched_columns.items() if count == len(self._signatures[platform])
+        ]
+        return sorted(
+            platform
+            for platform in candidates
+            if not any(self._signatures[platform] < self._signatures[other] for other in candidates)
+        )
+
+    def detect(self, infile):
+        """
+        Find the platforms matching the header line of an account statement file.
+
+        :param infile: account statement file
+
+        :return: sorted list of the most specific matching platforms, see match
+        """
+        platforms = self.match(read_header(infile))
+        logger.debug("Platforms matching the header of %s: %s", infile, platforms)
+        return platforms
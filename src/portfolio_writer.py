@@ -7,56 +7,258 @@ Copyright 2018-04-29 ChrisRBe
 import codecs
 import csv
 import io
+import itertools
 import locale
 import logging
+import os
+import re
 from decimal import Decimal
 
+from src import profiling
+from src.compression import get_compression_suffix
+from src.compression import open_output
+from src.compression import strip_compression_suffix
+
 
 PP_FIELDNAMES = ["Datum", "Wert", "Buchungswährung", "Typ", "Notiz"]
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+WRITE_BATCH_SIZE = 1024
+VALUE_FORMAT = ".8n"
 logger = logging.getLogger(__name__)
 
+_NUMBER_PATTERN = re.compile(r"(-?)(\d*)(.*)")
+
+
+def _iter_group_sizes(grouping):
+    """
+    Yield the sizes of the digit groups from the right, see the grouping entry of locale.localeconv. The last size is
+    repeated unless the grouping ends with locale.CHAR_MAX.
+    """
+    size = None
+    for size_entry in grouping:
+        if size_entry == locale.CHAR_MAX:
+            return
+        if size_entry == 0:
+            break
+        size = size_entry
+        yield size
+    if size:
+        yield from itertools.repeat(size)
+
+
+def group_digits(digits, thousands_sep, grouping):
+    """
+    Insert the thousands separator into a string of digits like the locale aware number formatting does.
+
+    :param digits: string of digits
+    :param thousands_sep: thousands separator of the locale
+    :param grouping: grouping of the locale, see locale.localeconv
+
+    :return: grouped digits
+    """
+    groups = []
+    end = len(digits)
+    for size in _iter_group_sizes(grouping):
+        if end <= size:
+            break
+        groups.append(digits[end - size : end])
+        end -= size
+    groups.append(digits[:end])
+    return thousands_sep.join(reversed(groups))
+
+
+def create_value_formatter(conventions=None):
+    """
+    Create the function formatting the values of the output file. The values are formatted like
+    f"{Decimal(value):.8n}", but the locale conventions are only resolved once instead of for every value.
+
+    :param conventions: locale conventions as returned by locale.localeconv; defaults to the current locale
+
+    :return: function taking a float or Decimal and returning the formatted value
+    """
+    if conventions is None:
+        conventions = locale.localeconv()
+    decimal_point = conventions["decimal_point"]
+    thousands_sep = conventions["thousands_sep"]
+    grouping = conventions["grouping"] if thousands_sep else []
+    if grouping and grouping[0] in (0, locale.CHAR_MAX):
+        grouping = []
+
+    if not grouping and decimal_point == ".":
+        return lambda value: format(Decimal(value), ".8g")
+
+    def format_value(value):
+        sign, digits, fraction = _NUMBER_PATTERN.match(format(Decimal(value), ".8g")).groups()
+        return sign + group_digits(digits, thousands_sep, grouping) + fraction.replace(".", decimal_point)
+
+    return format_value
+
+
+class _NoTrailingWhitespaceFile(object):
+    """
+    File wrapper holding back the whitespace at the end of the written content, e.g. the line terminator of the last
+    written row, so a streamed output file ends like the buffered output, which is stripped before it is written.
+    """
+
+    def __init__(self, outfile):
+        """
+        constructor for class
+
+        :param outfile: file object to write to
+        """
+        self._outfile = outfile
+        self._pending = ""
+
+    def write(self, content):
+        """
+        Write the content, keeping back the whitespace at its end until more content follows.
+
+        :param content: string to write
+        """
+        stripped_content = content.rstrip()
+        if not stripped_content:
+            self._pending += content
+            return
+        if self._pending:
+            self._outfile.write(self._pending)
+        self._pending = content[len(stripped_content) :]
+        self._outfile.write(stripped_content)
+
+    def close(self):
+        """Close the wrapped file, dropping any held back whitespace."""
+        self._outfile.close()
+
+
+def get_temporary_file(outfile):
+    """
+    Get the path of the temporary file an output file is written to, in the same directory so it can be moved to the
+    output file atomically. The name keeps the compression suffix of the output file.
+
+    :param outfile: path of the output file
+
+    :return: path of the temporary file
+    """
+    directory, file_name = os.path.split(outfile)
+    return os.path.join(
+        directory, f".{strip_compression_suffix(file_name)}.{os.getpid()}.tmp{get_compression_suffix(file_name)}"
+    )
+
 
 class PortfolioPerformanceWriter(object):
     """
     Writing parsed Peer-to-Peer lending account statements to Portfolio Performance compatible format
     """
 
-    def __init__(self, dialect="excel"):
+    def __init__(self, dialect="excel", outfile=None):
         """
         constructor for class
 
         :param dialect: translates to the used CSV dialect, defaults to excel
+        :param outfile: if set, rows are streamed into a temporary file next to this file instead of being buffered in
+        memory, which replaces the file once all rows are written, see close; the file is compressed with gzip if its
+        name ends with .gz
         """
         self.dialect = dialect
+        self.outfile = outfile
+        self.temp_outfile = None
         self.out_csv_fieldnames = PP_FIELDNAMES
         self.out_string_stream = io.StringIO()
+        self.out_file_stream = None
         self.out_csv_writer = None
+        self._format_value = None
+        self._pending_rows = []
+        self._batch_stream = io.StringIO()
+        self._batch_writer = csv.writer(self._batch_stream, dialect=dialect)
+
+    def __enter__(self):
+        """
+        Open the output file and write the header; used as context manager for streaming the output.
+        """
+        self.init_output()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Close the output file when leaving the context. If an exception occurred, the incomplete output is discarded
+        and an existing output file is left unchanged.
+        """
+        self.close(discard=exc_type is not None)
 
     def init_output(self):
         """
-        Initialize output csv file
+        Initialize output csv file. In streaming mode a temporary file in the directory of the output file is opened
+        for writing.
         """
         if not self.out_csv_writer:
+            out_stream = self.out_string_stream
+            if self.outfile:
+                self.temp_outfile = get_temporary_file(self.outfile)
+                self.out_file_stream = _NoTrailingWhitespaceFile(
+                    open_output(self.temp_outfile, buffering=OUTPUT_BUFFER_SIZE)
+                )
+                out_stream = self.out_file_stream
             self.out_csv_writer = csv.DictWriter(
-                f=self.out_string_stream,
+                f=out_stream,
                 fieldnames=self.out_csv_fieldnames,
                 dialect=self.dialect,
             )
             self.out_csv_writer.writeheader()
 
+            profiler = profiling.get_profiler()
+            if profiler:
+                self.update_output = profiler.wrap("write", self.update_output)
+
+    def __get_value_formatter(self):
+        """
+        Get the value formatter; the locale conventions are resolved when the first entry is written.
+        """
+        if self._format_value is None:
+            logger.debug("Current locale: %s", locale.getlocale())
+            self._format_value = create_value_formatter()
+        return self._format_value
+
     def update_output(self, statement_dict):
         """
-        Add a new line to the portfolio performance output file; format is a dictionary
+        Add a new line to the portfolio performance output file; format is either a dictionary or a statement record.
+        Statement records are collected and written in batches, see flush.
 
         :param statement_dict: dictionary containing the fieldnames of the output file and the respective content as
-        key value pair
+        key value pair, or a StatementRecord which is written without converting it to a dictionary
         :return:
         """
-        logger.debug("Current locale: %s", locale.getlocale())
-        if statement_dict:
-            value = Decimal(statement_dict[PP_FIELDNAMES[1]])
-            statement_dict[PP_FIELDNAMES[1]] = f"{value:.8n}"
+        if not statement_dict:
+            return
+        format_value = self._format_value or self.__get_value_formatter()
+        if isinstance(statement_dict, dict):
+            self.flush()
+            statement_dict[PP_FIELDNAMES[1]] = format_value(statement_dict[PP_FIELDNAMES[1]])
             self.out_csv_writer.writerow(statement_dict)
+            return
+
+        self._pending_rows.append(
+            (
+                statement_dict.date,
+                format_value(statement_dict.value),
+                statement_dict.currency,
+                statement_dict.category,
+                statement_dict.note,
+            )
+        )
+        if len(self._pending_rows) >= WRITE_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the collected statement records to the output with a single write call.
+        """
+        if not self._pending_rows:
+            return
+        self._batch_writer.writerows(self._pending_rows)
+        self._pending_rows.clear()
+        out_stream = self.out_file_stream or self.out_string_stream
+        out_stream.write(self._batch_stream.getvalue())
+        self._batch_stream.seek(0)
+        self._batch_stream.truncate()
 
     def write_pp_csv_file(self, outfile="portfolio_performance.csv"):
         """
@@ -66,7 +268,34 @@ class PortfolioPerformanceWriter(object):
         :param outfile: specifies the path and name of the output file, defaults to portfolio_performance.csv
         :return:
         """
+        self.flush()
         with codecs.open(outfile, "w", encoding="utf-8") as csv_output:
             stream_content = self.out_string_stream.getvalue()
-            logger.debug(stream_content)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(stream_content)
             csv_output.write(stream_content.strip())
+
+    def close(self, discard=False):
+        """
+        Close the output file in streaming mode and move the temporary file to the output file. Does nothing if the
+        output is buffered in memory.
+
+        :param discard: if set, the temporary file is removed instead, so an existing output file is left unchanged
+        """
+        if not self.out_file_stream:
+            return
+        try:
+            if discard:
+                self._pending_rows.clear()
+                self.out_file_stream.close()
+            else:
+                with profiling.measure("flush"):
+                    self.flush()
+                    self.out_file_stream.close()
+                os.replace(self.temp_outfile, self.outfile)
+        finally:
+            if os.path.exists(self.temp_outfile):
+                logger.debug("Removing the incomplete output %s", self.temp_outfile)
+                os.remove(self.temp_outfile)
+            self.out_file_stream = None
+            self.temp_outfile = None
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+Module for measuring the time spent in the individual stages of an account statement conversion.
+
+Profiling is enabled for a block of code via the profile context manager:
+
+    with profiling.profile() as profiler:
+        platform_parser.parse_account_statement()
+    print(profiler.format_table())
+
+The instrumented code wraps its functions and iterators via wrap and wrap_iterator. Without an active profiler these
+return the original function or iterator, so there is no overhead if profiling is disabled. Only the current process
+is measured.
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import contextlib
+import time
+
+
+_active_profiler = None
+
+
+class ProfiledConfig(object):
+    """
+    Proxy for a Config measuring the calls to the parsing functions used for every statement.
+    """
+
+    def __init__(self, config, profiler):
+        """
+        Constructor for ProfiledConfig
+
+        :param config: Config to measure
+        :param profiler: StageProfiler collecting the measurements
+        """
+        self._config = config
+        self.classify_booking_type = profiler.wrap("classify", config.classify_booking_type)
+        self.parse_booking_date = profiler.wrap("parse_date", config.parse_booking_date)
+        self.parse_booking_value = profiler.wrap("parse_value", config.parse_booking_value)
+
+    def __getattr__(self, name):
+        return getattr(self._config, name)
+
+
+class StageProfiler(object):
+    """
+    Collects the wall time and the number of calls or rows per stage.
+    """
+
+    def __init__(self):
+        """
+        Constructor for StageProfiler
+        """
+        self._stages = {}
+
+    def __get_stage(self, stage):
+        return self._stages.setdefault(stage, [0.0, 0])
+
+    def add(self, stage, seconds, count=1):
+        """
+        Add a measurement to a stage.
+
+        :param stage: name of the stage
+        :param seconds: wall time in seconds
+        :param count: number of calls or rows processed
+        """
+        stats = self.__get_stage(stage)
+        stats[0] += seconds
+        stats[1] += count
+
+    @contextlib.contextmanager
+    def measure(self, stage, count=1):
+        """
+        Context manager adding the wall time of a block of code to a stage.
+
+        :param stage: name of the stage
+        :param count: number of calls or rows processed in the block
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start, count)
+
+    def wrap(self, stage, function):
+        """
+        Wrap a function, so every call is measured.
+
+        :param stage: name of the stage
+        :param function: function to measure
+
+        :return: wrapped function
+        """
+        stats = self.__get_stage(stage)
+        perf_counter = time.perf_counter
+
+        def profiled_function(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stats[0] += perf_counter() - start
+                stats[1] += 1
+
+        return profiled_function
+
+    def wrap_iterator(self, stage, iterable):
+        """
+        Wrap an iterable, so the time to get every item is measured.
+
+        :param stage: name of the stage
+        :param iterable: iterable to measure
+
+        :return: generator of the items of the iterable
+        """
+        stats = self.__get_stage(stage)
+        perf_counter = time.perf_counter
+        iterator = iter(iterable)
+        while True:
+            start = perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                stats[0] += perf_counter() - start
+                return
+            stats[0] += perf_counter() - start
+            stats[1] += 1
+            yield item
+
+    def wrap_config(self, config):
+        """
+        Wrap a Config, so classification, date and value parsing are measured.
+
+        :param config: Config to measure
+
+        :return: ProfiledConfig
+        """
+        return ProfiledConfig(config, self)
+
+    def get_stats(self):
+        """
+        Get the measurements of all stages in the order the stages were registered.
+
+        :return: list of dicts with stage, seconds and count
+        """
+        return [
+            {"stage": stage, "seconds": seconds, "count": count} for stage, (seconds, count) in self._stages.items()
+        ]
+
+    def format_table(self):
+        """
+        Format the measurements as table.
+
+        :return: table as string
+        """
+        lines = [f"{'stage':<14} {'count':>12} {'seconds':>10} {'µs per count':>13}"]
+        for stats in self.get_stats():
+            per_count = stats["seconds"] * 1000000 / stats["count"] if stats["count"] else 0
+            lines.append(f"{stats['stage']:<14} {stats['count']:>12} {stats['seconds']:>10.3f} {per_count:>13.2f}")
+        return "\n".join(lines)
+
+
+def get_profiler():
+    """
+    Get the active profiler.
+
+    :return: StageProfiler, None if profiling is disabled
+    """
+    return _active_profiler
+
+
+@contextlib.contextmanager
+def profile(profiler=None):
+    """
+    Context manager enabling profiling in the current process.
+
+    :param profiler: StageProfiler collecting the measurements; a new one is created if not given
+
+    :return: the active StageProfiler
+    """
+    global _active_profiler
+    previous_profiler = _active_profiler
+    _active_profiler = profiler or StageProfiler()
+    try:
+        yield _active_profiler
+    finally:
+        _active_profiler = previous_profiler
+
+
+def wrap(stage, function):
+    """
+    Wrap a function, so every call is measured by the active profiler.
+
+    :param stage: name of the stage
+    :param function: function to measure
+
+    :return: wrapped function, the function itself if profiling is disabled
+    """
+    if _active_profiler is None:
+        return function
+    return _active_profiler.wrap(stage, function)
+
+
+def wrap_iterator(stage, iterable):
+    """
+    Wrap an iterable, so the time to get every item is measured by the active profiler.
+
+    :param stage: name of the stage
+    :param iterable: iterable to measure
+
+    :return: wrapped iterable, the iterable itself if profiling is disabled
+    """
+    if _active_profiler is None:
+        return iterable
+    return _active_profiler.wrap_iterator(stage, iterable)
+
+
+def measure(stage, count=1):
+    """
+    Context manager adding the wall time of a block of code to a stage of the active profiler.
+
+    :param stage: name of the stage
+    :param count: number of calls or rows processed in the block
+    """
+    if _active_profiler is None:
+        return contextlib.nullcontext()
+    return _active_profiler.measure(stage, count)
@@ -7,21 +7,118 @@ Copyright 2018-10-16 ChrisRBe
 import logging
 from datetime import datetime
 
+from src.p2p_config import parse_value
+from src.portfolio_writer import PP_FIELDNAMES
+
 
 logger = logging.getLogger(__name__)
 
+NO_DATE = datetime(1970, 1, 1).date()
+
+
+def _handle_special_case_mintos_discount_premium(value):
+    """
+    This is currently a special case for the Mintos "discount/premium" secondary market transactions parsing,
+    where an entry might be a fee or an income depending on its sign.
+
+    :param value: how much money was returned/paid
+
+    :return: Zinsen if value >= 0 Gebühren in any other case
+    """
+
+    if value >= 0:
+        return "Zinsen"
+    else:
+        return "Gebühren"
+
+
+class StatementRecord(object):
+    """
+    Compact record of a parsed account statement entry as written to Portfolio Performance
+    """
+
+    __slots__ = ["date", "value", "currency", "category", "note"]
+
+    def __init__(self, date, value, currency, category, note):
+        """
+        Constructor for StatementRecord
+        """
+        self.date = date
+        self.value = value
+        self.currency = currency
+        self.category = category
+        self.note = note
+
+    @staticmethod
+    def from_row(config, statement, columns):
+        """
+        Parse a row of the account statement into a record. Every field of the row is parsed exactly once.
+
+        :param config: Config of the platform
+        :param statement: row of the account statement as list
+        :param columns: ColumnLayout with the indexes of the configured columns
+
+        :return: StatementRecord; None if the statement is ignored on purpose or of unknown type
+        """
+        category = config.classify_booking_type(statement[columns.booking_type])
+        if not category or category == "Ignored":
+            if not category:
+                logger.debug("Unexpected statement: %s", statement)
+            return None
+
+        value = config.parse_booking_value(statement[columns.booking_value])
+        if category == "Undecided":
+            category = _handle_special_case_mintos_discount_premium(value)
+
+        booking_date = statement[columns.booking_date]
+        return StatementRecord(
+            config.parse_booking_date(booking_date) if booking_date else NO_DATE,
+            round(value, 9),
+            statement[columns.booking_currency] if columns.booking_currency is not None else "EUR",
+            category,
+            "{id}: {details}".format(id=statement[columns.booking_id], details=statement[columns.booking_details]),
+        )
+
+    def as_dict(self):
+        """
+        Convert the record into a dictionary using the fieldnames of the Portfolio Performance output file.
+
+        :return: dictionary containing the formatted account entry
+        """
+        return {
+            PP_FIELDNAMES[0]: self.date,
+            PP_FIELDNAMES[1]: self.value,
+            PP_FIELDNAMES[2]: self.currency,
+            PP_FIELDNAMES[3]: self.category,
+            PP_FIELDNAMES[4]: self.note,
+        }
+
+    def __eq__(self, other):
+        if not isinstance(other, StatementRecord):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self.__slots__)
+
+    def __repr__(self):
+        fields = ", ".join(f"{field}={getattr(self, field)!r}" for field in self.__slots__)
+        return f"StatementRecord({fields})"
+
 
 class Statement:
     """
     Implementation of the statement
     """
 
-    def __init__(self, config, statement):
+    def __init__(self, config, statement, columns=None):
         """
         Constructor for Statement
+
+        :param config: Config of the platform
+        :param statement: row of the account statement, either a dict or a list
+        :param columns: ColumnLayout to access the row; defaults to the column names for rows read as dict
         """
         self._config = config
         self._statement = statement
+        self._columns = columns or config.get_column_layout()
 
     def get_category(self):
         """
@@ -29,23 +126,11 @@ class Statement:
 
         :return: category of the statement; if ignored on purpose return 'Ignored', if unknown return the empty string
         """
-        booking_type = self._statement[self._config.get_booking_type()]
-        value = self.get_value()
-
-        regex_to_category_mappings = [
-            {"regex": self._config.get_relevant_income_regex(), "category": "Zinsen"},
-            {"regex": self._config.get_relevant_invest_regex(), "category": "Einlage"},
-            {"regex": self._config.get_relevant_payment_regex(), "category": "Entnahme"},
-            {"regex": self._config.get_relevant_fee_regex(), "category": "Gebühren"},
-            {"regex": self._config.get_special_entry_regex(), "category": "Undecided"},
-            {"regex": self._config.get_ignorable_entry_regex(), "category": "Ignored"},
-        ]
+        booking_type = self._statement[self._columns.booking_type]
 
-        category = ""
-        for mapping in regex_to_category_mappings:
-            category = self.__match_category(mapping, booking_type, value)
-            if category:
-                break
+        category = self._config.classify_booking_type(booking_type)
+        if category == "Undecided":
+            category = _handle_special_case_mintos_discount_premium(self.get_value())
 
         if not category:
             logger.debug("Unexpected statement: %s", self._statement)
@@ -58,12 +143,11 @@ class Statement:
 
         :return: statement date as datetime object
         """
-        if self._statement[self._config.get_booking_date()]:
-            statement_date = datetime.strptime(
-                self._statement[self._config.get_booking_date()], self._config.get_booking_date_format()
-            ).date()
+        booking_date = self._statement[self._columns.booking_date]
+        if booking_date:
+            statement_date = self._config.parse_booking_date(booking_date)
         else:
-            statement_date = datetime(1970, 1, 1).date()
+            statement_date = NO_DATE
         return statement_date
 
     def get_value(self):
@@ -72,8 +156,8 @@ class Statement:
 
         :return: value of the current statement as float.
         """
-        raw_value = self._statement[self._config.get_booking_value()]
-        return Statement._parse_value(raw_value)
+        raw_value = self._statement[self._columns.booking_value]
+        return self._config.parse_booking_value(raw_value)
 
     def get_note(self):
         """
@@ -82,8 +166,8 @@ class Statement:
         :return: any note added in the original csv.
         """
         return "{id}: {details}".format(
-            id=self._statement[self._config.get_booking_id()],
-            details=self._statement[self._config.get_booking_details()],
+            id=self._statement[self._columns.booking_id],
+            details=self._statement[self._columns.booking_details],
         )
 
     def get_currency(self):
@@ -92,8 +176,8 @@ class Statement:
 
         :return: currency of the statement; if unknown return 'EUR'
         """
-        if self._config.get_booking_currency():
-            return self._statement[self._config.get_booking_currency()]
+        if self._columns.booking_currency is not None:
+            return self._statement[self._columns.booking_currency]
         else:
             return "EUR"
 
@@ -108,61 +192,4 @@ class Statement:
 
         :return: parsed value of the statement as float.
         """
-        if not value:
-            return None
-
-        value = value.strip("€")
-
-        dot_pos = value.find(".")
-        comma_pos = value.find(",")
-
-        if dot_pos == -1 or comma_pos == -1:
-            # Did not find both comma and dot, just replace comma with dot
-            value = value.replace(",", ".")
-            return float(value)
-
-        # Check position of . and , to replace them in the right order
-        if dot_pos < comma_pos:
-            # dot is used for digit grouping, comma for decimal
-            value = value.replace(".", "")
-            value = value.replace(",", ".")
-            return float(value)
-        else:
-            # comma is used for digit grouping, dot for decimal
-            value = value.replace(",", "")
-            return float(value)
-
-    @staticmethod
-    def __match_category(mapping, booking_type, value):
-        """
-        takes a dict of format {"regex": "compiled regex", "category": "category"} and returns the correct mapping for
-        the category.
-
-        :param mapping: dict of type {"regex": "compiled regex", "category": "category"}
-        :param booking_type: string containing the relevant loan information to determine category of entry.
-        :param value: value of the transaction, only required to handle special cases for mintos premium discount
-
-        :return: category
-        """
-        category = ""
-        if mapping["regex"] and mapping["regex"].match(booking_type):
-            category = mapping["category"]
-        if category == "Undecided":
-            category = Statement.__handle_special_case_mintos_discount_premium(value)
-        return category
-
-    @staticmethod
-    def __handle_special_case_mintos_discount_premium(value):
-        """
-        This is currently a special case for the Mintos "discount/premium" secondary market transactions parsing,
-        where an entry might be a fee or an income depending on its sign.
-
-        :param value: how much money was returned/paid
-
-        :return: Zinsen if value >= 0 Gebühren in any other case
-        """
-
-        if value >= 0:
-            return "Zinsen"
-        else:
-            return "Gebühren"
+        return parse_value(value)
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""
+Test fixtures shared by all unit tests
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import pytest
+
+from src.cache import CACHE_DIR_ENV
+from src.p2p_config import config_cache
+from src.p2p_statement_parser import dialect_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """keep the cache files of every test in a temporary directory instead of the user's cache directory"""
+    monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path / "cache"))
+    for cache in [config_cache, dialect_cache]:
+        cache.reset()
+    yield tmp_path / "cache"
+    for cache in [config_cache, dialect_cache]:
+        cache.reset()
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the aggregation engine
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import unittest
+from datetime import date
+from decimal import Decimal
+
+from src.aggregation import AggregationEngine
+from src.aggregation import AGGREGATION_NOTES
+from src.aggregation import get_month_end
+from src.aggregation import get_quarter_end
+from src.aggregation import get_week_end
+from src.aggregation import get_year_end
+from src.aggregation import is_supported
+from src.aggregation import PERIOD_FUNCTIONS
+from src.aggregation import register_period
+from src.aggregation import to_decimal
+from src.statement import StatementRecord
+
+
+class TestAggregationEngine(unittest.TestCase):
+    """Test case implementation for AggregationEngine"""
+
+    def setUp(self):
+        """test case setUp, run for each test case"""
+        self.records = [
+            StatementRecord(date(2020, 1, 31), 0.1, "EUR", "Zinsen", ""),
+            StatementRecord(date(2020, 2, 1), 0.2, "EUR", "Zinsen", ""),
+            StatementRecord(date(2020, 1, 31), -0.05, "EUR", "Gebühren", ""),
+            StatementRecord(date(2020, 1, 31), 1.5, "USD", "Zinsen", ""),
+            StatementRecord(date(2020, 1, 1), 0.1, "EUR", "Zinsen", ""),
+        ]
+
+    def test_get_month_end(self):
+        """test the last day of the month is returned, including leap years"""
+        self.assertEqual(date(2020, 2, 29), get_month_end(date(2020, 2, 3)))
+        self.assertEqual(date(2021, 2, 28), get_month_end(date(2021, 2, 28)))
+        self.assertEqual(date(2021, 12, 31), get_month_end(date(2021, 12, 1)))
+
+    def test_period_ends(self):
+        """test the last day of the week, quarter and year is returned"""
+        self.assertEqual(date(2021, 1, 3), get_week_end(date(2020, 12, 28)))
+        self.assertEqual(date(2021, 1, 3), get_week_end(date(2021, 1, 3)))
+        self.assertEqual(date(2020, 3, 31), get_quarter_end(date(2020, 1, 1)))
+        self.assertEqual(date(2020, 6, 30), get_quarter_end(date(2020, 6, 30)))
+        self.assertEqual(date(2020, 12, 31), get_quarter_end(date(2020, 10, 15)))
+        self.assertEqual(date(2020, 12, 31), get_year_end(date(2020, 2, 29)))
+
+    def test_to_decimal(self):
+        """test floats are converted via their shortest representation"""
+        self.assertEqual(Decimal("0.1"), to_decimal(0.1))
+        self.assertEqual(Decimal("-12.345"), to_decimal("-12.345"))
+        self.assertEqual(Decimal("3"), to_decimal(3))
+
+    def test_exact_sums(self):
+        """test many small values add up without floating point drift"""
+        aggregation = AggregationEngine("monthly")
+        aggregation.update(
+            StatementRecord(date(2020, 1, day % 28 + 1), 0.1, "EUR", "Zinsen", "") for day in range(1000)
+        )
+        self.assertEqual(
+            [StatementRecord(date(2020, 1, 31), 100.0, "EUR", "Zinsen", "Monatszusammenfassung")],
+            list(aggregation.iter_records()),
+        )
+
+    def test_daily(self):
+        """test sums per day, category and currency in the order the days and categories were first seen"""
+        aggregation = AggregationEngine("daily")
+        aggregation.update(self.records)
+        self.assertEqual(
+            [
+                StatementRecord(date(2020, 1, 31), 0.1, "EUR", "Zinsen", "Tageszusammenfassung"),
+                StatementRecord(date(2020, 1, 31), -0.05, "EUR", "Gebühren", "Tageszusammenfassung"),
+                StatementRecord(date(2020, 1, 31), 1.5, "USD", "Zinsen", "Tageszusammenfassung"),
+                StatementRecord(date(2020, 2, 1), 0.2, "EUR", "Zinsen", "Tageszusammenfassung"),
+                StatementRecord(date(2020, 1, 1), 0.1, "EUR", "Zinsen", "Tageszusammenfassung"),
+            ],
+            list(aggregation.iter_records()),
+        )
+
+    def test_monthly(self):
+        """test sums per month, category and currency"""
+        aggregation = AggregationEngine("monthly")
+        aggregation.update(self.records)
+        self.assertEqual(
+            [
+                StatementRecord(date(2020, 1, 31), 0.2, "EUR", "Zinsen", "Monatszusammenfassung"),
+                StatementRecord(date(2020, 1, 31), -0.05, "EUR", "Gebühren", "Monatszusammenfassung"),
+                StatementRecord(date(2020, 1, 31), 1.5, "USD", "Zinsen", "Monatszusammenfassung"),
+                StatementRecord(date(2020, 2, 29), 0.2, "EUR", "Zinsen", "Monatszusammenfassung"),
+            ],
+            list(aggregation.iter_records()),
+        )
+
+    def test_quarterly(self):
+        """test sums per quarter, category and currency"""
+        aggregation = AggregationEngine("quarterly")
+        aggregation.update(self.records)
+        self.assertEqual(
+            [
+                StatementRecord(date(2020, 3, 31), 0.4, "EUR", "Zinsen", "Quartalszusammenfassung"),
+                StatementRecord(date(2020, 3, 31), -0.05, "EUR", "Gebühren", "Quartalszusammenfassung"),
+                StatementRecord(date(2020, 3, 31), 1.5, "USD", "Zinsen", "Quartalszusammenfassung"),
+            ],
+            list(aggregation.iter_records()),
+        )
+
+    def test_register_period(self):
+        """test aggregating with a custom period"""
+        self.addCleanup(PERIOD_FUNCTIONS.pop, "semimonthly", None)
+        self.addCleanup(AGGREGATION_NOTES.pop, "semimonthly", None)
+        self.assertFalse(is_supported("semimonthly"))
+
+        register_period(
+            "semimonthly",
+            lambda day: day.replace(day=15) if day.day <= 15 else get_month_end(day),
+            "Halbmonatszusammenfassung",
+        )
+        self.assertTrue(is_supported("semimonthly"))
+        aggregation = AggregationEngine("semimonthly")
+        aggregation.update(self.records[:3])
+        self.assertEqual(
+            [
+                StatementRecord(date(2020, 1, 31), 0.1, "EUR", "Zinsen", "Halbmonatszusammenfassung"),
+                StatementRecord(date(2020, 1, 31), -0.05, "EUR", "Gebühren", "Halbmonatszusammenfassung"),
+                StatementRecord(date(2020, 2, 15), 0.2, "EUR", "Zinsen", "Halbmonatszusammenfassung"),
+            ],
+            list(aggregation.iter_records()),
+        )
+        with self.assertRaises(ValueError):
+            register_period("transaction", get_month_end, "Transaktion")
+
+    def test_merge(self):
+        """test merging partial aggregations equals aggregating all records at once"""
+        for aggregate in PERIOD_FUNCTIONS:
+            with self.subTest(aggregate=aggregate):
+                expected_aggregation = AggregationEngine(aggregate)
+                expected_aggregation.update(self.records)
+
+                aggregation = AggregationEngine(aggregate)
+                for start, end in [(0, 2), (2, 3), (3, 5)]:
+                    partial_aggregation = AggregationEngine(aggregate)
+                    partial_aggregation.update(self.records[start:end])
+                    aggregation.merge(partial_aggregation)
+                self.assertEqual(list(expected_aggregation.iter_records()), list(aggregation.iter_records()))
+
+        with self.assertRaises(ValueError):
+            AggregationEngine("daily").merge(AggregationEngine("monthly"))
+
+    def test_pop_latest_period(self):
+        """test removing the latest period keeps the exact sums"""
+        aggregation = AggregationEngine("monthly")
+        aggregation.update(self.records)
+        self.assertEqual(
+            [StatementRecord(date(2020, 2, 29), Decimal("0.2"), "EUR", "Zinsen", "Monatszusammenfassung")],
+            aggregation.pop_latest_period(),
+        )
+        self.assertEqual(3, len(aggregation))
+        aggregation.add(StatementRecord(date(2020, 3, 2), 1.0, "EUR", "Einlage", ""))
+        self.assertEqual(date(2020, 3, 31), list(aggregation.iter_records())[-1].date)
+        self.assertEqual([], AggregationEngine("daily").pop_latest_period())
+
+
+if __name__ == "__main__":
+    unittest.main()
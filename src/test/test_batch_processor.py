@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the batch processor module
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import codecs
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from src.aggregation import AggregationEngine
+from src.batch_processor import BatchProcessor
+from src.batch_processor import expand_input_files
+from src.batch_processor import get_currency_output_file
+from src.batch_processor import get_output_file
+from src.cache import CACHE_DIR_ENV
+from src.p2p_statement_parser import PeerToPeerPlatformParser
+
+
+class TestBatchProcessor(unittest.TestCase):
+    """Test case implementation for BatchProcessor"""
+
+    def setUp(self):
+        """test case setUp, run for each test case"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.config_file = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "config", "mintos.yml")
+        self.infiles = []
+        for file_name in ["mintos.csv", "mintos_several_months.csv"]:
+            shutil.copy(os.path.join(os.path.dirname(__file__), "testdata", file_name), self.tmpdir)
+            self.infiles.append(os.path.join(self.tmpdir, file_name))
+
+    def tearDown(self):
+        """test case tearDown, run after each test case"""
+        shutil.rmtree(self.tmpdir)
+
+    def __read_output(self, outfile):
+        with codecs.open(outfile, "r", encoding="utf-8") as testfile:
+            return testfile.read().splitlines()
+
+    def test_expand_input_files(self):
+        """test expanding glob patterns skips duplicates and previous output files"""
+        open(get_output_file(self.infiles[0], "mintos"), "w").close()
+        missing_file = os.path.join(self.tmpdir, "missing.csv")
+        self.assertEqual(
+            self.infiles + [missing_file],
+            expand_input_files([os.path.join(self.tmpdir, "*.csv"), self.infiles[1], missing_file]),
+        )
+
+    def test_convert_merged(self):
+        """test converting several files into one output file aggregates the statements of all files together"""
+        for aggregate in ["daily", "monthly"]:
+            aggregation = AggregationEngine(aggregate)
+            for infile in self.infiles:
+                aggregation.update(PeerToPeerPlatformParser(self.config_file, infile).iter_account_statement())
+            expected_count = len(aggregation)
+
+            for jobs in [1, 2]:
+                with self.subTest(aggregate=aggregate, jobs=jobs):
+                    processor = BatchProcessor(self.config_file, "mintos", aggregate=aggregate, jobs=jobs)
+                    self.assertEqual(expected_count, processor.convert_merged(self.infiles))
+                    rows = list(csv.reader(self.__read_output(get_output_file(self.infiles[0], "mintos"))))[1:]
+                    self.assertEqual(expected_count, len(rows))
+                    self.assertEqual(expected_count, len({(row[0], row[2], row[3]) for row in rows}))
+
+    def test_convert_deduplicated(self):
+        """test converting overlapping files into one output file without duplicates"""
+        processor = BatchProcessor(self.config_file, "mintos", aggregate="monthly")
+        outfile = os.path.join(self.tmpdir, "dedup.csv")
+        processor.convert_deduplicated([self.infiles[1], self.infiles[1]], outfile)
+        processor.convert_merged([self.infiles[1]], os.path.join(self.tmpdir, "merged.csv"))
+        self.assertEqual(
+            sorted(self.__read_output(os.path.join(self.tmpdir, "merged.csv"))),
+            sorted(self.__read_output(outfile)),
+        )
+
+    def test_convert_deduplicated_options(self):
+        """test removing duplicates rejects options it cannot apply"""
+        for options in [{"engine": "vectorized"}, {"jobs": 2}]:
+            with self.subTest(**options):
+                with self.assertRaises(ValueError):
+                    BatchProcessor(self.config_file, "mintos", **options).convert_deduplicated(self.infiles)
+
+    def test_convert_each(self):
+        """test converting every file into its own output file"""
+        processor = BatchProcessor(self.config_file, "mintos", jobs=2)
+        self.assertEqual({self.infiles[0]: 11, self.infiles[1]: 9}, processor.convert_each(self.infiles))
+        for infile in self.infiles:
+            serial_processor = BatchProcessor(self.config_file, "mintos")
+            serial_processor.convert_merged([infile], os.path.join(self.tmpdir, "serial.csv"))
+            self.assertEqual(
+                self.__read_output(os.path.join(self.tmpdir, "serial.csv")),
+                self.__read_output(get_output_file(infile, "mintos", per_input=True)),
+            )
+
+    def test_get_currency_output_file(self):
+        """test the currency is added in front of the file name suffixes"""
+        self.assertEqual(
+            os.path.join("statements", "portfolio_performance__mintos__PLN.csv.gz"),
+            get_currency_output_file(os.path.join("statements", "portfolio_performance__mintos.csv.gz"), "PLN"),
+        )
+
+    def test_split_currency(self):
+        """test writing one output file per currency holds the same entries as the output for all currencies"""
+        shutil.copy(os.path.join(os.path.dirname(__file__), "testdata", "mintos_multi_currency.csv"), self.tmpdir)
+        infile = os.path.join(self.tmpdir, "mintos_multi_currency.csv")
+        merged_outfile = os.path.join(self.tmpdir, "merged.csv")
+        BatchProcessor(self.config_file, "mintos", aggregate="daily").convert_merged([infile], merged_outfile)
+        header, *merged_rows = self.__read_output(merged_outfile)
+
+        processor = BatchProcessor(self.config_file, "mintos", aggregate="daily", split_currency=True)
+        self.assertEqual(8, processor.convert([infile]))
+        outfile = get_output_file(infile, "mintos")
+        self.assertFalse(os.path.exists(outfile))
+        for currency, row_count in [("EUR", 3), ("KZT", 2), ("PLN", 3)]:
+            expected_rows = [header] + [row for row in merged_rows if next(csv.reader([row]))[2] == currency]
+            self.assertEqual(row_count + 1, len(expected_rows))
+            self.assertEqual(expected_rows, self.__read_output(get_currency_output_file(outfile, currency)))
+
+        processor.convert_each([infile])
+        self.assertEqual(
+            self.__read_output(get_currency_output_file(outfile, "PLN")),
+            self.__read_output(get_currency_output_file(get_output_file(infile, "mintos", per_input=True), "PLN")),
+        )
+
+    def test_keep_output_without_entries(self):
+        """test a run without entries to write leaves the output file of the previous run unchanged"""
+        infile = self.infiles[1]
+        outfile = get_output_file(infile, "mintos")
+        with mock.patch.dict(os.environ, {CACHE_DIR_ENV: self.tmpdir}):
+            processor = BatchProcessor(self.config_file, "mintos", incremental=True)
+            self.assertLess(0, processor.convert([infile]))
+            expected_rows = self.__read_output(outfile)
+            self.assertEqual(0, processor.convert([infile]))
+            self.assertEqual(expected_rows, self.__read_output(outfile))
+
+    def test_keep_other_currency_output(self):
+        """test splitting by currency leaves the files of currencies without entries unchanged"""
+        infile = self.infiles[1]
+        outfile = get_output_file(infile, "mintos")
+        other_outfiles = [
+            get_currency_output_file(outfile, "PLN"),
+            get_output_file(os.path.join(self.tmpdir, "ABC.csv"), "mintos", per_input=True),
+        ]
+        for other_outfile in other_outfiles:
+            with open(other_outfile, "w") as output:
+                output.write("previous run")
+
+        BatchProcessor(self.config_file, "mintos", split_currency=True).convert([infile])
+        self.assertTrue(os.path.exists(get_currency_output_file(outfile, "EUR")))
+        for other_outfile in other_outfiles:
+            with open(other_outfile) as output:
+                self.assertEqual("previous run", output.read())
+
+    def test_sort(self):
+        """test the entries of all input files are written in date order"""
+        merged_outfile = os.path.join(self.tmpdir, "merged.csv")
+        BatchProcessor(self.config_file, "mintos").convert_merged(self.infiles[::-1], merged_outfile)
+        header, *merged_rows = self.__read_output(merged_outfile)
+
+        for sort_buffer_size in [1000, 4]:
+            processor = BatchProcessor(self.config_file, "mintos", sort=True, sort_buffer_size=sort_buffer_size)
+            sorted_outfile = os.path.join(self.tmpdir, "sorted.csv")
+            self.assertEqual(len(merged_rows), processor.convert_merged(self.infiles[::-1], sorted_outfile))
+            self.assertEqual(
+                [header] + sorted(merged_rows, key=lambda row: row.split(",")[0]),
+                self.__read_output(sorted_outfile),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
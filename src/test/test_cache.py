@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the persistent JSON cache
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src.cache import CACHE_DIR_ENV
+from src.cache import JsonCache
+
+
+class TestJsonCache(unittest.TestCase):
+    """Test case implementation for JsonCache"""
+
+    def setUp(self):
+        """test case setUp, run for each test case"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.environment = mock.patch.dict(os.environ, {CACHE_DIR_ENV: self.tmpdir.name})
+        self.environment.start()
+
+    def tearDown(self):
+        """test case tearDown, run after each test case"""
+        self.environment.stop()
+        self.tmpdir.cleanup()
+
+    def test_cache_is_persisted(self):
+        """test cached values are available to a new cache instance"""
+        cache = JsonCache("test")
+        self.assertIsNone(cache.get("key"))
+        cache.set("key", {"delimiter": ";"})
+        self.assertEqual({"delimiter": ";"}, JsonCache("test").get("key"))
+        self.assertEqual(os.path.join(self.tmpdir.name, "test.json"), cache.cache_file)
+
+    def test_reset(self):
+        """test a reset cache is read again from the current cache directory"""
+        cache = JsonCache("test")
+        cache.set("key", "value")
+        with tempfile.TemporaryDirectory() as cache_dir, mock.patch.dict(os.environ, {CACHE_DIR_ENV: cache_dir}):
+            self.assertEqual("value", cache.get("key"))
+            cache.reset()
+            self.assertIsNone(cache.get("key"))
+            self.assertEqual(os.path.join(cache_dir, "test.json"), cache.cache_file)
+
+    def test_unreadable_cache(self):
+        """test an unreadable cache file is treated as empty cache"""
+        with open(os.path.join(self.tmpdir.name, "test.json"), "w") as cache_file:
+            cache_file.write("{no json")
+        cache = JsonCache("test")
+        self.assertEqual("default", cache.get("key", "default"))
+        cache.set("key", "value")
+        self.assertEqual("value", JsonCache("test").get("key"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the chunked account statement parser
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.chunked_parser import ChunkedPlatformParser
+from src.chunked_parser import find_chunks
+from src.p2p_statement_parser import PeerToPeerPlatformParser
+
+
+class TestChunkedPlatformParser(unittest.TestCase):
+    """Test case implementation for ChunkedPlatformParser"""
+
+    def setUp(self):
+        """test case setUp, run for each test case"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.config_file = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "config", "mintos.yml")
+        self.account_statement_file = os.path.join(self.tmpdir, "mintos.csv")
+        with open(os.path.join(os.path.dirname(__file__), "testdata", "mintos.csv"), "rb") as testfile:
+            header = testfile.readline()
+            statements = testfile.read()
+        with open(self.account_statement_file, "wb") as statement_file:
+            statement_file.write(header + statements * 20)
+
+    def tearDown(self):
+        """test case tearDown, run after each test case"""
+        shutil.rmtree(self.tmpdir)
+
+    def test_find_chunks(self):
+        """test chunks are aligned to line boundaries and cover the complete file"""
+        header_end, chunks = find_chunks(self.account_statement_file, 4, min_chunk_size=1)
+        self.assertEqual(4, len(chunks))
+        self.assertEqual(header_end, chunks[0][0])
+        self.assertEqual(os.path.getsize(self.account_statement_file), chunks[-1][1])
+        with open(self.account_statement_file, "rb") as statement_file:
+            for start, _ in chunks:
+                statement_file.seek(start - 1)
+                self.assertEqual(b"\n", statement_file.read(1))
+        for (_, end), (start, _) in zip(chunks, chunks[1:]):
+            self.assertEqual(end, start)
+
+    def test_chunked_parsing(self):
+        """test chunked parsing produces the same output as parsing the complete file"""
+        for aggregate in ["transaction", "daily", "monthly"]:
+            serial_parser = PeerToPeerPlatformParser(self.config_file, self.account_statement_file)
+            chunked_parser = ChunkedPlatformParser(
+                self.config_file, self.account_statement_file, jobs=3, min_chunk_size=1
+            )
+            self.assertEqual(
+                serial_parser.parse_account_statement(aggregate=aggregate),
+                chunked_parser.parse_account_statement(aggregate=aggregate),
+            )
+
+    def test_number_format_detected_once(self):
+        """test the number format is detected from the start of the file and not from the first rows of every chunk"""
+        config_file = os.path.join(self.tmpdir, "mintos.yml")
+        with open(self.config_file, "r", encoding="utf-8") as config, open(config_file, "w") as auto_config:
+            auto_config.write(config.read() + "\nnumber_format: auto\n")
+        header = '"Transaction ID:";Date;Details;Turnover;Balance;Currency\n'
+        statement = "{};2020-01-01 10:00:00;Interest income Loan ID: 1;{};0;EUR\n"
+        with open(self.account_statement_file, "w", encoding="utf-8") as statement_file:
+            statement_file.write(header)
+            for index, value in enumerate(["1,000.5"] * 200 + ["2,500"] * 200):
+                statement_file.write(statement.format(index, value))
+
+        serial_parser = PeerToPeerPlatformParser(config_file, self.account_statement_file)
+        chunked_parser = ChunkedPlatformParser(config_file, self.account_statement_file, jobs=4, min_chunk_size=1)
+        self.assertEqual(
+            serial_parser.parse_account_statement(aggregate="daily"),
+            chunked_parser.parse_account_statement(aggregate="daily"),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for reading compressed account statements and writing compressed output files
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import bz2
+import gzip
+import lzma
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+from src.batch_processor import get_output_file
+from src.compression import is_compressed
+from src.compression import iter_text_streams
+from src.compression import open_output
+from src.compression import strip_compression_suffix
+from src.p2p_statement_parser import PeerToPeerPlatformParser
+
+
+class TestCompression(unittest.TestCase):
+    """Test case implementation for the compression helpers"""
+
+    def setUp(self):
+        """test case setUp, run for each test case"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.testdata_dir = os.path.join(os.path.dirname(__file__), "testdata")
+        self.config_file = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "config", "mintos.yml")
+
+    def __compress(self, file_name, open_function, suffix):
+        compressed_file = os.path.join(self.tmpdir.name, file_name + suffix)
+        with open(os.path.join(self.testdata_dir, file_name), "rb") as plain_file:
+            with open_function(compressed_file, "wb") as compressed:
+                shutil.copyfileobj(plain_file, compressed)
+        return compressed_file
+
+    def test_file_names(self):
+        """test detecting and removing the compression suffix"""
+        self.assertTrue(is_compressed("statement.csv.gz"))
+        self.assertTrue(is_compressed("statement.ZIP"))
+        self.assertFalse(is_compressed("statement.csv"))
+        self.assertEqual("statement.csv", strip_compression_suffix("statement.csv.xz"))
+        self.assertEqual("statement.csv", strip_compression_suffix("statement.csv"))
+        self.assertEqual(
+            os.path.join("statements", "portfolio_performance__mintos__statement.csv.gz"),
+            get_output_file(os.path.join("statements", "statement.csv.bz2"), "mintos", per_input=True, compress=True),
+        )
+
+    def test_compressed_statement(self):
+        """test compressed account statements are parsed like the uncompressed file"""
+        expected_statement = PeerToPeerPlatformParser(
+            self.config_file, os.path.join(self.testdata_dir, "mintos.csv")
+        ).parse_account_statement("daily")
+        for open_function, suffix in [(gzip.open, ".gz"), (lzma.open, ".xz"), (bz2.open, ".bz2")]:
+            with self.subTest(suffix=suffix):
+                compressed_file = self.__compress("mintos.csv", open_function, suffix)
+                platform_parser = PeerToPeerPlatformParser(self.config_file, compressed_file)
+                self.assertEqual(expected_statement, platform_parser.parse_account_statement("daily"))
+
+    def test_zip_archive(self):
+        """test all CSV files of a zip archive are read"""
+        archive_file = os.path.join(self.tmpdir.name, "statements.zip")
+        with zipfile.ZipFile(archive_file, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.write(os.path.join(self.testdata_dir, "mintos.csv"), "2020/mintos.csv")
+            archive.write(os.path.join(self.testdata_dir, "mintos_several_months.csv"), "2021/mintos.csv")
+            archive.writestr("readme.txt", "not a statement")
+            archive.writestr("__MACOSX/2020/._mintos.csv", "resource fork")
+
+        headers = [text_stream.readline() for text_stream in iter_text_streams(archive_file, "utf-8-sig")]
+        self.assertEqual(2, len(headers))
+
+        expected_statement = []
+        for file_name in ["mintos.csv", "mintos_several_months.csv"]:
+            expected_statement += PeerToPeerPlatformParser(
+                self.config_file, os.path.join(self.testdata_dir, file_name)
+            ).parse_account_statement()
+        statement = PeerToPeerPlatformParser(self.config_file, archive_file).parse_account_statement()
+        self.assertEqual(expected_statement, statement)
+
+    def test_compressed_output(self):
+        """test output files ending with .gz are compressed"""
+        outfile = os.path.join(self.tmpdir.name, "portfolio_performance__mintos.csv.gz")
+        with open_output(outfile) as output:
+            output.write("Datum,Wert\r\n")
+        with gzip.open(outfile, "rt", encoding="utf-8", newline="") as output:
+            self.assertEqual("Datum,Wert\r\n", output.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
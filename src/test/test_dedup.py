@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the deduplicating merge of account statement files
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import os
+import tempfile
+import unittest
+from operator import itemgetter
+
+from src.dedup import CompactHashSet
+from src.dedup import get_booking_key
+from src.dedup import iter_deduplicated_statements
+from src.dedup import sort_unique_statements
+from src.p2p_statement_parser import PeerToPeerPlatformParser
+from src.portfolio_writer import PP_FIELDNAMES
+
+
+class TestCompactHashSet(unittest.TestCase):
+    """Test case implementation for CompactHashSet"""
+
+    def test_add_and_contains(self):
+        """test keys are found after adding them, also after the table has been resized"""
+        keys = [get_booking_key([str(number)]) for number in range(5000)]
+        hash_set = CompactHashSet(capacity=16)
+        hash_set.update(keys[:2500])
+        hash_set.update(keys[:10])
+        self.assertEqual(2500, len(hash_set))
+        for key in keys[:2500]:
+            self.assertIn(key, hash_set)
+        for key in keys[2500:]:
+            self.assertNotIn(key, hash_set)
+
+    def test_booking_key(self):
+        """test the complete row is used if there is no booking id"""
+        self.assertEqual(get_booking_key(["1", "a"], 0), get_booking_key(["1", "b"], 0))
+        self.assertNotEqual(get_booking_key(["1", "a"]), get_booking_key(["1", "b"]))
+        self.assertNotEqual(get_booking_key(["", "a"], 0), get_booking_key(["", "b"], 0))
+        self.assertEqual(get_booking_key(["1", None]), get_booking_key(["1", ""]))
+
+
+class TestDeduplicatedStatements(unittest.TestCase):
+    """Test case implementation for iter_deduplicated_statements"""
+
+    def setUp(self):
+        """test case setUp, run for each test case"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """test case tearDown, run after each test case"""
+        self.tmpdir.cleanup()
+
+    def __write_statements(self, name, header, statements):
+        account_statement_file = os.path.join(self.tmpdir.name, name)
+        with open(account_statement_file, "wb") as statement_file:
+            statement_file.write(header + b"".join(statements))
+        return account_statement_file
+
+    def __split_testdata(self, platform, testdata):
+        config_file = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "config", f"{platform}.yml")
+        with open(os.path.join(os.path.dirname(__file__), "testdata", testdata), "rb") as testfile:
+            header = testfile.readline()
+            statements = testfile.read().splitlines(keepends=True)
+        complete_file = self.__write_statements("complete.csv", header, statements)
+        first_file = self.__write_statements("first.csv", header, statements[: len(statements) * 2 // 3])
+        second_file = self.__write_statements("second.csv", header, statements[len(statements) // 3 :])
+        return config_file, complete_file, [first_file, second_file]
+
+    def test_overlapping_files(self):
+        """test statements contained in several files are only written once, in date order"""
+        config_file, complete_file, infiles = self.__split_testdata("mintos", "mintos_several_months.csv")
+
+        expected_statement = sorted(
+            PeerToPeerPlatformParser(config_file, complete_file).parse_account_statement(),
+            key=itemgetter(PP_FIELDNAMES[0]),
+        )
+        for sort_buffer_size in [1000, 2]:
+            with self.subTest(sort_buffer_size=sort_buffer_size):
+                self.assertEqual(
+                    expected_statement,
+                    [
+                        record.as_dict()
+                        for record in iter_deduplicated_statements(
+                            config_file, infiles, sort_buffer_size=sort_buffer_size
+                        )
+                    ],
+                )
+
+        for aggregate in ["daily", "monthly"]:
+            with self.subTest(aggregate=aggregate):
+                expected_statement = PeerToPeerPlatformParser(config_file, complete_file).parse_account_statement(
+                    aggregate=aggregate
+                )
+                deduplicated_statement = [
+                    record.as_dict() for record in iter_deduplicated_statements(config_file, infiles, aggregate)
+                ]
+                self.assertCountEqual(expected_statement, deduplicated_statement)
+
+    def test_sort_unique_statements(self):
+        """test every file is sorted on its own, without the statements of the previous files"""
+        config_file, complete_file, infiles = self.__split_testdata("mintos", "mintos_several_months.csv")
+        expected_count = len(PeerToPeerPlatformParser(config_file, complete_file).parse_account_statement())
+        for sort_buffer_size in [1000, 2]:
+            with self.subTest(sort_buffer_size=sort_buffer_size):
+                sorted_files = [
+                    list(sorted_statements)
+                    for sorted_statements in sort_unique_statements(config_file, infiles, sort_buffer_size)
+                ]
+                self.assertEqual(2, len(sorted_files))
+                self.assertEqual(
+                    len(PeerToPeerPlatformParser(config_file, infiles[0]).parse_account_statement()),
+                    len(sorted_files[0]),
+                )
+                self.assertEqual(expected_count, sum(map(len, sorted_files)))
+                for sorted_statements in sorted_files:
+                    dates = [record.date for record in sorted_statements]
+                    self.assertEqual(sorted(dates), dates)
+
+        reversed_statement = [record.as_dict() for record in iter_deduplicated_statements(config_file, infiles[::-1])]
+        self.assertEqual(expected_count, len(reversed_statement))
+        dates = [entry[PP_FIELDNAMES[0]] for entry in reversed_statement]
+        self.assertEqual(sorted(dates), dates)
+
+    def test_platform_without_unique_booking_id(self):
+        """test complete rows are compared for platforms without unique booking ids"""
+        config_file, complete_file, infiles = self.__split_testdata("swaper", "swaper.csv")
+        expected_statement = PeerToPeerPlatformParser(config_file, complete_file).parse_account_statement()
+        deduplicated_statement = [record.as_dict() for record in iter_deduplicated_statements(config_file, infiles)]
+        self.assertCountEqual(expected_statement, deduplicated_statement)
+
+
+if __name__ == "__main__":
+    unittest.main()
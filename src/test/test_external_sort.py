@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for sorting statement records with bounded memory
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import os
+import random
+import tempfile
+import unittest
+from datetime import date
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from src import external_sort
+from src.external_sort import iter_sorted
+from src.statement import StatementRecord
+
+
+class TestExternalSort(unittest.TestCase):
+    """Test case implementation for iter_sorted"""
+
+    def setUp(self):
+        """test case setUp, run for each test case"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        generator = random.Random(42)
+        self.records = [
+            StatementRecord(
+                date(2020, 1, 1) + timedelta(days=generator.randrange(60)),
+                generator.choice([0.1, -2.5, Decimal("0.3")]),
+                generator.choice(["EUR", "PLN"]),
+                "Zinsen",
+                f"entry {index}",
+            )
+            for index in range(1000)
+        ]
+        self.expected_notes = [record.note for record in sorted(self.records, key=lambda record: record.date)]
+
+    def __sort(self, buffer_size):
+        return [
+            (record.date, record.value, record.currency, record.category, record.note)
+            for record in iter_sorted(iter(self.records), buffer_size, self.tmpdir.name)
+        ]
+
+    def test_in_memory(self):
+        """test small inputs are sorted stable by date"""
+        self.assertEqual(self.expected_notes, [record[4] for record in self.__sort(len(self.records) + 1)])
+        self.assertEqual([], list(iter_sorted([])))
+
+    def test_spill_to_disk(self):
+        """test inputs larger than the buffer are sorted via temporary files like in memory"""
+        expected_records = self.__sort(len(self.records) + 1)
+        for buffer_size in [len(self.records), 333, 7, 1]:
+            with self.subTest(buffer_size=buffer_size):
+                self.assertEqual(expected_records, self.__sort(buffer_size))
+                self.assertEqual([], os.listdir(self.tmpdir.name))
+
+    def test_merge_passes(self):
+        """test more runs than can be merged at once are merged in several passes"""
+        expected_records = self.__sort(len(self.records) + 1)
+        with mock.patch.object(external_sort, "MAX_MERGE_RUNS", 4):
+            self.assertEqual(expected_records, self.__sort(10))
+        self.assertEqual([], os.listdir(self.tmpdir.name))
+
+    def test_get_batch_size(self):
+        """test one batch of every merged run fits into the buffer"""
+        self.assertEqual(1, external_sort.get_batch_size(1))
+        self.assertEqual(78, external_sort.get_batch_size(5000))
+        self.assertEqual(external_sort.SPILL_BATCH_SIZE, external_sort.get_batch_size(10**9))
+
+    def test_invalid_buffer_size(self):
+        """test a buffer without room for an entry is rejected"""
+        with self.assertRaises(ValueError):
+            list(iter_sorted(self.records, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the incremental account statement parser
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src.cache import CACHE_DIR_ENV
+from src.incremental_parser import get_checkpoint_cache
+from src.incremental_parser import IncrementalPlatformParser
+from src.incremental_parser import load_records
+from src.p2p_statement_parser import PeerToPeerPlatformParser
+
+
+class TestIncrementalPlatformParser(unittest.TestCase):
+    """Test case implementation for IncrementalPlatformParser"""
+
+    def setUp(self):
+        """test case setUp, run for each test case"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.environment = mock.patch.dict(os.environ, {CACHE_DIR_ENV: self.tmpdir.name})
+        self.environment.start()
+
+        self.config_file = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "config", "mintos.yml")
+        self.account_statement_file = os.path.join(self.tmpdir.name, "mintos.csv")
+        with open(os.path.join(os.path.dirname(__file__), "testdata", "mintos_several_months.csv"), "rb") as testfile:
+            self.header = testfile.readline()
+            self.statements = sorted(testfile.read().splitlines(keepends=True), key=lambda line: line.split(b";")[1])
+
+    def tearDown(self):
+        """test case tearDown, run after each test case"""
+        self.environment.stop()
+        self.tmpdir.cleanup()
+
+    def __write_statements(self, statements):
+        with open(self.account_statement_file, "wb") as statement_file:
+            statement_file.write(self.header + b"".join(statements))
+
+    def __parse_incremental(self, aggregate):
+        incremental_parser = IncrementalPlatformParser(self.config_file, self.account_statement_file)
+        return incremental_parser.parse_account_statement(aggregate=aggregate), incremental_parser.checkpoint
+
+    def test_incremental_parsing(self):
+        """test the output of several incremental runs equals the output of parsing the complete file once"""
+        for aggregate in ["transaction", "daily", "monthly"]:
+            with self.subTest(aggregate=aggregate):
+                self.__write_statements(self.statements)
+                expected_statement = PeerToPeerPlatformParser(
+                    self.config_file, self.account_statement_file
+                ).parse_account_statement(aggregate=aggregate)
+
+                incremental_statement = []
+                for end in [7, 7, 15, len(self.statements)]:
+                    self.__write_statements(self.statements[:end])
+                    statement, checkpoint = self.__parse_incremental(aggregate)
+                    incremental_statement += statement
+                    self.assertEqual(os.path.getsize(self.account_statement_file), checkpoint["offset"])
+
+                for record in load_records(checkpoint["open_records"]):
+                    record.value = float(record.value)
+                    incremental_statement.append(record.as_dict())
+                self.assertEqual(expected_statement, incremental_statement)
+                os.remove(self.account_statement_file)
+
+    def test_newest_first(self):
+        """test only the new statements are converted if they are added in front of the statements converted before"""
+        for aggregate in ["transaction", "monthly"]:
+            with self.subTest(aggregate=aggregate):
+                self.__write_statements(self.statements[::-1])
+                expected_statement = PeerToPeerPlatformParser(
+                    self.config_file, self.account_statement_file
+                ).parse_account_statement(aggregate=aggregate)
+
+                incremental_statement = []
+                for end in [7, 7, 12, len(self.statements)]:
+                    self.__write_statements(self.statements[:end][::-1])
+                    statement, checkpoint = self.__parse_incremental(aggregate)
+                    incremental_statement += statement
+
+                for record in load_records(checkpoint["open_records"]):
+                    record.value = float(record.value)
+                    incremental_statement.append(record.as_dict())
+                self.assertEqual(
+                    sorted(map(sorted, map(dict.items, expected_statement))),
+                    sorted(map(sorted, map(dict.items, incremental_statement))),
+                )
+                os.remove(get_checkpoint_cache(self.config_file, self.account_statement_file, aggregate).cache_file)
+
+    def test_changed_file(self):
+        """test a file without the statements converted before is rejected instead of being converted again"""
+        self.__write_statements(self.statements)
+        expected_statement, _ = self.__parse_incremental("transaction")
+        self.assertTrue(expected_statement)
+        self.assertEqual([], self.__parse_incremental("transaction")[0])
+
+        self.__write_statements(reversed(self.statements))
+        with self.assertRaises(ValueError):
+            self.__parse_incremental("transaction")
+
+        self.__write_statements(self.statements[1:])
+        with self.assertRaises(ValueError):
+            self.__parse_incremental("transaction")
+
+
+if __name__ == "__main__":
+    unittest.main()
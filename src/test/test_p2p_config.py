@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the platform configuration
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from yaml import safe_load
+
+from src import p2p_config
+from src.cache import JsonCache
+from src.p2p_config import Config
+from src.p2p_config import ConfigRegistry
+from src.p2p_config import parse_value
+from src.p2p_config import read_config_file
+
+
+class TestConfig(unittest.TestCase):
+    """Test case implementation for Config"""
+
+    def setUp(self):
+        """test case setUp, run for each test case"""
+        config_file = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "config", "mintos.yml")
+        with open(config_file, "r", encoding="utf-8") as ymlconfig:
+            self.config_data = safe_load(ymlconfig)
+        self.config = Config(self.config_data)
+
+    def test_classify_booking_type(self):
+        """test classify_booking_type keeps the priority order of the type regexes"""
+        test_data = [
+            ("Incoming client payment", "Einlage"),
+            ("Interest income Loan ID: 2049443-01", "Zinsen"),
+            ("Late payment fee income Loan ID: 1529173-01", "Zinsen"),
+            ("Withdraw application", "Entnahme"),
+            ("FX commission", "Gebühren"),
+            ("Loan 28375000-01 - discount/premium for secondary market transaction 1.", "Undecided"),
+            ("Principal received Loan ID: 3402100-01", "Ignored"),
+            ("Loan 35287609-01 - interest received", "Zinsen"),
+            ("Something completely different", ""),
+        ]
+        for booking_type, expected_category in test_data:
+            self.assertEqual(expected_category, self.config.classify_booking_type(booking_type))
+
+    def test_classify_booking_type_not_combinable(self):
+        """test classify_booking_type falls back to matching regexes one by one"""
+        self.config_data["type_regex"]["fee"] = "(?i)^fx commission.*"
+        config = Config(self.config_data)
+        self.assertEqual("Gebühren", config.classify_booking_type("FX COMMISSION"))
+        self.assertEqual("Einlage", config.classify_booking_type("Incoming client payment"))
+
+    def test_create_date_parser(self):
+        """test the date parser returns the same dates as datetime.strptime"""
+        test_data = [
+            ("%Y-%m-%d %H:%M:%S", "2018-01-17 11:26:03"),
+            ("%d.%m.%Y %H:%M", "01.01.2019 00:01"),
+            ("%d.%m.%Y", "1.1.2019"),
+            ("%m/%d/%Y", "12/13/2020"),
+            ("%d %b %Y", "13 Dec 2020"),
+        ]
+        for date_format, date_string in test_data:
+            self.assertEqual(
+                datetime.strptime(date_string, date_format).date(),
+                Config.create_date_parser(date_format)(date_string),
+            )
+
+    def test_create_date_parser_invalid_date(self):
+        """test the date parser rejects invalid dates like datetime.strptime"""
+        date_parser = Config.create_date_parser("%Y-%m-%d %H:%M:%S")
+        for date_string in ["2018-02-30 11:26:03", "2018-01-17 24:26:03", "2018-01-17T11:26:03", "2018-01-17"]:
+            with self.assertRaises(ValueError):
+                date_parser(date_string)
+
+    def test_create_value_parser(self):
+        """test parsing values of a declared number format"""
+        value_parser = Config.create_value_parser(",", ".")
+        self.assertEqual(1000.3, value_parser("1.000,30"))
+        self.assertEqual(1.2, value_parser("1,2€"))
+        self.assertIsNone(value_parser(""))
+        with self.assertRaises(ValueError):
+            Config.create_value_parser(",", ",")
+
+    def test_declared_number_format(self):
+        """test the number format declared in the configuration is used for parsing values"""
+        self.config_data["number_format"] = {"decimal": ".", "grouping": ","}
+        config = Config(self.config_data)
+        self.assertEqual({"decimal": ".", "grouping": ","}, config.get_number_format())
+        self.assertEqual(1000.0, config.parse_booking_value("1,000"))
+
+    def test_detect_number_format(self):
+        """test detecting the number format from a sample of values"""
+        test_data = [
+            (["20", "0,5", "1.000,30"], {"decimal": ",", "grouping": "."}),
+            (["20", "0.5", "1,000.30"], {"decimal": ".", "grouping": ","}),
+            (["20", "0,5", "", "-0,14"], {"decimal": ",", "grouping": None}),
+            (["20", "0,5", "0.5"], None),
+            (["20"], None),
+        ]
+        for sample, expected_number_format in test_data:
+            self.config_data["number_format"] = "auto"
+            config = Config(self.config_data)
+            self.assertTrue(config.needs_number_format_detection())
+            self.assertEqual(expected_number_format, config.detect_number_format(sample))
+            self.assertTrue(config.needs_number_format_detection())
+
+            detected_config = config.with_number_format(expected_number_format)
+            self.assertFalse(detected_config.needs_number_format_detection())
+            self.assertEqual(expected_number_format, detected_config.get_number_format())
+            self.assertEqual(parse_value(sample[-1]), detected_config.parse_booking_value(sample[-1]))
+
+    def test_immutable(self):
+        """test the configuration can not be modified"""
+        with self.assertRaises(AttributeError):
+            self.config.parse_booking_value = float
+        with self.assertRaises(AttributeError):
+            del self.config.parse_booking_value
+
+    def test_get_column_layout(self):
+        """test resolving the configured columns to their indexes in the header"""
+        columns = self.config.get_column_layout(["Transaction ID:", "Date", "Details", "Turnover", "Currency", "Date"])
+        self.assertEqual(5, columns.booking_date)
+        self.assertEqual(2, columns.booking_details)
+        self.assertEqual(0, columns.booking_id)
+        self.assertEqual(2, columns.booking_type)
+        self.assertEqual(3, columns.booking_value)
+        self.assertEqual(4, columns.booking_currency)
+
+        self.assertEqual("Date", self.config.get_column_layout().booking_date)
+        with self.assertRaises(KeyError):
+            self.config.get_column_layout(["Transaction ID:", "Date", "Details", "Turnover"])
+
+
+class TestReadConfigFile(unittest.TestCase):
+    """Test case implementation for read_config_file"""
+
+    def setUp(self):
+        """test case setUp, run for each test case"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.config_file = os.path.join(self.tmpdir, "platform.yml")
+        shutil.copy(
+            os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "config", "mintos.yml"), self.config_file
+        )
+        cache = JsonCache("configs")
+        cache._cache_file = os.path.join(self.tmpdir, "configs.json")
+        patcher = mock.patch.object(p2p_config, "config_cache", cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cached_settings(self):
+        """test the YAML file is only parsed again after it changed"""
+        settings = read_config_file(self.config_file)
+        self.assertEqual("Date", settings["csv_fieldnames"]["booking_date"])
+        self.assertTrue(os.path.exists(os.path.join(self.tmpdir, "configs.json")))
+
+        with mock.patch("yaml.safe_load") as safe_load_mock:
+            self.assertEqual(settings, read_config_file(self.config_file))
+            safe_load_mock.assert_not_called()
+
+        with open(self.config_file, "a", encoding="utf-8") as ymlconfig:
+            ymlconfig.write("csv_delimiter: ';'\n")
+        self.assertEqual(";", read_config_file(self.config_file)["csv_delimiter"])
+
+
+class TestConfigRegistry(unittest.TestCase):
+    """Test case implementation for ConfigRegistry"""
+
+    def setUp(self):
+        """test case setUp, run for each test case"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        config_dir = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "config")
+        for platform in ["mintos", "bondora"]:
+            shutil.copy(os.path.join(config_dir, f"{platform}.yml"), self.tmpdir)
+        self.registry = ConfigRegistry(self.tmpdir)
+
+    def test_get(self):
+        """test configurations are loaded once and cached by platform name and path"""
+        config = self.registry.get("mintos")
+        self.assertEqual("mintos", config.get_name())
+        self.assertIs(config, self.registry.get("mintos"))
+        self.assertIs(config, self.registry.get(os.path.join(self.tmpdir, "mintos.yml")))
+        with self.assertRaises(OSError):
+            self.registry.get("unknown")
+
+    def test_reload_changed_file(self):
+        """test a configuration is loaded again after its file changed"""
+        config = self.registry.get("mintos")
+        with open(os.path.join(self.tmpdir, "mintos.yml"), "a", encoding="utf-8") as ymlconfig:
+            ymlconfig.write("number_format: auto\n")
+
+        changed_config = self.registry.get("mintos")
+        self.assertIsNot(config, changed_config)
+        self.assertTrue(changed_config.needs_number_format_detection())
+        self.assertIs(changed_config, self.registry.get("mintos"))
+
+    def test_load_all(self):
+        """test loading the configurations of all platforms"""
+        configs = self.registry.load_all()
+        self.assertEqual(["bondora", "mintos"], sorted(configs))
+        self.assertIs(configs["bondora"], self.registry.get("bondora"))
@@ -4,10 +4,18 @@ Unit test for the p2p account statement parser module
 
 Copyright 2018-05-01 ChrisRBe
 """
+import csv
 import datetime
+import json
 import os
+import types
 import unittest
+from unittest import mock
 
+from yaml import safe_load
+
+from src.p2p_config import Config
+from src.p2p_statement_parser import dialect_cache
 from src.p2p_statement_parser import PeerToPeerPlatformParser
 
 
@@ -718,6 +726,83 @@ class TestBaseParser(unittest.TestCase):
         ]
         self.assertEqual(expected_statement, self.base_parser.parse_account_statement())
 
+    def test_mintos_parsing_multi_currency_aggregation(self):
+        """test parse_account_statement sums the entries of every currency separately"""
+        self.base_parser.account_statement_file = os.path.join(
+            os.path.dirname(__file__), "testdata", "mintos_multi_currency.csv"
+        )
+        expected_values = [
+            ("EUR", "Einlage", 100.0),
+            ("KZT", "Einlage", 5000.0),
+            ("PLN", "Einlage", 200.0),
+            ("EUR", "Zinsen", 0.3),
+            ("KZT", "Zinsen", 20.0),
+            ("PLN", "Zinsen", 0.5),
+            ("EUR", "Gebühren", -0.5),
+        ]
+        self.assertEqual(
+            [
+                {
+                    "Buchungswährung": currency,
+                    "Datum": datetime.date(2021, 3, 31),
+                    "Notiz": "Monatszusammenfassung",
+                    "Typ": category,
+                    "Wert": value,
+                }
+                for currency, category, value in expected_values
+            ],
+            self.base_parser.parse_account_statement(aggregate="monthly"),
+        )
+
     def test_aggregation_not_supported(self):
         """test if unsopported aggregation is correctly handled"""
-        self.assertFalse(self.base_parser.parse_account_statement(aggregate="yearly"))
+        self.assertFalse(self.base_parser.parse_account_statement(aggregate="hourly"))
+
+    def test_iter_account_statement(self):
+        """test iter_account_statement yields the same entries as parse_account_statement"""
+        for aggregate in ["transaction", "daily", "monthly"]:
+            statement_iterator = self.base_parser.iter_account_statement(aggregate=aggregate)
+            self.assertIsInstance(statement_iterator, types.GeneratorType)
+            self.assertEqual(
+                self.base_parser.parse_account_statement(aggregate=aggregate),
+                [record.as_dict() for record in statement_iterator],
+            )
+
+    def test_sniffed_csv_dialect(self):
+        """test a sniffed or cached CSV dialect is only used if it splits the header into the configured columns"""
+        expected_statement = self.base_parser.parse_account_statement()
+
+        with open(self.config_file, "r", encoding="utf-8") as ymlconfig:
+            config = safe_load(ymlconfig)
+        del config["csv_dialect"]
+        sniffing_parser = PeerToPeerPlatformParser(infile=self.account_statement_file, config=Config(config, "mintos"))
+        with mock.patch("csv.Sniffer.sniff", return_value=csv.excel):
+            with self.assertRaises(KeyError):
+                sniffing_parser.parse_account_statement()
+        self.assertFalse(os.path.exists(dialect_cache.cache_file))
+
+        sniff = csv.Sniffer.sniff
+        with mock.patch("csv.Sniffer.sniff", autospec=True) as wrong_sniff:
+            wrong_sniff.side_effect = lambda sniffer, sample, delimiters=None: (
+                sniff(sniffer, sample, delimiters) if delimiters else csv.excel
+            )
+            self.assertEqual(expected_statement, sniffing_parser.parse_account_statement())
+        with open(dialect_cache.cache_file, "r", encoding="utf-8") as cache:
+            ((cache_key, dialect_parameters),) = json.load(cache).items()
+        self.assertEqual(";", dialect_parameters["delimiter"])
+
+        dialect_cache.set(cache_key, dict(dialect_parameters, delimiter=","))
+        self.assertEqual(expected_statement, sniffing_parser.parse_account_statement())
+        self.assertEqual(";", dialect_cache.get(cache_key)["delimiter"])
+
+    def test_declared_csv_dialect(self):
+        """test parsing with the CSV dialect declared in the configuration instead of sniffing it"""
+        expected_statement = self.base_parser.parse_account_statement()
+
+        with open(self.config_file, "r", encoding="utf-8") as ymlconfig:
+            config = safe_load(ymlconfig)
+        config["csv_dialect"] = {"delimiter": ";", "encoding": "utf-8-sig"}
+        declared_dialect_parser = PeerToPeerPlatformParser(infile=self.account_statement_file, config=Config(config))
+        with mock.patch("csv.Sniffer.sniff") as sniff:
+            self.assertEqual(expected_statement, declared_dialect_parser.parse_account_statement())
+            sniff.assert_not_called()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the platform detection from the header line
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import os
+import tempfile
+import unittest
+
+from src.platform_detection import HeaderSignatureIndex
+from src.platform_detection import read_header
+from src.platform_detection import read_rows
+from src.platform_detection import select_by_booking_types
+
+
+class TestPlatformDetection(unittest.TestCase):
+    """Test case implementation for HeaderSignatureIndex"""
+
+    def setUp(self):
+        """test case setUp, run for each test case"""
+        self.testdata_dir = os.path.join(os.path.dirname(__file__), "testdata")
+
+    def test_read_header(self):
+        """test reading the column names with byte order mark and quoted columns"""
+        self.assertEqual(
+            ["Transaction ID:", "Date", "Details", "Turnover", "Balance", "Currency"],
+            read_header(os.path.join(self.testdata_dir, "mintos.csv")),
+        )
+        self.assertEqual("Booking date", read_header(os.path.join(self.testdata_dir, "swaper.csv"))[0])
+
+    def test_detect(self):
+        """test detecting the platform of the test data files"""
+        signature_index = HeaderSignatureIndex.from_registry()
+        test_data = [
+            ("debitum.csv", ["debitumnetwork"]),
+            ("estateguru.csv", ["estateguru"]),
+            ("lande.csv", ["lande"]),
+            ("mintos.csv", ["mintos"]),
+            ("robocash.csv", ["robocash"]),
+            ("swaper.csv", ["swaper"]),
+            ("viainvest.csv", ["viainvest"]),
+            ("bondora.csv", ["bondora", "bondora_go_grow"]),
+        ]
+        for file_name, expected_platforms in test_data:
+            with self.subTest(file_name=file_name):
+                self.assertEqual(
+                    expected_platforms, signature_index.detect(os.path.join(self.testdata_dir, file_name))
+                )
+
+    def test_read_rows(self):
+        """test reading the first rows after the header line"""
+        fieldnames, rows = read_rows(os.path.join(self.testdata_dir, "bondora.csv"), 2)
+        self.assertEqual("TransferDate", fieldnames[0])
+        self.assertEqual(["TransferDeposit|DE1111000000111111", "TransferGoGrow"], [row[4] for row in rows])
+
+    def test_select_by_booking_types(self):
+        """test platforms with the same signature are told apart by the booking types they recognize"""
+        platforms = ["bondora", "bondora_go_grow"]
+        self.assertEqual(
+            ["bondora"], select_by_booking_types(os.path.join(self.testdata_dir, "bondora.csv"), platforms)
+        )
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            go_grow_file = os.path.join(tmpdirname, "go_grow.csv")
+            with open(go_grow_file, "w", encoding="utf-8") as statement_file:
+                statement_file.write("TransferDate;Currency;Amount;Description;LoanNumber\n")
+                statement_file.write("02.01.2019 00:02;EUR;-100;TransferGoGrow;\n")
+            self.assertEqual(platforms, select_by_booking_types(go_grow_file, platforms))
+        self.assertEqual(platforms, select_by_booking_types(os.path.join(self.testdata_dir, "mintos.csv"), platforms))
+
+    def test_match(self):
+        """test the most specific signature contained in the header wins"""
+        signature_index = HeaderSignatureIndex(
+            {
+                "generic": {"Date", "Amount"},
+                "specific": {"Date", "Amount", "Loan ID"},
+                "other": {"Date", "Amount", "Type"},
+            }
+        )
+        self.assertEqual(["generic"], signature_index.match(["Date", "Amount", "Balance"]))
+        self.assertEqual(["specific"], signature_index.match(["Loan ID", "Date", "Amount"]))
+        self.assertEqual(["other", "specific"], signature_index.match(["Loan ID", "Date", "Amount", "Type"]))
+        self.assertEqual([], signature_index.match(["Date", "Turnover"]))
+        self.assertEqual([], signature_index.match([]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,13 +5,18 @@ Unit test for the portfolio performance writer module
 Copyright 2018-04-29 ChrisRBe
 """
 import codecs
+import datetime
 import locale
 import os
 import tempfile
+from decimal import Decimal
 from unittest import TestCase
 
+from src.portfolio_writer import create_value_formatter
 from src.portfolio_writer import PortfolioPerformanceWriter
 from src.portfolio_writer import PP_FIELDNAMES
+from src.portfolio_writer import WRITE_BATCH_SIZE
+from src.statement import StatementRecord
 
 
 class TestPortfolioPerformanceWriter(TestCase):
@@ -81,3 +86,115 @@ class TestPortfolioPerformanceWriter(TestCase):
             self.pp_writer.write_pp_csv_file(fname)
             with codecs.open(fname, "r", encoding="utf-8") as testfile:
                 self.assertEqual(",".join(PP_FIELDNAMES), testfile.read().strip())
+
+    def test_streaming_output(self):
+        """test streaming the output directly into the file"""
+        test_entry = {
+            PP_FIELDNAMES[0]: "date",
+            PP_FIELDNAMES[1]: 1,
+            PP_FIELDNAMES[2]: "currency",
+            PP_FIELDNAMES[3]: "category",
+            PP_FIELDNAMES[4]: "note",
+        }
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            fname = os.path.join(tmpdirname, "output")
+            with PortfolioPerformanceWriter(outfile=fname) as pp_writer:
+                pp_writer.update_output(dict(test_entry))
+                pp_writer.update_output(dict(test_entry))
+            with codecs.open(fname, "r", encoding="utf-8") as testfile:
+                self.assertEqual(
+                    "Datum,Wert,Buchungswährung,Typ,Notiz\r\ndate,1,currency,category,note\r\ndate,1,currency,category,note",
+                    testfile.read(),
+                )
+
+    def test_statement_record_output(self):
+        """test writing statement records gives the same output as writing dictionaries"""
+        test_record = StatementRecord(datetime.date(2020, 1, 2), 0.5, "EUR", "Zinsen", "1: Zinsen")
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            dict_fname = os.path.join(tmpdirname, "dict_output")
+            record_fname = os.path.join(tmpdirname, "record_output")
+            with PortfolioPerformanceWriter(outfile=dict_fname) as pp_writer:
+                pp_writer.update_output(test_record.as_dict())
+            with PortfolioPerformanceWriter(outfile=record_fname) as pp_writer:
+                pp_writer.update_output(test_record)
+            with open(dict_fname, "rb") as dict_file, open(record_fname, "rb") as record_file:
+                self.assertEqual(dict_file.read(), record_file.read())
+
+    def test_value_formatter(self):
+        """test the value formatter formats like the locale aware Decimal formatting of the current locale"""
+        format_value = create_value_formatter()
+        for value in [0.0, -0.0, 1, 0.5, -0.123456789, 123.456789, 1234567.891, 1e20, Decimal("0.30"), 2.5e-9]:
+            with self.subTest(value=value):
+                self.assertEqual(f"{Decimal(value):.8n}", format_value(value))
+
+    def test_value_formatter_conventions(self):
+        """test the value formatter with the decimal point and digit grouping of several locales"""
+        german = {"decimal_point": ",", "thousands_sep": ".", "grouping": [3, 3, 0]}
+        indian = {"decimal_point": ".", "thousands_sep": ",", "grouping": [3, 2, 0]}
+        swiss = {"decimal_point": ".", "thousands_sep": "'", "grouping": [3, locale.CHAR_MAX]}
+        for conventions, value, expected in [
+            (german, 0.123456789, "0,12345679"),
+            (german, -1234567.891, "-1.234.567,9"),
+            (german, 123, "123"),
+            (german, 1e20, "1,0000000e+20"),
+            (indian, 12345678, "1,23,45,678"),
+            (swiss, 12345678, "12345'678"),
+        ]:
+            with self.subTest(conventions=conventions, value=value):
+                self.assertEqual(expected, create_value_formatter(conventions)(value))
+
+    def test_batched_output(self):
+        """test statement records written in batches keep their order with dictionaries written in between"""
+        test_records = [
+            StatementRecord(datetime.date(2020, 1, 2), index / 8, "EUR", "Zinsen", f"{index}: Zinsen")
+            for index in range(WRITE_BATCH_SIZE * 2 + 3)
+        ]
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            dict_fname = os.path.join(tmpdirname, "dict_output")
+            record_fname = os.path.join(tmpdirname, "record_output")
+            with PortfolioPerformanceWriter(outfile=dict_fname) as pp_writer:
+                for test_record in test_records:
+                    pp_writer.update_output(test_record.as_dict())
+            with PortfolioPerformanceWriter(outfile=record_fname) as pp_writer:
+                for index, test_record in enumerate(test_records):
+                    pp_writer.update_output(test_record.as_dict() if index % 500 == 7 else test_record)
+            with open(dict_fname, "rb") as dict_file, open(record_fname, "rb") as record_file:
+                self.assertEqual(dict_file.read(), record_file.read())
+
+    def test_streaming_output_trailing_whitespace(self):
+        """test the streamed output ends like the buffered output if the last entry ends with whitespace"""
+        test_record = StatementRecord(datetime.date(2020, 1, 2), 0.5, "EUR", "Einlage", ": ")
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            buffered_fname = os.path.join(tmpdirname, "buffered_output")
+            streamed_fname = os.path.join(tmpdirname, "streamed_output")
+            pp_writer = PortfolioPerformanceWriter()
+            pp_writer.init_output()
+            pp_writer.update_output(test_record)
+            pp_writer.update_output(test_record)
+            pp_writer.write_pp_csv_file(buffered_fname)
+            with PortfolioPerformanceWriter(outfile=streamed_fname) as pp_writer:
+                pp_writer.update_output(test_record)
+                pp_writer.update_output(test_record)
+            with open(buffered_fname, "rb") as buffered_file, open(streamed_fname, "rb") as streamed_file:
+                self.assertEqual(buffered_file.read(), streamed_file.read())
+
+    def test_streamed_output_on_error(self):
+        """test an error while streaming leaves the output file of a previous run unchanged"""
+        test_record = StatementRecord(datetime.date(2020, 1, 2), 0.5, "EUR", "Einlage", "")
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            for fname in ["streamed_output.csv", "streamed_output.csv.gz"]:
+                with self.subTest(fname=fname):
+                    streamed_fname = os.path.join(tmpdirname, fname)
+                    with PortfolioPerformanceWriter(outfile=streamed_fname) as pp_writer:
+                        pp_writer.update_output(test_record)
+                    with open(streamed_fname, "rb") as streamed_file:
+                        expected_content = streamed_file.read()
+
+                    with self.assertRaises(ValueError):
+                        with PortfolioPerformanceWriter(outfile=streamed_fname) as pp_writer:
+                            for _ in range(WRITE_BATCH_SIZE * 3):
+                                pp_writer.update_output(test_record)
+                            raise ValueError("invalid date")
+                    with open(streamed_fname, "rb") as streamed_file:
+                        self.assertEqual(expected_content, streamed_file.read())
+            self.assertEqual(["streamed_output.csv", "streamed_output.csv.gz"], sorted(os.listdir(tmpdirname)))
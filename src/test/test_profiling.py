@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the profiling module
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import os
+import tempfile
+import unittest
+
+from src import profiling
+from src.batch_processor import write_statements
+from src.p2p_statement_parser import PeerToPeerPlatformParser
+
+
+class TestProfiling(unittest.TestCase):
+    """Test case implementation for the profiling module"""
+
+    def test_disabled_profiling(self):
+        """test functions and iterators are not wrapped without an active profiler"""
+        self.assertIsNone(profiling.get_profiler())
+        self.assertIs(len, profiling.wrap("stage", len))
+        statements = [1, 2]
+        self.assertIs(statements, profiling.wrap_iterator("stage", statements))
+
+    def test_stage_profiler(self):
+        """test calls and items are counted per stage"""
+        with profiling.profile() as profiler:
+            self.assertIs(profiler, profiling.get_profiler())
+            self.assertEqual(3, profiling.wrap("length", len)([1, 2, 3]))
+            self.assertEqual([1, 2], list(profiling.wrap_iterator("items", [1, 2])))
+            with profiling.measure("block", count=5):
+                pass
+        self.assertIsNone(profiling.get_profiler())
+        self.assertEqual(
+            [("length", 1), ("items", 2), ("block", 5)],
+            [(stats["stage"], stats["count"]) for stats in profiler.get_stats()],
+        )
+        self.assertIn("length", profiler.format_table())
+
+    def test_profile_conversion(self):
+        """test the stages of a conversion are measured"""
+        config_file = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "config", "mintos.yml")
+        account_statement_file = os.path.join(os.path.dirname(__file__), "testdata", "mintos.csv")
+        platform_parser = PeerToPeerPlatformParser(config_file, account_statement_file)
+        expected_statement = platform_parser.parse_account_statement(aggregate="daily")
+
+        with tempfile.TemporaryDirectory() as tmpdirname, profiling.profile() as profiler:
+            statement = platform_parser.parse_account_statement(aggregate="daily")
+            write_statements(platform_parser.iter_account_statement(), os.path.join(tmpdirname, "output.csv"))
+        self.assertEqual(expected_statement, statement)
+
+        stats = {stats["stage"]: stats["count"] for stats in profiler.get_stats()}
+        self.assertEqual(
+            {
+                "sniff",
+                "read_csv",
+                "build_record",
+                "classify",
+                "parse_date",
+                "parse_value",
+                "aggregate",
+                "write",
+                "flush",
+            },
+            set(stats),
+        )
+        self.assertEqual(2, stats["sniff"])
+        self.assertEqual(len(platform_parser.parse_account_statement()), stats["write"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,9 +4,13 @@ Unit test for the p2p statement class
 
 Copyright 2021-12-12 AlexanderLill
 """
+import datetime
+import os
 import unittest
 
+from src.p2p_config import load_config
 from src.statement import Statement
+from src.statement import StatementRecord
 
 
 class TestStatement(unittest.TestCase):
@@ -28,6 +32,41 @@ class TestStatement(unittest.TestCase):
             expected_output = item[1]
             self.assertEqual(expected_output, Statement._parse_value(test_input))
 
+    def test_record_from_row(self):
+        """test building statement records from account statement rows"""
+        config = load_config(os.path.join(os.path.dirname(__file__), "..", "..", "config", "mintos.yml"))
+        columns = config.get_column_layout(["Transaction ID:", "Date", "Details", "Turnover", "Balance", "Currency"])
+
+        test_data = [
+            (
+                ["1", "2020-01-02 10:00:00", "Interest received", "0.5", "", "EUR"],
+                StatementRecord(datetime.date(2020, 1, 2), 0.5, "EUR", "Zinsen", "1: Interest received"),
+            ),
+            (
+                [
+                    "2",
+                    "2020-01-03 10:00:00",
+                    "Loan 1 - discount/premium for secondary market transaction",
+                    "-0.25",
+                    "",
+                    "EUR",
+                ],
+                StatementRecord(
+                    datetime.date(2020, 1, 3),
+                    -0.25,
+                    "EUR",
+                    "Gebühren",
+                    "2: Loan 1 - discount/premium for secondary market transaction",
+                ),
+            ),
+            (["3", "2020-01-04 10:00:00", "Principal received Loan ID: 1", "5", "", "EUR"], None),
+            (["4", "2020-01-04 10:00:00", "Something unexpected", "5", "", "EUR"], None),
+        ]
+
+        for row, expected_record in test_data:
+            with self.subTest(row=row):
+                self.assertEqual(expected_record, StatementRecord.from_row(config, row, columns))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the synthetic account statement generator of the benchmarks
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import glob
+import os
+import random
+import re
+import tempfile
+import unittest
+
+from bench.statement_generator import LOAN_ID_PLACEHOLDER
+from bench.statement_generator import sample_regex
+from bench.statement_generator import StatementGenerator
+from src.p2p_statement_parser import PeerToPeerPlatformParser
+
+
+class TestStatementGenerator(unittest.TestCase):
+    """Test case implementation for StatementGenerator"""
+
+    def test_sample_regex(self):
+        """test generated strings match the regular expression"""
+        rng = random.Random(0)
+        for pattern in ["(^.*[Ii]nterest received.*)|(^FX commission.*)", "^Withdraw.*", r"\d+ days? late$"]:
+            for _ in range(10):
+                self.assertTrue(re.match(pattern, sample_regex(pattern, rng)))
+
+    def test_booking_type_cardinality(self):
+        """test booking types with arbitrary text get a loan number per row, like real account statements"""
+        config_file = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "config", "mintos.yml")
+        generator = StatementGenerator(config_file)
+        booking_type_column = generator.config.get_booking_type()
+        rows = list(generator.iter_rows(1000))
+        self.assertLess(500, len({row[booking_type_column] for row in rows}))
+        self.assertFalse([row for row in rows if LOAN_ID_PLACEHOLDER in row[booking_type_column]])
+
+    def test_generated_statements(self):
+        """test the generated statements of every platform are parsed completely"""
+        config_dir = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "config")
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            for config_file in sorted(glob.glob(os.path.join(config_dir, "*.yml"))):
+                with self.subTest(config_file=os.path.basename(config_file)):
+                    generator = StatementGenerator(config_file)
+                    account_statement_file = os.path.join(tmpdirname, "statement.csv")
+                    generator.write(account_statement_file, 500, rows_per_day=10)
+
+                    statement = PeerToPeerPlatformParser(config_file, account_statement_file).parse_account_statement()
+                    self.assertLess(0, len(statement))
+                    self.assertLess(len(statement), 500)
+                    self.assertLessEqual(
+                        set(generator.booking_types) - {"Ignored", "Undecided"}, {entry["Typ"] for entry in statement}
+                    )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the vectorized account statement parser
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import glob
+import itertools
+import os
+import unittest
+
+from src.p2p_statement_parser import PeerToPeerPlatformParser
+from src.p2p_statement_parser import SUPPORTED_AGGREGATIONS
+from src.platform_detection import HeaderSignatureIndex
+from src.vectorized_parser import pd
+from src.vectorized_parser import VectorizedPlatformParser
+
+
+TESTDATA_DIR = os.path.join(os.path.dirname(__file__), "testdata")
+CONFIG_DIR = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "config")
+
+
+@unittest.skipUnless(pd, "pandas is not installed")
+class TestVectorizedPlatformParser(unittest.TestCase):
+    """Test case implementation for VectorizedPlatformParser"""
+
+    def test_identical_output(self):
+        """test the vectorized engine produces the same output as the python engine for all test data and platforms"""
+        signature_index = HeaderSignatureIndex.from_registry()
+        for account_statement_file in sorted(glob.glob(os.path.join(TESTDATA_DIR, "*.csv"))):
+            testdata = os.path.basename(account_statement_file)
+            platforms = signature_index.detect(account_statement_file)
+            self.assertTrue(platforms, f"no platform matches {testdata}")
+            for platform, aggregate in itertools.product(platforms, SUPPORTED_AGGREGATIONS):
+                config_file = os.path.join(CONFIG_DIR, f"{platform}.yml")
+                with self.subTest(testdata=testdata, platform=platform, aggregate=aggregate):
+                    self.assertEqual(
+                        PeerToPeerPlatformParser(config_file, account_statement_file).parse_account_statement(
+                            aggregate
+                        ),
+                        VectorizedPlatformParser(config_file, account_statement_file).parse_account_statement(
+                            aggregate
+                        ),
+                    )
+
+
+if __name__ == "__main__":
+    unittest.main()
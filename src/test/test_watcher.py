@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for the watch folder service
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.batch_processor import BatchProcessor
+from src.watcher import DirectoryWatcher
+from src.watcher import is_input_file
+from src.watcher import WatchService
+
+
+class TestWatcher(unittest.TestCase):
+    """Test case implementation for DirectoryWatcher and WatchService"""
+
+    def setUp(self):
+        """test case setUp, run for each test case"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.config_file = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "config", "mintos.yml")
+        self.statement_file = os.path.join(os.path.dirname(__file__), "testdata", "mintos.csv")
+
+    def test_is_input_file(self):
+        """test output files, hidden and temporary files are not converted"""
+        self.assertTrue(is_input_file("mintos.csv"))
+        self.assertTrue(is_input_file("Mintos.CSV"))
+        self.assertFalse(is_input_file("portfolio_performance__mintos.csv"))
+        self.assertFalse(is_input_file(".mintos.csv"))
+        self.assertFalse(is_input_file("mintos.csv.part"))
+
+    def test_scan_waits_for_settle_time(self):
+        """test files are reported once they did not change for the settle time"""
+        watcher = DirectoryWatcher([self.tmpdir.name], settle_time=2)
+        statement_file = os.path.join(self.tmpdir.name, "mintos.csv")
+        with open(statement_file, "w", encoding="utf-8") as partial_file:
+            partial_file.write("Transaction ID:;Date;Details")
+
+        self.assertEqual([], watcher.scan(now=0))
+        self.assertEqual([], watcher.scan(now=1))
+        shutil.copy(self.statement_file, statement_file)
+        self.assertEqual([], watcher.scan(now=2))
+        self.assertTrue(watcher.has_pending_files())
+        self.assertEqual([statement_file], watcher.scan(now=4))
+
+        watcher.mark_converted([statement_file])
+        self.assertFalse(watcher.has_pending_files())
+        self.assertEqual([], watcher.scan(now=10))
+        self.assertEqual([statement_file], watcher.get_input_files(self.tmpdir.name))
+
+        os.remove(statement_file)
+        self.assertEqual([], watcher.scan(now=11))
+        self.assertEqual([], watcher.get_input_files(self.tmpdir.name))
+
+    def test_poll_converts_directory(self):
+        """test all files of a directory are converted into one output file once they are written"""
+        processor = BatchProcessor(self.config_file, "mintos", aggregate="daily")
+        service = WatchService(processor, [self.tmpdir.name], settle_time=1)
+        outfile = os.path.join(self.tmpdir.name, "portfolio_performance__mintos.csv")
+        first_file = os.path.join(self.tmpdir.name, "first.csv")
+        second_file = os.path.join(self.tmpdir.name, "second.csv")
+
+        shutil.copy(self.statement_file, first_file)
+        self.assertEqual([], service.poll(now=0))
+        self.assertEqual([first_file], service.poll(now=1))
+        self.assertTrue(os.path.exists(outfile))
+        with open(outfile, "r", encoding="utf-8") as output:
+            single_output = output.read()
+
+        shutil.copy(self.statement_file, second_file)
+        self.assertEqual([], service.poll(now=2))
+        self.assertEqual([first_file, second_file], service.poll(now=3))
+        self.assertEqual([], service.poll(now=4))
+        with open(outfile, "r", encoding="utf-8") as output:
+            merged_output = output.read()
+        self.assertNotEqual(single_output, merged_output)
+        self.assertEqual(len(single_output.splitlines()), len(merged_output.splitlines()))
+
+    def test_poll_per_input(self):
+        """test only the changed files are converted in the per-input output mode"""
+        processor = BatchProcessor(self.config_file, "mintos")
+        service = WatchService(processor, [self.tmpdir.name], output_mode="per-input", settle_time=1)
+        first_file = os.path.join(self.tmpdir.name, "first.csv")
+        second_file = os.path.join(self.tmpdir.name, "second.csv")
+
+        shutil.copy(self.statement_file, first_file)
+        service.poll(now=0)
+        self.assertEqual([first_file], service.poll(now=1))
+        shutil.copy(self.statement_file, second_file)
+        service.poll(now=2)
+        self.assertEqual([second_file], service.poll(now=3))
+        self.assertEqual(
+            [
+                "first.csv",
+                "portfolio_performance__mintos__first.csv",
+                "portfolio_performance__mintos__second.csv",
+                "second.csv",
+            ],
+            sorted(os.listdir(self.tmpdir.name)),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
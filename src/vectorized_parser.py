@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Module for a vectorized peer to peer loan account statement parser based on pandas.
+
+pandas is an optional dependency; it is only required if the vectorized engine is used.
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import datetime
+import io
+import logging
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:  # pragma: no cover
+    np = None
+    pd = None
+
+from src import profiling
+from src.p2p_config import get_config
+from src.p2p_config import NUMBER_FORMAT_SAMPLE_SIZE
+from src.p2p_statement_parser import PeerToPeerPlatformParser
+from src.statement import StatementRecord
+
+
+logger = logging.getLogger(__name__)
+
+
+class VectorizedPlatformParser(PeerToPeerPlatformParser):
+    """
+    Implementation of a generic p2p investment platform account statement parser using columnar operations instead
+    of processing each statement on its own. The output is identical to the one of PeerToPeerPlatformParser.
+    """
+
+    def __init__(self, config, infile):
+        """
+        Constructor for VectorizedPlatformParser
+        """
+        if pd is None:
+            raise ImportError("The vectorized engine requires pandas. Install it via 'pip install pandas'.")
+        super().__init__(config, infile)
+
+    def __classify(self, booking_types):
+        """
+        Map the booking types to their categories. Every distinct booking type is matched only once against the type
+        regexes in priority order.
+
+        :param booking_types: column of booking types
+
+        :return: array of categories; 'Undecided' for special entries, the empty string if unknown
+        """
+        codes, unique_booking_types = pd.factorize(booking_types)
+        unique_booking_types = pd.Series(unique_booking_types, dtype=object)
+
+        conditions = []
+        categories = []
+        for regex, category in self.config.get_category_mappings():
+            if regex:
+                conditions.append(unique_booking_types.str.match(regex).to_numpy(dtype=bool))
+                categories.append(category)
+        unique_categories = np.select(conditions, categories, default="").astype(object)
+        return unique_categories[codes]
+
+    def __parse_dates(self, booking_dates):
+        """
+        Parse the booking dates with the configured date format. Statements without a date get 1970-01-01.
+
+        :param booking_dates: column of booking dates
+
+        :return: array of datetime.date objects
+        """
+        codes, unique_dates = pd.factorize(booking_dates)
+        unique_dates = pd.Series(unique_dates, dtype=object)
+        has_date = unique_dates != ""
+
+        parsed_dates = np.full(len(unique_dates), datetime.date(1970, 1, 1), dtype=object)
+        if has_date.any():
+            timestamps = pd.to_datetime(unique_dates[has_date], format=self.config.get_booking_date_format())
+            parsed_dates[has_date.to_numpy()] = timestamps.dt.date.to_numpy(dtype=object)
+        return parsed_dates[codes]
+
+    def __parse_values(self, raw_values):
+        """
+        Parse the statement values from string to float. If the number format of the platform is known, the
+        separators are replaced accordingly; values not matching the format are parsed by the value parser of the
+        configuration. Otherwise the same rules for commas and dots as Statement._parse_value are used.
+
+        :param raw_values: column of statement values as string
+
+        :return: array of parsed values
+        """
+        number_format = self.config.get_number_format()
+        if number_format:
+            values = raw_values.str.strip("€")
+            if number_format.get("grouping"):
+                values = values.str.replace(number_format["grouping"], "", regex=False)
+            values = values.str.replace(number_format["decimal"], ".", regex=False)
+            try:
+                return values.astype(float).to_numpy()
+            except ValueError:
+                return raw_values.map(self.config.parse_booking_value).astype(float).to_numpy()
+
+        values = raw_values.str.strip("€")
+        dot_pos = values.str.find(".")
+        comma_pos = values.str.find(",")
+
+        single_separator = (dot_pos == -1) | (comma_pos == -1)
+        dot_grouping = ~single_separator & (dot_pos < comma_pos)
+        comma_grouping = ~single_separator & ~dot_grouping
+
+        values = values.where(~dot_grouping, values.str.replace(".", "", regex=False))
+        values = values.where(~comma_grouping, values.str.replace(",", "", regex=False))
+        values = values.str.replace(",", ".", regex=False)
+        return values.astype(float).to_numpy()
+
+    def iter_formatted_entries(self, infile, header_line=None):
+        """
+        Yield the statement records of an opened account statement csv file without any aggregation. The statements
+        are read and processed column by column.
+
+        :param infile: text stream of the account statement, positioned at the header line
+        :param header_line: header line of the account statement if infile is positioned behind it
+
+        :return: generator of StatementRecord objects
+        """
+        if self.config is None:
+            self.config = get_config(self.config_file)
+
+        if header_line is None:
+            header_line = infile.readline()
+            infile.seek(0)
+        else:
+            infile = io.StringIO(header_line + infile.read())
+        dialect_parameters = profiling.wrap("sniff", self._get_dialect_parameters)(header_line)
+        with profiling.measure("read_csv"):
+            account_statement = pd.read_csv(
+                infile,
+                sep=dialect_parameters["delimiter"],
+                quotechar=dialect_parameters["quotechar"],
+                doublequote=dialect_parameters.get("doublequote", True),
+                skipinitialspace=dialect_parameters.get("skipinitialspace", False),
+                dtype=str,
+                keep_default_na=False,
+                index_col=False,
+            )
+
+        if self.config.needs_number_format_detection():
+            number_format = self.config.detect_number_format(
+                account_statement[self.config.get_booking_value()].head(NUMBER_FORMAT_SAMPLE_SIZE)
+            )
+            self.config = self.config.with_number_format(number_format)
+
+        categories = profiling.wrap("classify", self.__classify)(account_statement[self.config.get_booking_type()])
+        relevant = (categories != "") & (categories != "Ignored")
+        if not relevant.any():
+            return
+        account_statement = account_statement[relevant]
+        categories = categories[relevant]
+
+        values = profiling.wrap("parse_value", self.__parse_values)(account_statement[self.config.get_booking_value()])
+        undecided = categories == "Undecided"
+        categories[undecided] = np.where(values[undecided] >= 0, "Zinsen", "Gebühren")
+
+        dates = profiling.wrap("parse_date", self.__parse_dates)(account_statement[self.config.get_booking_date()])
+        if self.config.get_booking_currency():
+            currencies = account_statement[self.config.get_booking_currency()]
+        else:
+            currencies = np.full(len(account_statement), "EUR", dtype=object)
+        notes = (
+            account_statement[self.config.get_booking_id()]
+            + ": "
+            + account_statement[self.config.get_booking_details()]
+        )
+
+        for date, value, currency, category, note in zip(dates, values.tolist(), currencies, categories, notes):
+            yield StatementRecord(date, round(value, 9), currency, category, note)
@@ -0,0 +1,343 @@
+# -*- coding: utf-8 -*-
+"""
+Module for converting account statement files as soon as they are dropped into watched directories.
+
+The service runs until it is interrupted. The platform configuration and the parser modules are loaded once and kept
+for all conversions. Directories are watched with inotify on Linux, other platforms poll the directories. A new or
+changed file is only converted once its size and modification time did not change for the settle time, so files which
+are still being written are not read. The Portfolio Performance files written by the service are ignored.
+
+Copyright 2026-10-18 ChrisRBe
+"""
+import copy
+import logging
+import os
+import select
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from src.batch_processor import OUTPUT_FILE_PREFIX
+from src.p2p_config import get_config
+
+
+INPUT_FILE_SUFFIXES = (".csv", ".csv.gz", ".csv.xz", ".csv.bz2", ".zip")
+IGNORED_FILE_PREFIXES = (OUTPUT_FILE_PREFIX, ".", "~")
+SETTLE_TIME = 2.0
+POLL_INTERVAL = 1.0
+logger = logging.getLogger(__name__)
+
+
+def is_input_file(file_name):
+    """
+    Check if a file in a watched directory is an account statement file. Hidden files, temporary files and the
+    Portfolio Performance files written by the service are skipped.
+
+    :param file_name: name of the file
+
+    :return: True if the file is converted
+    """
+    return file_name.lower().endswith(INPUT_FILE_SUFFIXES) and not file_name.startswith(IGNORED_FILE_PREFIXES)
+
+
+def convert_files(processor, infiles, output_mode):
+    """
+    Worker function converting account statement files of one directory.
+
+    :param processor: BatchProcessor of the platform
+    :param infiles: list of account statement files
+    :param output_mode: merge, dedup or per-input
+
+    :return: number of entries written
+    """
+    return processor.convert(infiles, output_mode)
+
+
+class PollingNotifier(object):
+    """
+    Waits for the next scan of the watched directories by sleeping.
+    """
+
+    waits_for_events = False
+
+    def wait(self, timeout):
+        """
+        Wait for the given time.
+
+        :param timeout: time to wait in seconds
+        """
+        time.sleep(timeout)
+
+    def close(self):
+        """
+        Nothing to release.
+        """
+
+
+class InotifyNotifier(object):
+    """
+    Waits for changes in the watched directories using the inotify API of Linux.
+    """
+
+    waits_for_events = True
+    EVENT_MASK = 0x2 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200  # modify, close write, moved from/to, create, delete
+
+    def __init__(self, libc, file_descriptor):
+        """
+        Constructor for InotifyNotifier, use create to get an instance.
+
+        :param libc: ctypes handle of the C library
+        :param file_descriptor: inotify file descriptor
+        """
+        self._libc = libc
+        self._file_descriptor = file_descriptor
+
+    @classmethod
+    def create(cls, directories):
+        """
+        Set up inotify watches for the directories.
+
+        :param directories: list of directories
+
+        :return: InotifyNotifier, None if inotify is not available
+        """
+        if not sys.platform.startswith("linux"):
+            return None
+        import ctypes
+        import ctypes.util
+
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            file_descriptor = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError) as error:
+            logger.debug("inotify is not available: %s", error)
+            return None
+        if file_descriptor < 0:
+            logger.debug("inotify is not available: %s", os.strerror(ctypes.get_errno()))
+            return None
+
+        notifier = cls(libc, file_descriptor)
+        for directory in directories:
+            if libc.inotify_add_watch(file_descriptor, os.fsencode(directory), cls.EVENT_MASK) < 0:
+                logger.debug("Unable to watch %s with inotify: %s", directory, os.strerror(ctypes.get_errno()))
+                notifier.close()
+                return None
+        return notifier
+
+    def wait(self, timeout):
+        """
+        Wait until a watched directory changed or the timeout passed.
+
+        :param timeout: maximum time to wait in seconds, None to wait for the next change
+        """
+        readable, _, _ = select.select([self._file_descriptor], [], [], timeout)
+        while readable:
+            try:
+                os.read(self._file_descriptor, 65536)
+            except BlockingIOError:
+                break
+
+    def close(self):
+        """
+        Close the inotify file descriptor.
+        """
+        if self._file_descriptor is not None:
+            os.close(self._file_descriptor)
+            self._file_descriptor = None
+
+
+class DirectoryWatcher(object):
+    """
+    Keeps track of the account statement files in the watched directories and reports the new or changed files
+    once they are completely written.
+    """
+
+    def __init__(self, directories, settle_time=SETTLE_TIME):
+        """
+        Constructor for DirectoryWatcher
+
+        :param directories: list of directories to watch
+        :param settle_time: time in seconds the size and modification time of a file must not change before it is
+        reported
+        """
+        self.directories = [os.path.abspath(directory) for directory in directories]
+        self.settle_time = settle_time
+        self._pending = {}
+        self._converted = {}
+
+    def __list_files(self):
+        for directory in self.directories:
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if is_input_file(entry.name) and entry.is_file():
+                            yield entry
+            except OSError as error:
+                logger.warning("Unable to read directory %s: %s", directory, error)
+
+    def scan(self, now=None):
+        """
+        Check the watched directories for new or changed files.
+
+        :param now: current time as returned by time.monotonic, used to check the settle time
+
+        :return: sorted list of files which are ready to be converted
+        """
+        now = time.monotonic() if now is None else now
+        ready_files = []
+        present_files = set()
+        for entry in self.__list_files():
+            try:
+                file_stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            version = (file_stat.st_mtime_ns, file_stat.st_size)
+            present_files.add(entry.path)
+            if self._converted.get(entry.path) == version:
+                continue
+            pending = self._pending.get(entry.path)
+            if pending is None or pending[0] != version:
+                self._pending[entry.path] = (version, now)
+            elif now - pending[1] >= self.settle_time:
+                ready_files.append(entry.path)
+
+        for removed_file in (set(self._pending) | set(self._converted)) - present_files:
+            logger.info("%s was removed", removed_file)
+            self._pending.pop(removed_file, None)
+            self._converted.pop(removed_file, None)
+        return sorted(ready_files)
+
+    def has_pending_files(self):
+        """
+        Check if there are changed files which are not converted yet.
+
+        :return: True if files are waiting for the settle time or their conversion
+        """
+        return bool(self._pending)
+
+    def mark_converted(self, infiles):
+        """
+        Mark files reported by scan as converted, they are reported again once they change.
+
+        :param infiles: list of files
+        """
+        for infile in infiles:
+            version, _ = self._pending.pop(infile)
+            self._converted[infile] = version
+
+    def get_input_files(self, directory):
+        """
+        Get all account statement files of a directory marked as converted.
+
+        :param directory: watched directory
+
+        :return: sorted list of files
+        """
+        directory = os.path.abspath(directory)
+        return sorted(infile for infile in self._converted if os.path.dirname(infile) == directory)
+
+
+class WatchService(object):
+    """
+    Converts the account statement files dropped into the watched directories, writing the same Portfolio Performance
+    files as a conversion from the command line. Changes of several directories are converted in parallel by a pool of
+    at most jobs worker processes.
+    """
+
+    def __init__(
+        self, processor, directories, output_mode="merge", settle_time=SETTLE_TIME, poll_interval=POLL_INTERVAL
+    ):
+        """
+        Constructor for WatchService
+
+        :param processor: BatchProcessor of the platform
+        :param directories: list of directories to watch
+        :param output_mode: merge, dedup or per-input; with merge and dedup a change converts all files of the
+        directory again, with per-input only the changed files are converted
+        :param settle_time: time in seconds the size and modification time of a file must not change before it is
+        converted
+        :param poll_interval: time in seconds between the scans of the directories while files are pending
+        """
+        self.processor = processor
+        self.output_mode = output_mode
+        self.poll_interval = poll_interval
+        self.watcher = DirectoryWatcher(directories, settle_time)
+        self._executor = None
+        self._conversions = {}
+
+    def __submit(self, directory, infiles):
+        if self.processor.jobs > 1:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processor.jobs, initializer=get_config, initargs=(self.processor.config_file,)
+                )
+            worker_processor = copy.copy(self.processor)
+            worker_processor.jobs = 1
+            self._conversions[directory] = self._executor.submit(
+                convert_files, worker_processor, infiles, self.output_mode
+            )
+            return
+        try:
+            statement_count = convert_files(self.processor, infiles, self.output_mode)
+            logger.info("Converted %s entries of %s", statement_count, directory)
+        except Exception:
+            logger.exception("Unable to convert the account statements in %s", directory)
+
+    def __collect_conversions(self):
+        for directory, conversion in list(self._conversions.items()):
+            if not conversion.done():
+                continue
+            del self._conversions[directory]
+            try:
+                logger.info("Converted %s entries of %s", conversion.result(), directory)
+            except Exception:
+                logger.exception("Unable to convert the account statements in %s", directory)
+
+    def poll(self, now=None):
+        """
+        Scan the watched directories once and convert the files which are ready. Directories with a running conversion
+        are skipped; their changes are converted once the conversion finished.
+
+        :param now: current time as returned by time.monotonic
+
+        :return: list of files whose conversion was started
+        """
+        self.__collect_conversions()
+        ready_files = {}
+        for infile in self.watcher.scan(now):
+            ready_files.setdefault(os.path.dirname(infile), []).append(infile)
+
+        started_files = []
+        for directory, infiles in ready_files.items():
+            if directory in self._conversions:
+                continue
+            self.watcher.mark_converted(infiles)
+            if self.output_mode != "per-input":
+                infiles = self.watcher.get_input_files(directory)
+            logger.info("Converting %s", ", ".join(infiles))
+            self.__submit(directory, infiles)
+            started_files += infiles
+        return started_files
+
+    def run(self):
+        """
+        Watch the directories and convert the files until the service is interrupted.
+        """
+        get_config(self.processor.config_file)
+        notifier = InotifyNotifier.create(self.watcher.directories) or PollingNotifier()
+        logger.info(
+            "Watching %s %s",
+            ", ".join(self.watcher.directories),
+            "with inotify" if notifier.waits_for_events else "by polling",
+        )
+        try:
+            while True:
+                self.poll()
+                if notifier.waits_for_events and not (self.watcher.has_pending_files() or self._conversions):
+                    notifier.wait(None)
+                else:
+                    notifier.wait(self.poll_interval)
+        finally:
+            notifier.close()
+            if self._executor is not None:
+                self._executor.shutdown()